@@ -0,0 +1,100 @@
+"""
+Benchmark: the bulk data filters, compared to equivalent templates
+using only Jinja2's built-in filters
+
+Usage: python benchmarks/bulk_filters.py [ITEMS]
+"""
+
+import sys
+import timeit
+
+import jinja2
+
+from jinjanator.filters import plugin_filters
+
+
+CASES = {
+    "group": (
+        '{% for dc, members in hosts|groupby("dc") %}{{ dc }}={{ members|length }};{% endfor %}',
+        (
+            '{% for dc, members in hosts|group_by_key("dc")|dictsort %}'
+            "{{ dc }}={{ members|length }};{% endfor %}"
+        ),
+    ),
+    "lookup": (
+        (
+            "{% for host in hosts %}"
+            '{{ (dcs|selectattr("name", "eq", host.dc)|first).city }};{% endfor %}'
+        ),
+        (
+            '{% set by_name = dcs|index_by("name") %}'
+            "{% for host in hosts %}{{ by_name[host.dc].city }};{% endfor %}"
+        ),
+    ),
+    "join": (
+        (
+            "{% for host in hosts %}{% for svc in services %}{% if svc.host == host.name %}"
+            "{{ host.name }}:{{ svc.port }};{% endif %}{% endfor %}{% endfor %}"
+        ),
+        (
+            '{% for host, svc in hosts|join_on(services, "name", "host") %}'
+            "{{ host.name }}:{{ svc.port }};{% endfor %}"
+        ),
+    ),
+    "unique": (
+        '{{ hosts|unique(attribute="dc")|map(attribute="name")|join(",") }}',
+        '{{ hosts|unique_by("dc")|map(attribute="name")|join(",") }}',
+    ),
+    "sum": (
+        (
+            '{% for dc, members in hosts|groupby("dc") %}'
+            '{{ dc }}={{ members|sum(attribute="cores") }};{% endfor %}'
+        ),
+        (
+            '{% for dc, cores in hosts|sum_by("dc", "cores")|dictsort %}'
+            "{{ dc }}={{ cores }};{% endfor %}"
+        ),
+    ),
+}
+
+
+def main() -> None:
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+    env = jinja2.Environment()  # noqa: S701
+    env.filters.update(plugin_filters())
+
+    context = {
+        "hosts": [
+            {"name": f"host{i}", "dc": f"dc{i % 50:02}", "cores": i % 16 + 1} for i in range(items)
+        ],
+        "dcs": [{"name": f"dc{i:02}", "city": f"city{i}"} for i in range(50)],
+        "services": [{"host": f"host{i % items}", "port": 8000 + i} for i in range(items)],
+    }
+
+    print(f"{items} items")
+
+    for name, (builtin_source, bulk_source) in CASES.items():
+        builtin = env.from_string(builtin_source)
+        bulk = env.from_string(bulk_source)
+
+        if builtin.render(context) != bulk.render(context):
+            msg = f"{name}: bulk filters produced different output"
+            raise AssertionError(msg)
+
+        # the nested loop join is quadratic; time it once
+        repeat = 1 if name == "join" else 5
+        builtin_time = min(
+            timeit.repeat(lambda t=builtin: t.render(context), number=1, repeat=repeat)
+        )
+        bulk_time = min(timeit.repeat(lambda t=bulk: t.render(context), number=1, repeat=5))
+
+        print(
+            f"{name:8} built-in: {builtin_time * 1e3:9.2f} ms"
+            f"  bulk: {bulk_time * 1e3:7.2f} ms"
+            f"  speedup: {builtin_time / bulk_time:8.2f}x",
+        )
+
+
+if __name__ == "__main__":
+    main()
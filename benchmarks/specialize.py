@@ -0,0 +1,82 @@
+"""
+Benchmark: rendering a template specialized against static data,
+compared to rendering it with the full context
+
+Usage: python benchmarks/specialize.py [RENDERS]
+"""
+
+import sys
+import timeit
+
+import jinja2
+
+from jinjanator.specialize import specialize
+
+
+TEMPLATE = """\
+# {{ site.name|upper }} ({{ site.environment }})
+{% for zone in site.zones %}
+zone {{ zone.name }} {
+{%- for resolver in site.resolvers %}
+    resolver {{ resolver|lower }};
+{%- endfor %}
+{%- if site.features.tls %}
+    ssl_protocols {{ site.tls.protocols|join(" ") }};
+    ssl_ciphers {{ site.tls.ciphers|join(":") }};
+{%- endif %}
+    server_name {{ host.name }}.{{ zone.name }}.{{ site.domain }};
+    listen {{ host.address }}:{{ site.ports.https if site.features.tls else site.ports.http }};
+}
+{% endfor %}
+"""
+
+STATIC = {
+    "site": {
+        "name": "example",
+        "environment": "production",
+        "domain": "example.com",
+        "zones": [{"name": f"zone{i}"} for i in range(20)],
+        "resolvers": ["8.8.8.8", "8.8.4.4", "1.1.1.1"],
+        "features": {"tls": True},
+        "tls": {
+            "protocols": ["TLSv1.2", "TLSv1.3"],
+            "ciphers": ["ECDHE-ECDSA-AES128-GCM-SHA256", "ECDHE-RSA-AES128-GCM-SHA256"],
+        },
+        "ports": {"http": 80, "https": 443},
+    },
+}
+
+
+def main() -> None:
+    renders = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+    env = jinja2.Environment(  # noqa: S701
+        loader=jinja2.DictLoader({"template": TEMPLATE}),
+        keep_trailing_newline=True,
+    )
+
+    hosts = [{"name": f"web{i}", "address": f"10.0.0.{i % 250}"} for i in range(renders)]
+
+    template = env.get_template("template")
+    specialized = specialize(env, "template", STATIC)
+
+    for host in hosts[:10]:
+        if template.render(STATIC, host=host) != specialized.render(host=host):
+            msg = "specialized template produced different output"
+            raise AssertionError(msg)
+
+    generic_time = min(
+        timeit.repeat(lambda: [template.render(STATIC, host=h) for h in hosts], number=1, repeat=5),
+    )
+    specialized_time = min(
+        timeit.repeat(lambda: [specialized.render(host=h) for h in hosts], number=1, repeat=5),
+    )
+
+    print(f"{renders} renders")
+    print(f"generic:     {generic_time * 1e6 / renders:8.1f} us/render")
+    print(f"specialized: {specialized_time * 1e6 / renders:8.1f} us/render")
+    print(f"speedup:     {generic_time / specialized_time:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,7 @@
+from .lazy import lazy
+from .memoize import pure
+from .renderer import Renderer
 from .version import __version__, version
 
 
-__all__ = ("__version__", "version")
+__all__ = ("Renderer", "__version__", "lazy", "pure", "version")
@@ -0,0 +1,71 @@
+"""
+Loading templates from a single zip or tar archive
+
+The archive is opened, and an index of the templates it contains is
+built, once; loading a template is then a lookup in the index (and,
+for zip archives, a read from the already-open file), instead of
+several filesystem operations per template.
+"""
+
+import posixpath
+import tarfile
+import zipfile
+
+from collections.abc import Callable
+from pathlib import Path
+
+import jinja2
+
+
+class ArchiveLoader(jinja2.BaseLoader):
+    """Load templates from a zip archive, or a (possibly compressed) tar
+    archive; template names are the paths of the files in the archive
+
+    Templates in tar archives are read into memory when the archive is
+    opened, since tar archives (especially compressed ones) do not
+    support efficient access to individual members.
+    """
+
+    def __init__(self, path: Path, encoding: str = "utf-8"):
+        self.path = path
+        self.encoding = encoding
+        self.zip: zipfile.ZipFile | None = None
+        self.zip_index: dict[str, zipfile.ZipInfo] = {}
+        self.tar_index: dict[str, bytes] = {}
+
+        if zipfile.is_zipfile(path):
+            self.zip = zipfile.ZipFile(path)
+            self.zip_index = {
+                self.normalize(info.filename): info
+                for info in self.zip.infolist()
+                if not info.is_dir()
+            }
+        else:
+            with tarfile.open(path) as tar:
+                for member in tar:
+                    if member.isfile() and (f := tar.extractfile(member)) is not None:
+                        self.tar_index[self.normalize(member.name)] = f.read()
+
+    @staticmethod
+    def normalize(name: str) -> str:
+        return posixpath.normpath(name.lstrip("/"))
+
+    def get_source(
+        self,
+        environment: jinja2.Environment,  # noqa: ARG002
+        template: str,
+    ) -> tuple[str, str, Callable[[], bool]]:
+        name = self.normalize(template)
+
+        if self.zip is not None and (info := self.zip_index.get(name)) is not None:
+            source = self.zip.read(info)
+        elif (data := self.tar_index.get(name)) is not None:
+            source = data
+        else:
+            raise jinja2.TemplateNotFound(template)
+
+        # the content of the archive does not change while it is open
+        return source.decode(self.encoding), f"{self.path}/{name}", lambda: True
+
+    def list_templates(self) -> list[str]:
+        return sorted(self.zip_index.keys() | self.tar_index.keys())
@@ -0,0 +1,202 @@
+"""
+Filters for efficiently processing large collections
+
+Each of these filters makes a single pass over its input, using
+dictionaries to find related items, instead of sorting (like
+Jinja2's 'groupby' filter) or scanning the collection repeatedly
+(like 'selectattr' inside a loop).
+
+'key' (and 'value') arguments name an item (of mappings) or attribute
+(of other objects); dotted names ('address.city') refer to nested
+items or attributes.
+"""
+
+from collections.abc import Callable, Hashable, Iterable, Mapping
+from typing import Any
+
+
+def key_getter(key: str) -> Callable[[Any], Any]:
+    """Build a function which gets the value of a (possibly dotted) key from an item"""
+    parts = key.split(".")
+
+    def get_part(item: Any, part: str) -> Any:
+        if isinstance(item, Mapping):
+            try:
+                return item[part]
+            except KeyError:
+                pass
+        else:
+            try:
+                return getattr(item, part)
+            except AttributeError:
+                pass
+
+        msg = f"item has no '{key}'"
+        raise KeyError(msg)
+
+    if len(parts) == 1:
+        return lambda item: get_part(item, key)
+
+    def get(item: Any) -> Any:
+        for part in parts:
+            item = get_part(item, part)
+        return item
+
+    return get
+
+
+def index_by(items: Iterable[Any], key: str) -> dict[Hashable, Any]:
+    """Build a dictionary of items, indexed by the value of a key (if
+    several items have the same value, the last one is used)
+
+    ```jinja2
+    {% set hosts_by_name = hosts|index_by("name") %}
+    {{ hosts_by_name["web1"].address }}
+    ```
+    """
+    get = key_getter(key)
+    return {get(item): item for item in items}
+
+
+def group_by_key(items: Iterable[Any], key: str) -> dict[Hashable, list[Any]]:
+    """Group items by the value of a key, keeping the groups (and the
+    items within them) in the order they first appear
+
+    ```jinja2
+    {% for role, members in hosts|group_by_key("role")|items %}
+    ```
+    """
+    get = key_getter(key)
+    groups: dict[Hashable, list[Any]] = {}
+
+    for item in items:
+        k = get(item)
+        if (group := groups.get(k)) is None:
+            groups[k] = [item]
+        else:
+            group.append(item)
+
+    return groups
+
+
+def unique_by(items: Iterable[Any], key: str) -> list[Any]:
+    """Select the first item with each value of a key, in order"""
+    get = key_getter(key)
+    seen: set[Hashable] = set()
+    result: list[Any] = []
+
+    for item in items:
+        k = get(item)
+        if k not in seen:
+            seen.add(k)
+            result.append(item)
+
+    return result
+
+
+def count_by(items: Iterable[Any], key: str) -> dict[Hashable, int]:
+    """Count the items with each value of a key"""
+    get = key_getter(key)
+    counts: dict[Hashable, int] = {}
+
+    for item in items:
+        k = get(item)
+        counts[k] = counts.get(k, 0) + 1
+
+    return counts
+
+
+def join_on(
+    left: Iterable[Any],
+    right: Iterable[Any],
+    key: str,
+    right_key: str | None = None,
+    *,
+    outer: bool = False,
+) -> list[tuple[Any, Any]]:
+    """Join two collections, producing a (left, right) pair for each pair
+    of items with the same value of their keys (if 'right_key' is not
+    specified, 'key' is used for both)
+
+    If 'outer' is true, items from the left collection with no match in
+    the right one are also included, paired with 'None'.
+
+    ```jinja2
+    {% for host, dc in hosts|join_on(datacenters, "dc", "name") %}
+    {{ host.name }} is in {{ dc.city }}
+    {% endfor %}
+    ```
+    """
+    matches = group_by_key(right, right_key or key)
+    get = key_getter(key)
+    result: list[tuple[Any, Any]] = []
+
+    for item in left:
+        found = matches.get(get(item))
+        if found:
+            result.extend((item, match) for match in found)
+        elif outer:
+            result.append((item, None))
+
+    return result
+
+
+def sum_by(items: Iterable[Any], key: str, value: str) -> dict[Hashable, Any]:
+    """Sum the values of one key for the items with each value of another key
+
+    ```jinja2
+    {% for dc, cores in hosts|sum_by("dc", "cores")|items %}
+    ```
+    """
+    get_key = key_getter(key)
+    get_value = key_getter(value)
+    sums: dict[Hashable, Any] = {}
+
+    for item in items:
+        k = get_key(item)
+        sums[k] = sums.get(k, 0) + get_value(item)
+
+    return sums
+
+
+def aggregate_by(items: Iterable[Any], key: str, value: str) -> dict[Hashable, dict[str, Any]]:
+    """Compute the 'count', 'sum', 'min', 'max' and 'mean' of the values
+    of one key, for the items with each value of another key
+
+    ```jinja2
+    {% for dc, stats in hosts|aggregate_by("dc", "memory")|items %}
+    {{ dc }}: {{ stats.min }}-{{ stats.max }} (mean {{ stats.mean }})
+    {% endfor %}
+    ```
+    """
+    get_key = key_getter(key)
+    get_value = key_getter(value)
+    # count, sum, min, max for each group
+    totals: dict[Hashable, list[Any]] = {}
+
+    for item in items:
+        k = get_key(item)
+        v = get_value(item)
+        if (total := totals.get(k)) is None:
+            totals[k] = [1, v, v, v]
+        else:
+            total[0] += 1
+            total[1] += v
+            total[2] = min(total[2], v)
+            total[3] = max(total[3], v)
+
+    return {
+        k: {"count": count, "sum": total, "min": low, "max": high, "mean": total / count}
+        for k, (count, total, low, high) in totals.items()
+    }
+
+
+FILTERS: dict[str, Callable[..., Any]] = {
+    "aggregate_by": aggregate_by,
+    "count_by": count_by,
+    "group_by_key": group_by_key,
+    "index_by": index_by,
+    "join_on": join_on,
+    "sum_by": sum_by,
+    "unique_by": unique_by,
+}
@@ -0,0 +1,166 @@
+"""
+Check mode: load and compile templates, without rendering them
+
+Compiling a template detects syntax errors and references to filters
+and tests which do not exist, without needing any data to render it
+with. Jinja2 only reports unknown filters and tests inside 'if'
+statements when they are used while rendering, so the template's
+syntax tree is also searched for them.
+"""
+
+import json
+
+from collections.abc import Callable, Iterable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import TextIO
+
+import jinja2
+
+from attrs import asdict, define
+from jinja2 import nodes
+
+from .renderer import Renderer
+
+
+@define(frozen=True)
+class CheckFailure:
+    template: str
+    line: int | None
+    error: str
+    message: str
+
+    def __str__(self) -> str:
+        location = self.template if self.line is None else f"{self.template}:{self.line}"
+        return f"{location}: {self.error}: {self.message}"
+
+
+def guarded_names(ast: nodes.Template) -> set[tuple[str, str]]:
+    """Find the filters and tests whose existence the template checks
+    ('"name" is filter' or '"name" is test')"""
+    return {
+        (node.name, node.node.value)
+        for node in ast.find_all(nodes.Test)
+        if node.name in ("filter", "test") and isinstance(node.node, nodes.Const)
+    }
+
+
+def unknown_names(env: jinja2.Environment, ast: nodes.Template) -> list[tuple[int, str, str]]:
+    """Find the uses of filters and tests which do not exist, as (line,
+    kind, name), except those the template checks the existence of"""
+    guarded = guarded_names(ast)
+    unknown = []
+
+    for node in ast.find_all((nodes.Filter, nodes.Test)):
+        kind, known = (
+            ("filter", env.filters) if isinstance(node, nodes.Filter) else ("test", env.tests)
+        )
+
+        if node.name not in known and (kind, node.name) not in guarded:
+            unknown.append((node.lineno, kind, node.name))
+
+    return sorted(unknown)
+
+
+def check_template(renderer: Renderer, template_name: str) -> list[CheckFailure]:
+    """Parse and compile a template, returning all of its failures
+
+    The unknown filters and tests are collected from the syntax tree
+    first, since compiling the template stops at the first one (and
+    does not report those inside 'if' statements at all).
+    """
+    env = renderer.env
+
+    try:
+        source, filename, _ = env.loader.get_source(env, template_name)  # type: ignore[union-attr]
+        ast = env.parse(source, template_name, filename)
+    except jinja2.TemplateSyntaxError as exc:
+        return [CheckFailure(template_name, exc.lineno, type(exc).__name__, exc.message or "")]
+    except Exception as exc:  # noqa: BLE001
+        return [CheckFailure(template_name, None, type(exc).__name__, str(exc))]
+
+    # the same messages Jinja2 uses when compiling templates
+    failures = [
+        CheckFailure(
+            template_name,
+            line,
+            "TemplateAssertionError",
+            f"No {kind} named '{name}'.",
+        )
+        for line, kind, name in unknown_names(env, ast)
+    ]
+
+    try:
+        env.get_template(template_name)
+    except jinja2.TemplateSyntaxError as exc:
+        failure = CheckFailure(template_name, exc.lineno, type(exc).__name__, exc.message or "")
+        # an unknown name which has already been reported
+        if failure not in failures:
+            failures.append(failure)
+    except Exception as exc:  # noqa: BLE001
+        failures.append(CheckFailure(template_name, None, type(exc).__name__, str(exc)))
+
+    return failures
+
+
+# each worker process builds its own renderer, once
+_worker_state: dict[str, Renderer] = {}
+
+
+def _init_worker(renderer_factory: Callable[[], Renderer]) -> None:
+    _worker_state["renderer"] = renderer_factory()
+
+
+def _check_in_worker(template_name: str) -> list[CheckFailure]:
+    return check_template(_worker_state["renderer"], template_name)
+
+
+def check_templates(
+    renderer_factory: Callable[[], Renderer],
+    template_names: Iterable[str],
+    jobs: int = 1,
+) -> list[CheckFailure]:
+    """Compile each of the templates, returning a list of failures
+
+    With more than one job, the templates are distributed across a pool
+    of worker processes; 'renderer_factory' must then be picklable.
+    """
+    if jobs <= 1:
+        renderer = renderer_factory()
+        results = [check_template(renderer, name) for name in template_names]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(renderer_factory,),
+        ) as executor:
+            results = list(executor.map(_check_in_worker, template_names, chunksize=32))
+
+    return [failure for failures in results for failure in failures]
+
+
+def write_report(
+    f: TextIO, template_names: Sequence[str], failures: Sequence[CheckFailure]
+) -> None:
+    """Write a JSON report of the results of checking templates"""
+    json.dump(
+        {
+            "templates": len(template_names),
+            "failed": len({failure.template for failure in failures}),
+            "failures": [asdict(failure) for failure in failures],
+        },
+        f,
+        indent=2,
+    )
+    f.write("\n")
+
+
+def find_templates(template_dir: Path, suffixes: Sequence[str]) -> list[str]:
+    """Find the names of the templates in a directory tree, optionally
+    only those whose names end with one of the suffixes"""
+    names = jinja2.FileSystemLoader(template_dir).list_templates()
+
+    if not suffixes:
+        return names
+
+    return [name for name in names if name.endswith(tuple(suffixes))]
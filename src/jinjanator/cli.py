@@ -1,9 +1,14 @@
 import argparse
+import contextlib
+import functools
 import importlib
+import io
 import os
 import sys
+import tarfile
 
-from collections.abc import Callable, Iterable, Mapping, Sequence
+from collections.abc import Iterable, Mapping, Sequence
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import (
     Any,
@@ -13,79 +18,58 @@ from typing import (
 
 import jinja2
 import jinjanator_plugins
-import pluggy
 
-from . import customize, filters, formats, version
-from .context import read_context_data
-from .customize import CustomizationModule
-
-
-class FilePathLoader(jinja2.BaseLoader):
-    def __init__(self, cwd: Path, encoding: str = "utf-8"):
-        self.cwd = cwd
-        self.encoding = encoding
-
-    def get_source(
-        self,
-        environment: jinja2.Environment,  # noqa: ARG002
-        template_name: str,
-    ) -> tuple[str, str, Callable[[], bool]]:
-        template_path = Path(template_name)
-
-        if not template_path.is_absolute():
-            template_path = self.cwd / template_name
-
-        if not template_path.is_file():
-            raise jinja2.TemplateNotFound(template_name)
-
-        mtime = template_path.stat().st_mtime
-
-        return (
-            template_path.read_text(encoding=self.encoding),
-            str(template_path),
-            lambda: template_path.stat().st_mtime == mtime,
-        )
-
-
-class Jinja2TemplateRenderer:
-    ENABLED_EXTENSIONS = (
-        "jinja2.ext.i18n",
-        "jinja2.ext.do",
-        "jinja2.ext.loopcontrols",
-    )
-
-    def __init__(
-        self,
-        cwd: Path,
-        allow_undefined: bool,  # noqa: FBT001
-        j2_env_params: dict[str, Any],
-        plugin_hook_callers: jinjanator_plugins.PluginHookCallers,
-    ):
-        j2_env_params.setdefault("keep_trailing_newline", True)
-        j2_env_params.setdefault(
-            "undefined",
-            jinja2.Undefined if allow_undefined else jinja2.StrictUndefined,
-        )
-        j2_env_params.setdefault("extensions", self.ENABLED_EXTENSIONS)
-        j2_env_params.setdefault("loader", FilePathLoader(cwd))
-
-        self.env = jinja2.Environment(**j2_env_params, autoescape=False)  # noqa: S701
-
-        for plugin_globals in plugin_hook_callers.plugin_globals():
-            self.env.globals |= plugin_globals
-
-        for plugin_filters in plugin_hook_callers.plugin_filters():
-            self.env.filters |= plugin_filters
-
-        for plugin_tests in plugin_hook_callers.plugin_tests():
-            self.env.tests |= plugin_tests
-
-        for plugin_extensions in plugin_hook_callers.plugin_extensions():
-            for extension in plugin_extensions:
-                self.env.add_extension(extension)
+from . import customize, version
+from .archive import ArchiveLoader
+from .check import check_templates, find_templates, write_report
+from .compressed import (
+    CompressionUnavailableError,
+    compression_for_path,
+    open_compressed,
+    open_output,
+)
+from .context import DataPathError, read_context_data
+from .extensions import configure_fragment_cache, configure_output
+from .fanout import FanOutOptions, fan_out, find_data_files, load_template
+from .i18n import DEFAULT_DOMAIN, CatalogNotFoundError, load_translations
+from .incremental import (
+    IncrementalState,
+    TrackingContext,
+    record_context_access,
+    value_digest,
+)
+from .indexes import IndexBuildError, IndexSpec, IndexSpecError
+from .limits import (
+    MemoryLimitUnsupportedError,
+    RenderLimitExceededError,
+    RenderLimits,
+    parse_size,
+)
+from .native import NativeOutputError
+from .rendercache import (
+    RenderCache,
+    digest,
+    file_digest,
+    record_environment_reads,
+    template_dependencies,
+)
 
-    def render(self, template_name: str, context: Mapping[str, str]) -> str:
-        return self.env.get_template(template_name).render(context)
+# FilePathLoader and Jinja2TemplateRenderer were defined in this module,
+# and are still importable from it
+from .renderer import (  # noqa: F401
+    FilePathLoader,
+    FormatNotFoundError,
+    Jinja2TemplateRenderer,
+    Renderer,
+    detect_format,
+    get_formats,
+    get_hook_callers,
+    validate_format_options,
+)
+from .server import RenderRequest, RequestError, handle_request, response
+from .stats import CountingReader, CountingWriter, Stats
+from .usage import ContextUsage
+from .usage import write_report as write_usage_report
 
 
 class UniqueStore(argparse.Action):
@@ -155,6 +139,67 @@ class VersionAction(argparse.Action):
         parser.exit()
 
 
+def index_spec(value: str) -> IndexSpec:
+    try:
+        return IndexSpec.parse(value)
+    except IndexSpecError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from exc
+
+
+def size(value: str) -> int:
+    try:
+        return parse_size(value)
+    except ValueError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from exc
+
+
+def add_limit_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--max-render-seconds",
+        action=UniqueStore,
+        default=None,
+        metavar="SECONDS",
+        dest="max_render_seconds",
+        type=float,
+        help="Stop rendering (and exit with status 5) if a render takes longer than SECONDS",
+    )
+
+    parser.add_argument(
+        "--max-output-bytes",
+        action=UniqueStore,
+        default=None,
+        metavar="SIZE",
+        dest="max_output_bytes",
+        type=size,
+        help="Stop rendering (and exit with status 5) if a render produces more than SIZE"
+        " bytes of output (SIZE can have a K, M, G or T suffix)",
+    )
+
+    parser.add_argument(
+        "--max-memory",
+        action=UniqueStore,
+        default=None,
+        metavar="SIZE",
+        dest="max_memory",
+        type=size,
+        help="Stop rendering (and exit with status 5) if the peak memory usage of the process"
+        " exceeds SIZE bytes (SIZE can have a K, M, G or T suffix)",
+    )
+
+
+def add_fragment_cache_arg(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--fragment-cache",
+        action=UniqueStore,
+        default=None,
+        metavar="DIR",
+        dest="fragment_cache",
+        type=Path,
+        help="Store the output of 'cache' blocks and memoized macros in DIR, and reuse it"
+        " in later runs",
+    )
+
+
 def parse_args(
     formats: Mapping[str, type[jinjanator_plugins.Format]],
     plugin_identities: Iterable[str],
@@ -204,6 +249,47 @@ def parse_args(
         ),
     )
 
+    parser.add_argument(
+        "--data-path",
+        action=UniqueStore,
+        default=None,
+        metavar="PATH",
+        dest="data_path",
+        help="Use only the subtree of the input data selected by PATH (a dotted path like"
+        " 'services.web', or a JSON pointer like '/services/web') as the context",
+    )
+
+    parser.add_argument(
+        "--compact-context",
+        action="store_true",
+        dest="compact_context",
+        help="Store the input data in a compact form, reducing memory usage for large data",
+    )
+
+    parser.add_argument(
+        "--index",
+        action="append",
+        default=[],
+        metavar="NAME=PATH:KEY",
+        dest="indexes",
+        type=index_spec,
+        help="Add a dictionary named NAME to the context, indexing the items of the list"
+        " selected by PATH (a data path, as for --data-path) by the value of their KEY, so"
+        " templates can look items up without scanning the list (can be specified multiple"
+        " times)",
+    )
+
+    parser.add_argument(
+        "--static-data",
+        action=UniqueStore,
+        default=None,
+        metavar="FILE",
+        dest="static_data",
+        type=Path,
+        help="Data which is the same for every render, to be folded into the template when"
+        " it is compiled (the data file then only needs to contain the remaining data)",
+    )
+
     parser.add_argument(
         "--undefined",
         action="store_true",
@@ -221,6 +307,110 @@ def parse_args(
     # add args for customize support
     customize.add_args(parser)
 
+    parser.add_argument(
+        "--template-bundle",
+        action=UniqueStore,
+        default=None,
+        metavar="bundle.zip",
+        dest="template_bundle",
+        type=Path,
+        help="Load precompiled templates from a bundle created by 'jinjanate compile'",
+    )
+
+    parser.add_argument(
+        "--template-archive",
+        action=UniqueStore,
+        default=None,
+        metavar="archive",
+        dest="template_archive",
+        type=Path,
+        help="Load templates from a zip or tar archive, instead of from individual files",
+    )
+
+    parser.add_argument(
+        "--locale-dir",
+        action=UniqueStore,
+        default=None,
+        metavar="DIR",
+        dest="locale_dir",
+        type=Path,
+        help="Directory containing compiled gettext catalogs"
+        " (as DIR/LOCALE/LC_MESSAGES/DOMAIN.mo), for the i18n extension",
+    )
+
+    parser.add_argument(
+        "--locale",
+        action="append",
+        default=[],
+        metavar="LOCALE",
+        dest="locales",
+        help="Render the template with the translations for LOCALE installed"
+        " (can be specified multiple times, to render for several locales)",
+    )
+
+    parser.add_argument(
+        "--gettext-domain",
+        action=UniqueStore,
+        default=DEFAULT_DOMAIN,
+        metavar="DOMAIN",
+        dest="gettext_domain",
+        help="Name of the gettext catalogs to load (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--stats",
+        nargs="?",
+        const="text",
+        default=None,
+        choices=["text", "json"],
+        dest="stats",
+        help="Report time spent in each phase of processing, and related counters"
+        " (as text or JSON)",
+    )
+
+    parser.add_argument(
+        "--stats-file",
+        metavar="statsfile",
+        dest="stats_file",
+        type=Path,
+        help="Write the '--stats' report to a file instead of stderr",
+    )
+
+    parser.add_argument(
+        "--report-context-usage",
+        action=UniqueStore,
+        default=None,
+        metavar="reportfile",
+        dest="report_context_usage",
+        type=Path,
+        help="Write a JSON report of the keys in the data which were not used by the"
+        " template, with their approximate sizes, to a file",
+    )
+
+    parser.add_argument(
+        "--render-cache",
+        action=UniqueStore,
+        default=None,
+        metavar="DIR",
+        dest="render_cache",
+        type=Path,
+        help="Cache rendered output in DIR, and reuse it when the template, data and"
+        " options are unchanged",
+    )
+
+    add_fragment_cache_arg(parser)
+
+    parser.add_argument(
+        "--incremental",
+        action=UniqueStore,
+        default=None,
+        metavar="DIR",
+        dest="incremental",
+        type=Path,
+        help="Record the context variables used by the template in DIR, and skip rendering"
+        " if they (and the template) are unchanged since the output file was rendered",
+    )
+
     parser.add_argument(
         "-o",
         "--output-file",
@@ -230,6 +420,75 @@ def parse_args(
         help="Output to a file instead of stdout",
     )
 
+    parser.add_argument(
+        "--compress",
+        action=UniqueStore,
+        default=None,
+        dest="compress",
+        choices=["none", "gzip", "xz", "bz2", "zstd"],
+        help="Compress the output file (default: determined by the output file's suffix)",
+    )
+
+    parser.add_argument(
+        "--native-output",
+        action=UniqueStore,
+        default=None,
+        dest="native_output",
+        choices=["json", "yaml"],
+        help="Evaluate the template to a value using Jinja2's native types, and write the"
+        " value as JSON or YAML",
+    )
+
+    parser.add_argument(
+        "--output-root",
+        action=UniqueStore,
+        default=None,
+        metavar="DIR",
+        dest="output_root",
+        type=Path,
+        help="Directory into which '{%% output %%}' blocks in templates can write files",
+    )
+
+    parser.add_argument(
+        "--write-if-changed",
+        action="store_true",
+        dest="write_if_changed",
+        help="Only write files from '{%% output %%}' blocks if their content has changed",
+    )
+
+    parser.add_argument(
+        "--fan-out",
+        action=UniqueStore,
+        default=None,
+        metavar="DATA",
+        dest="fan_out",
+        help="Render the template once for each data file in a directory, or matching a"
+        " glob pattern (requires --output-pattern)",
+    )
+
+    parser.add_argument(
+        "--output-pattern",
+        action=UniqueStore,
+        default=None,
+        metavar="PATTERN",
+        dest="output_pattern",
+        help="Output file path for each data file in --fan-out mode; '{stem}', '{name}'"
+        " and '{parent}' are replaced with details of the data file",
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        action=UniqueStore,
+        default=1,
+        metavar="N",
+        dest="jobs",
+        type=int,
+        help="Number of worker processes to use in --fan-out mode",
+    )
+
+    add_limit_args(parser)
+
     parser.add_argument("template", help="Template file to process")
 
     parser.add_argument(
@@ -243,28 +502,125 @@ def parse_args(
     return parser.parse_args(argv)
 
 
-def get_hook_callers() -> jinjanator_plugins.PluginHookCallers:
-    pm = pluggy.PluginManager("jinjanator")
-    pm.add_hookspecs(jinjanator_plugins.PluginHooks)
-    pm.register(filters)
-    pm.register(formats)
-    pm.load_setuptools_entrypoints("jinjanator")
-    return cast("jinjanator_plugins.PluginHookCallers", pm.hook)
+def parse_compile_args(
+    plugin_identities: Iterable[str],
+    argv: Sequence[str] | None = None,
+) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="jinjanate compile",
+        description="Precompile a tree of Jinja2 templates into a bundle of Python modules.",
+        epilog="",
+    )
+
+    parser.add_argument(
+        "-v",
+        "--version",
+        action=VersionAction,
+        help="display version of this program and any installed plugins",
+        plugin_identities=plugin_identities,
+    )
+
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        dest="quiet",
+        help="Suppress informational messages",
+    )
+
+    parser.add_argument(
+        "--suffix",
+        action="append",
+        default=[],
+        metavar="SUFFIX",
+        dest="suffixes",
+        help="Only compile templates whose names end with this suffix"
+        " (can be specified multiple times)",
+    )
+
+    # add args for customize support
+    customize.add_args(parser)
+
+    parser.add_argument("template_dir", type=Path, help="Directory containing the templates")
+
+    parser.add_argument("bundle", type=Path, help="Bundle (zip file) to create")
+
+    return parser.parse_args(argv)
+
+
+def parse_check_args(
+    plugin_identities: Iterable[str],
+    argv: Sequence[str] | None = None,
+) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="jinjanate check",
+        description="Check a tree of Jinja2 templates for errors, by compiling them without"
+        " rendering them.",
+        epilog="",
+    )
+
+    parser.add_argument(
+        "-v",
+        "--version",
+        action=VersionAction,
+        help="display version of this program and any installed plugins",
+        plugin_identities=plugin_identities,
+    )
+
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        dest="quiet",
+        help="Suppress informational messages",
+    )
+
+    parser.add_argument(
+        "--suffix",
+        action="append",
+        default=[],
+        metavar="SUFFIX",
+        dest="suffixes",
+        help="Only check templates whose names end with this suffix"
+        " (can be specified multiple times)",
+    )
+
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        default=1,
+        metavar="N",
+        dest="jobs",
+        type=int,
+        help="Number of worker processes to use",
+    )
+
+    parser.add_argument(
+        "--report",
+        metavar="reportfile",
+        dest="report",
+        type=Path,
+        help="Write the results to a file, as JSON",
+    )
+
+    # add args for customize support
+    customize.add_args(parser)
+
+    parser.add_argument("template_dir", type=Path, help="Directory containing the templates")
 
+    return parser.parse_args(argv)
 
-def validate_format_options(
-    fmt: type[jinjanator_plugins.Format],
-    options: Sequence[str] | None,
-) -> jinjanator_plugins.Format:
-    if options:
-        if not fmt.option_names:
-            raise jinjanator_plugins.FormatOptionUnknownError(fmt, options[0])
 
-        for opt in options:
-            if opt.split("=")[0] not in fmt.option_names:
-                raise jinjanator_plugins.FormatOptionUnknownError(fmt, opt)
+def select_format(
+    data: Path | None,
+    available_formats: Mapping[str, type[jinjanator_plugins.Format]],
+) -> str:
+    if data is None or str(data) == "-":
+        return "env"
 
-    return fmt(options)
+    try:
+        return detect_format(data, available_formats)
+    except FormatNotFoundError as exc:
+        print(str(exc), file=sys.stderr)
+        raise SystemExit(1) from exc
 
 
 def render_command(
@@ -273,35 +629,50 @@ def render_command(
     stdin: TextIO | None,
     argv: Sequence[str],
 ) -> str:
-    plugin_hook_callers = get_hook_callers()
+    stats = Stats()
 
-    available_formats: dict[str, type[jinjanator_plugins.Format]] = {}
+    with stats.phase("plugin discovery"):
+        plugin_hook_callers = get_hook_callers()
 
-    for plugin_formats in plugin_hook_callers.plugin_formats():
-        available_formats |= plugin_formats
+        available_formats = get_formats(plugin_hook_callers)
 
-    plugin_identities = plugin_hook_callers.plugin_identities()
+        plugin_identities = plugin_hook_callers.plugin_identities()
 
-    args = parse_args(available_formats, plugin_identities, argv[1:])
+    with stats.phase("argument parsing"):
+        args = parse_args(available_formats, plugin_identities, argv[1:])
 
     if not args.quiet:
         print_version_info(plugin_identities=plugin_identities)
 
+    if args.compress and not args.output_file:
+        print("--compress can only be used with --output-file", file=sys.stderr)
+        raise SystemExit(1)
+
+    check_option_combinations(args)
+
+    if args.fan_out:
+        return fan_out_command(cwd, environ, args, plugin_hook_callers, stats)
+
     if args.format == "?":
-        if args.data is None or str(args.data) == "-":
-            args.format = "env"
-        else:
-            suffix = args.data.suffix
-            for k, v in available_formats.items():
-                if v.suffixes and suffix in v.suffixes:
-                    args.format = k
-                    break
-            if args.format == "?":
-                print(
-                    f"No format which can read '{suffix}' files available",
-                    file=sys.stderr,
-                )
-                raise SystemExit(1)
+        args.format = select_format(args.data, available_formats)
+
+    cache_key = None
+
+    if args.render_cache:
+        with stats.phase("render cache lookup"):
+            cache_key, output, stdin = lookup_render_cache(
+                cwd,
+                environ,
+                stdin,
+                args,
+                plugin_identities,
+            )
+
+        if output is not None:
+            stats.count("render cache hits", 1)
+            return emit_cached_output(args, output, stats)
+
+        stats.count("render cache misses", 1)
 
     # We always expect a file;
     # unless the user wants 'env', and there's no input file provided.
@@ -324,35 +695,199 @@ def render_command(
         """
         input_data_f = None
     else:
-        input_data_f = stdin if args.data is None or str(args.data) == "-" else args.data.open()
+        input_data_f = (
+            stdin if args.data is None or str(args.data) == "-" else open_data_file(args.data)
+        )
+
+        if args.stats and input_data_f is not None:
+            input_data_f = cast("TextIO", CountingReader(input_data_f, stats))
 
     fmt = validate_format_options(available_formats[args.format], args.format_options)
 
-    if args.format == "env" and input_data_f is None:
-        context = environ
-    else:
-        context = read_context_data(
-            fmt,
-            input_data_f,
-            environ,
-            args.import_env,
+    context, renderer, template = load_context_and_template(
+        cwd,
+        args,
+        fmt,
+        input_data_f,
+        environ,
+        plugin_hook_callers=plugin_hook_callers,
+        stats=stats,
+    )
+
+    if args.report_context_usage:
+        result = render_with_usage_report(renderer, template, args, context, stdin, stats=stats)
+    elif args.locales:
+        result = render_locales(renderer, template, args, context, stdin, stats=stats)
+    elif args.incremental:
+        inputs = RenderCache.key(inputs_key_components(cwd, args, plugin_identities))
+        result = incremental_render(
+            renderer,
+            template,
+            args,
+            context,
+            stats=stats,
+            inputs=inputs,
+        )
+    else:
+        result = render_template(
+            renderer,
+            template,
+            args,
+            context,
+            stdin,
+            stats=stats,
+            cache_key=cache_key,
         )
 
-    customizations = CustomizationModule.from_file(args.customize)
+    if args.stats:
+        report_stats(stats, renderer, args.stats, args.stats_file)
 
-    context = customizations.alter_context(context)
+    return result
 
-    renderer = Jinja2TemplateRenderer(
-        cwd,
-        args.undefined,
-        j2_env_params=customizations.j2_environment_params(),
-        plugin_hook_callers=plugin_hook_callers,
-    )
 
-    customize.apply(customizations, renderer.env, filters=args.filters, tests=args.tests)
+def check_option_combinations(args: argparse.Namespace) -> None:
+    problems = []
+
+    if args.template_bundle and args.template_archive:
+        problems.append("--template-bundle and --template-archive cannot both be used")
+
+    if args.static_data and args.template_bundle:
+        # specializing needs the template source, which a bundle does not contain
+        problems.append("--static-data cannot be used with --template-bundle")
+
+    if args.native_output and (args.output_root or args.template_bundle):
+        problems.append("--native-output cannot be used with --output-root or --template-bundle")
+
+    if args.render_cache and (args.fan_out or args.output_root):
+        problems.append("--render-cache cannot be used with --fan-out or --output-root")
+
+    if args.incremental and (
+        not args.output_file or args.fan_out or args.output_root or args.render_cache
+    ):
+        problems.append(
+            "--incremental requires --output-file, and cannot be used with --fan-out,"
+            " --output-root or --render-cache",
+        )
+
+    if args.report_context_usage and (args.fan_out or args.render_cache or args.incremental):
+        problems.append(
+            "--report-context-usage cannot be used with --fan-out, --render-cache or --incremental",
+        )
+
+    if args.locales and not args.locale_dir:
+        problems.append("--locale requires --locale-dir")
+
+    if args.locales and (args.fan_out or args.render_cache or args.incremental):
+        problems.append(
+            "--locale cannot be used with --fan-out, --render-cache or --incremental",
+        )
+
+    if args.locales and len(args.locales) > 1 and "{locale}" not in str(args.output_file or ""):
+        problems.append(
+            "rendering for more than one --locale requires an --output-file containing '{locale}'",
+        )
+
+    for problem in problems:
+        print(problem, file=sys.stderr)
+
+    if problems:
+        raise SystemExit(1)
+
+
+def render_with_usage_report(  # noqa: PLR0913
+    renderer: Renderer,
+    template: str | jinja2.Template,
+    args: argparse.Namespace,
+    context: Mapping[str, Any],
+    stdin: TextIO | None,
+    *,
+    stats: Stats,
+) -> str:
+    """Render the template (for each locale, if any), recording which
+    keys in the context are read, then report the unused ones"""
+    usage = ContextUsage()
+    tracked_context = usage.track(context)
+
+    renderer.env.context_class = TrackingContext
+
+    with record_context_access() as names:
+        if args.locales:
+            result = render_locales(renderer, template, args, tracked_context, stdin, stats=stats)
+        else:
+            result = render_template(renderer, template, args, tracked_context, stdin, stats=stats)
+
+    usage.used |= names
+
+    with args.report_context_usage.open("w", encoding="utf-8") as f:
+        write_usage_report(f, context, usage)
+
+    return result
+
+
+def render_locales(  # noqa: PLR0913
+    renderer: Renderer,
+    template: str | jinja2.Template,
+    args: argparse.Namespace,
+    context: Mapping[str, Any],
+    stdin: TextIO | None,
+    *,
+    stats: Stats,
+) -> str:
+    """Render the template once for each locale, with that locale's
+    translations installed, reusing the compiled template"""
+    result = ""
+
+    for locale in args.locales:
+        try:
+            translations = load_translations(args.locale_dir, locale, args.gettext_domain)
+        except CatalogNotFoundError as exc:
+            print(str(exc), file=sys.stderr)
+            raise SystemExit(1) from exc
+
+        renderer.install_translations(translations)
+
+        locale_args = argparse.Namespace(**vars(args))
 
+        if args.output_file:
+            locale_args.output_file = Path(str(args.output_file).replace("{locale}", locale))
+            locale_args.output_file.parent.mkdir(parents=True, exist_ok=True)
+
+        result += render_template(renderer, template, locale_args, context, stdin, stats=stats)
+
+    return result
+
+
+def render_template(  # noqa: PLR0913
+    renderer: Renderer,
+    template: str | jinja2.Template,
+    args: argparse.Namespace,
+    context: Mapping[str, Any],
+    stdin: TextIO | None,
+    *,
+    stats: Stats,
+    cache_key: str | None = None,
+) -> str:
     try:
-        result = renderer.render(args.template, context)
+        if cache_key is not None:
+            with record_environment_reads() as environment:
+                output = renderer.render(template, context)
+            RenderCache(args.render_cache).store(
+                cache_key,
+                output,
+                template_dependencies(renderer.env),
+                {name: os.environ.get(name) for name in environment},
+            )
+            result = emit_output(args, output, stats)
+        elif args.output_file:
+            with open_output_file(args.output_file, args.compress) as f:
+                renderer.render_to(
+                    cast("TextIO", CountingWriter(f, stats)) if args.stats else f,
+                    template,
+                    context,
+                )
+            result = ""
+        else:
+            result = emit_output(args, renderer.render(template, context), stats)
     except jinja2.exceptions.UndefinedError as e:
         # When there's data at stdin, tell the user they should use '-'
         try:
@@ -373,13 +908,631 @@ def render_command(
         # Proceed
         raise
 
+    return result
+
+
+def emit_cached_output(args: argparse.Namespace, output: str, stats: Stats) -> str:
+    result = emit_output(args, output, stats)
+
+    if args.stats:
+        report_stats(stats, None, args.stats, args.stats_file)
+
+    return result
+
+
+def emit_output(args: argparse.Namespace, output: str, stats: Stats) -> str:
+    """Write rendered output to the output file (returning an empty
+    string), or return it to be written to stdout"""
     if args.output_file:
-        with args.output_file.open("w") as f:
-            f.write(result)
-            f.close()
+        with open_output_file(args.output_file, args.compress) as f:
+            (cast("TextIO", CountingWriter(f, stats)) if args.stats else f).write(output)
         return ""
 
-    return result
+    if args.stats:
+        stats.count("bytes written", len(output.encode("utf-8")))
+
+    return output
+
+
+def inputs_key_components(
+    cwd: Path,
+    args: argparse.Namespace,
+    plugin_identities: Iterable[str],
+) -> dict[str, Any]:
+    """Collect the inputs, other than the data and the templates, which
+    affect the output of a render"""
+    files = [
+        args.customize,
+        *args.filters,
+        *args.tests,
+        args.template_bundle,
+        args.template_archive,
+        args.static_data,
+    ]
+
+    return {
+        "versions": [version, importlib.metadata.version("jinja2")],
+        "plugins": list(plugin_identities),
+        "cwd": cwd,
+        "template": args.template,
+        "format": args.format,
+        "format_options": args.format_options,
+        "import_env": args.import_env,
+        "data_path": args.data_path,
+        "indexes": args.indexes,
+        "undefined": args.undefined,
+        "native_output": args.native_output,
+        "files": {str(name): file_digest(Path(name)) for name in files if name},
+    }
+
+
+def render_cache_key(
+    cwd: Path,
+    environ: Mapping[str, str],
+    args: argparse.Namespace,
+    plugin_identities: Iterable[str],
+    data: str | bytes | None,
+) -> str:
+    """Compute the render cache key for everything which is known before
+    rendering starts"""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+
+    return RenderCache.key(
+        {
+            **inputs_key_components(cwd, args, plugin_identities),
+            "data": None if data is None else digest(data),
+            # the environment is only part of the data if it is imported,
+            # or used as the data source
+            "environ": dict(environ) if args.import_env is not None or data is None else None,
+        },
+    )
+
+
+def incremental_render(  # noqa: PLR0913
+    renderer: Renderer,
+    template_name: str | jinja2.Template,
+    args: argparse.Namespace,
+    context: Mapping[str, Any],
+    *,
+    stats: Stats,
+    inputs: str,
+) -> str:
+    """Render the template to the output file, unless the values of the
+    context variables it accessed when it was last rendered (and its
+    other inputs) are unchanged"""
+    state = IncrementalState(args.incremental)
+
+    context = renderer.prepare_context(context)
+
+    if state.is_current(args.output_file, inputs, context, os.environ):
+        stats.count("incremental renders skipped", 1)
+        return ""
+
+    template = renderer.get_template(template_name)
+
+    renderer.env.context_class = TrackingContext
+
+    with (
+        record_context_access() as names,
+        record_environment_reads() as environment,
+        stats.phase("render"),
+    ):
+        if renderer.native_output is not None:
+            value = renderer.template_renderer.render_native(template, context)
+        else:
+            output = renderer.template_renderer.render_template(template, context)
+
+    if renderer.native_output is not None:
+        output = renderer.serialize(value)
+
+    emit_output(args, output, stats)
+
+    state.update(
+        args.output_file,
+        inputs,
+        {name: value_digest(context, name) for name in names},
+        template_dependencies(renderer.env),
+        {name: os.environ.get(name) for name in environment},
+    )
+
+    return ""
+
+
+def lookup_render_cache(
+    cwd: Path,
+    environ: Mapping[str, str],
+    stdin: TextIO | None,
+    args: argparse.Namespace,
+    plugin_identities: Iterable[str],
+) -> tuple[str, str | None, TextIO | None]:
+    """Look up the output for this render in the render cache, returning
+    the cache key, the cached output (if any), and a replacement for
+    stdin (since its content may have been consumed)"""
+    data: str | bytes | None = None
+
+    if args.format == "env" and args.data is None:
+        pass
+    elif args.data is None or str(args.data) == "-":
+        if stdin is not None:
+            data = stdin.read()
+            stdin = io.StringIO(data)
+    else:
+        data = args.data.read_bytes()
+
+    cache_key = render_cache_key(cwd, environ, args, plugin_identities, data)
+
+    return cache_key, RenderCache(args.render_cache).lookup(cache_key), stdin
+
+
+def load_context_and_template(  # noqa: PLR0913
+    cwd: Path,
+    args: argparse.Namespace,
+    fmt: jinjanator_plugins.Format,
+    input_data_f: TextIO | None,
+    environ: Mapping[str, str],
+    *,
+    plugin_hook_callers: jinjanator_plugins.PluginHookCallers,
+    stats: Stats,
+) -> tuple[Mapping[str, Any], Renderer, str | jinja2.Template]:
+    """Parse the data, construct the renderer and load (compiling) the template
+
+    These are independent, so the data is parsed in a worker thread
+    while the renderer is constructed and the template is loaded. If
+    both fail, the error from parsing the data is reported, as it would
+    have been if they were done one after the other.
+    """
+    if input_data_f is None:
+        context = read_context(args, fmt, input_data_f, environ, stats)
+        renderer = make_renderer(cwd, args, plugin_hook_callers, stats)
+        return context, renderer, load_template(renderer, args.template, args.static_data)
+
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="jinjanator-data") as executor:
+        parsing = executor.submit(read_context, args, fmt, input_data_f, environ, stats)
+
+        try:
+            renderer = make_renderer(cwd, args, plugin_hook_callers, stats)
+            template = load_template(renderer, args.template, args.static_data)
+        except BaseException:
+            parsing.result()
+            raise
+
+        return parsing.result(), renderer, template
+
+
+def read_context(
+    args: argparse.Namespace,
+    fmt: jinjanator_plugins.Format,
+    input_data_f: TextIO | None,
+    environ: Mapping[str, str],
+    stats: Stats,
+) -> Mapping[str, Any]:
+    if args.format == "env" and input_data_f is None:
+        if args.data_path is not None:
+            print("--data-path cannot be used without input data", file=sys.stderr)
+            raise SystemExit(1)
+
+        return environ
+
+    with stats.phase("data parsing"):
+        return read_context_data(
+            fmt,
+            input_data_f,
+            environ,
+            args.import_env,
+            args.data_path,
+            compact=args.compact_context,
+        )
+
+
+def make_renderer(
+    cwd: Path,
+    args: argparse.Namespace,
+    plugin_hook_callers: jinjanator_plugins.PluginHookCallers | None = None,
+    stats: Stats | None = None,
+) -> Renderer:
+    renderer = Renderer(
+        cwd=cwd,
+        allow_undefined=args.undefined,
+        customize=args.customize,
+        filters=args.filters,
+        tests=args.tests,
+        loader=make_loader(args),
+        indexes=args.indexes,
+        limits=make_limits(args),
+        native_output=args.native_output,
+        plugin_hook_callers=plugin_hook_callers,
+        stats=stats,
+    )
+
+    configure_output(renderer.env, args.output_root, write_if_changed=args.write_if_changed)
+
+    if args.fragment_cache:
+        configure_fragment_cache(renderer.env, cwd / args.fragment_cache)
+
+    return renderer
+
+
+def make_limits(args: argparse.Namespace) -> RenderLimits:
+    try:
+        return RenderLimits(
+            max_seconds=args.max_render_seconds,
+            max_output_bytes=args.max_output_bytes,
+            max_memory=args.max_memory,
+        )
+    except MemoryLimitUnsupportedError as exc:  # pragma: no cover
+        print(str(exc), file=sys.stderr)
+        raise SystemExit(1) from exc
+
+
+def make_loader(args: argparse.Namespace) -> jinja2.BaseLoader | None:
+    if args.template_bundle:
+        return jinja2.ModuleLoader(args.template_bundle)
+
+    if args.template_archive:
+        try:
+            return ArchiveLoader(args.template_archive)
+        except (OSError, tarfile.TarError) as exc:
+            print(
+                f"Template archive '{args.template_archive}' could not be opened: {exc}",
+                file=sys.stderr,
+            )
+            raise SystemExit(1) from exc
+
+    return None
+
+
+def return_renderer(renderer: Renderer) -> Renderer:
+    return renderer
+
+
+def fan_out_command(
+    cwd: Path,
+    environ: Mapping[str, str],
+    args: argparse.Namespace,
+    plugin_hook_callers: jinjanator_plugins.PluginHookCallers,
+    stats: Stats,
+) -> str:
+    if args.data is not None or args.output_file:
+        print(
+            "--fan-out cannot be used with a data file argument or --output-file",
+            file=sys.stderr,
+        )
+        raise SystemExit(1)
+
+    if not args.output_pattern:
+        print("--fan-out requires --output-pattern", file=sys.stderr)
+        raise SystemExit(1)
+
+    options = FanOutOptions(
+        template=args.template,
+        static_data=args.static_data,
+        output_pattern=args.output_pattern,
+        data_format=None if args.format == "?" else args.format,
+        format_options=args.format_options,
+        environ=dict(environ),
+        import_env=args.import_env,
+        data_path=args.data_path,
+        compact=args.compact_context,
+        compress=args.compress,
+    )
+
+    data_files = find_data_files(args.fan_out)
+
+    renderer: Renderer | None = None
+
+    if args.jobs > 1:
+        # each worker process builds its own renderer
+        renderer_factory = functools.partial(make_renderer, cwd, args)
+    else:
+        renderer = make_renderer(cwd, args, plugin_hook_callers, stats)
+        renderer_factory = functools.partial(return_renderer, renderer)
+
+    with stats.phase("fan-out"):
+        failures = fan_out(renderer_factory, options, data_files, args.jobs)
+
+    if not args.quiet:
+        print(
+            f"Rendered {len(data_files) - len(failures)} of {len(data_files)} data files",
+            file=sys.stderr,
+        )
+
+    for failure in failures:
+        print(f"{failure.data_file}: {failure.message}", file=sys.stderr)
+
+    if args.stats:
+        report_stats(stats, renderer, args.stats, args.stats_file)
+
+    if failures:
+        raise SystemExit(1)
+
+    return ""
+
+
+def open_data_file(data: Path) -> TextIO:
+    try:
+        return open_compressed(data, "r", compression_for_path(data))
+    except CompressionUnavailableError as exc:
+        print(str(exc), file=sys.stderr)
+        raise SystemExit(1) from exc
+
+
+def open_output_file(
+    output_file: Path,
+    compress: str | None,
+) -> contextlib.AbstractContextManager[TextIO]:
+    try:
+        return open_output(output_file, compress)
+    except CompressionUnavailableError as exc:
+        print(str(exc), file=sys.stderr)
+        raise SystemExit(1) from exc
+
+
+def report_stats(
+    stats: Stats,
+    renderer: Renderer | None,
+    report_format: str,
+    stats_file: Path | None,
+) -> None:
+    if renderer is not None:
+        if renderer.env.cache is not None:
+            stats.count("templates loaded", len(renderer.env.cache))
+
+        for name, info in renderer.cache_info().items():
+            stats.count(f"{name} cache hits", info.hits)
+            stats.count(f"{name} cache misses", info.misses)
+
+    if stats_file:
+        with stats_file.open("w") as f:
+            stats.report(f, report_format)
+    else:
+        stats.report(sys.stderr, report_format)
+
+
+def compile_command(
+    cwd: Path,
+    argv: Sequence[str],
+) -> None:
+    plugin_hook_callers = get_hook_callers()
+
+    plugin_identities = plugin_hook_callers.plugin_identities()
+
+    args = parse_compile_args(plugin_identities, argv[2:])
+
+    if not args.quiet:
+        print_version_info(plugin_identities=plugin_identities)
+
+    template_dir = args.template_dir if args.template_dir.is_absolute() else cwd / args.template_dir
+
+    if not template_dir.is_dir():
+        print(f"Template directory '{args.template_dir}' does not exist", file=sys.stderr)
+        raise SystemExit(1)
+
+    renderer = Renderer(
+        cwd=cwd,
+        customize=args.customize,
+        filters=args.filters,
+        tests=args.tests,
+        loader=jinja2.FileSystemLoader(template_dir),
+        plugin_hook_callers=plugin_hook_callers,
+    )
+
+    bundle = args.bundle if args.bundle.is_absolute() else cwd / args.bundle
+
+    renderer.env.compile_templates(
+        bundle,
+        filter_func=(lambda name: name.endswith(tuple(args.suffixes))) if args.suffixes else None,
+        log_function=None if args.quiet else lambda msg: print(msg, file=sys.stderr),
+        ignore_errors=False,
+    )
+
+
+def make_check_renderer(
+    cwd: Path,
+    template_dir: Path,
+    args: argparse.Namespace,
+    plugin_hook_callers: jinjanator_plugins.PluginHookCallers | None = None,
+) -> Renderer:
+    return Renderer(
+        cwd=cwd,
+        customize=args.customize,
+        filters=args.filters,
+        tests=args.tests,
+        loader=jinja2.FileSystemLoader(template_dir),
+        plugin_hook_callers=plugin_hook_callers,
+    )
+
+
+def check_command(
+    cwd: Path,
+    argv: Sequence[str],
+) -> None:
+    plugin_hook_callers = get_hook_callers()
+
+    plugin_identities = plugin_hook_callers.plugin_identities()
+
+    args = parse_check_args(plugin_identities, argv[2:])
+
+    if not args.quiet:
+        print_version_info(plugin_identities=plugin_identities)
+
+    template_dir = args.template_dir if args.template_dir.is_absolute() else cwd / args.template_dir
+
+    if not template_dir.is_dir():
+        print(f"Template directory '{args.template_dir}' does not exist", file=sys.stderr)
+        raise SystemExit(1)
+
+    template_names = find_templates(template_dir, args.suffixes)
+
+    if args.jobs > 1:
+        # each worker process builds its own renderer
+        renderer_factory = functools.partial(make_check_renderer, cwd, template_dir, args)
+    else:
+        renderer_factory = functools.partial(
+            make_check_renderer,
+            cwd,
+            template_dir,
+            args,
+            plugin_hook_callers,
+        )
+
+    failures = check_templates(renderer_factory, template_names, args.jobs)
+
+    for failure in failures:
+        print(str(failure), file=sys.stderr)
+
+    if not args.quiet:
+        print(
+            f"Checked {len(template_names)} templates, {len(failures)} errors",
+            file=sys.stderr,
+        )
+
+    if args.report:
+        with args.report.open("w") as f:
+            write_report(f, template_names, failures)
+
+    if failures:
+        raise SystemExit(1)
+
+
+# errors which are reported with a message, and the exit status for each
+ERROR_STATUSES: dict[type[Exception], int] = {
+    jinjanator_plugins.FormatOptionUnknownError: 2,
+    jinjanator_plugins.FormatOptionUnsupportedError: 3,
+    jinjanator_plugins.FormatOptionValueError: 4,
+    DataPathError: 1,
+    IndexBuildError: 1,
+    NativeOutputError: 1,
+    RenderLimitExceededError: 5,
+}
+
+
+def error_status(exc: BaseException) -> int:
+    """Determine the exit status for an error"""
+    if isinstance(exc, SystemExit):
+        return exc.code if isinstance(exc.code, int) else 1
+
+    for error, status in ERROR_STATUSES.items():
+        if isinstance(exc, error):
+            return status
+
+    return 1
+
+
+def parse_stdio_server_args(
+    plugin_identities: Iterable[str],
+    argv: Sequence[str] | None = None,
+) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="jinjanate --stdio-server",
+        description="Render templates as requested by JSON lines read from stdin, writing a"
+        " JSON line to stdout in response to each one.",
+        epilog="",
+    )
+
+    parser.add_argument(
+        "-v",
+        "--version",
+        action=VersionAction,
+        help="display version of this program and any installed plugins",
+        plugin_identities=plugin_identities,
+    )
+
+    parser.add_argument(
+        "--stdio-server",
+        action="store_true",
+        required=True,
+        dest="stdio_server",
+        help="Run as a server, handling requests from stdin",
+    )
+
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        dest="quiet",
+        help="Suppress informational messages",
+    )
+
+    parser.add_argument(
+        "--undefined",
+        action="store_true",
+        dest="undefined",
+        help="Allow undefined variables to be used in templates (suppress errors)",
+    )
+
+    add_limit_args(parser)
+
+    add_fragment_cache_arg(parser)
+
+    # add args for customize support
+    customize.add_args(parser)
+
+    return parser.parse_args(argv)
+
+
+def stdio_server_command(
+    cwd: Path,
+    environ: Mapping[str, str],
+    stdin: TextIO,
+    stdout: TextIO,
+    argv: Sequence[str],
+) -> None:
+    plugin_hook_callers = get_hook_callers()
+
+    plugin_identities = plugin_hook_callers.plugin_identities()
+
+    args = parse_stdio_server_args(plugin_identities, argv[1:])
+
+    if args.max_memory is not None:
+        # the peak memory usage of the process never decreases, so once
+        # one request exceeded the limit, every later request would too
+        print(
+            "--max-memory cannot be used with --stdio-server, since it limits the peak memory"
+            " usage of the whole (long-lived) process",
+            file=sys.stderr,
+        )
+        raise SystemExit(1)
+
+    if not args.quiet:
+        print_version_info(plugin_identities=plugin_identities)
+
+    renderer = Renderer(
+        cwd=cwd,
+        allow_undefined=args.undefined,
+        customize=args.customize,
+        filters=args.filters,
+        tests=args.tests,
+        limits=make_limits(args),
+        plugin_hook_callers=plugin_hook_callers,
+    )
+
+    if args.fragment_cache:
+        configure_fragment_cache(renderer.env, cwd / args.fragment_cache)
+
+    for line in stdin:
+        if not line.strip():
+            continue
+
+        try:
+            request = RenderRequest.from_json(line)
+        except RequestError as exc:
+            stdout.write(response(RenderRequest.request_id_of(line), 1, error=str(exc)))
+        else:
+            try:
+                output = handle_request(renderer, cwd, environ, request)
+            except Exception as exc:  # noqa: BLE001
+                stdout.write(
+                    response(
+                        request.request_id,
+                        error_status(exc),
+                        error=str(exc),
+                        exception=type(exc).__name__,
+                    ),
+                )
+            else:
+                stdout.write(response(request.request_id, 0, output=output))
+
+        stdout.flush()
 
 
 def main(args: list[str] | None = None) -> int | None:
@@ -387,21 +1540,22 @@ def main(args: list[str] | None = None) -> int | None:
         if args is None:  # pragma: no cover
             args = sys.argv
 
-        output = render_command(Path.cwd(), os.environ, sys.stdin, args)
-    except jinjanator_plugins.FormatOptionUnknownError as exc:
-        print(str(exc), file=sys.stderr)
-        return 2
-    except jinjanator_plugins.FormatOptionUnsupportedError as exc:
-        print(str(exc), file=sys.stderr)
-        return 3
-    except jinjanator_plugins.FormatOptionValueError as exc:
+        if len(args) > 1 and args[1] == "compile":
+            compile_command(Path.cwd(), args)
+            output = ""
+        elif len(args) > 1 and args[1] == "check":
+            check_command(Path.cwd(), args)
+            output = ""
+        elif "--stdio-server" in args[1:]:
+            stdio_server_command(Path.cwd(), os.environ, sys.stdin, sys.stdout, args)
+            output = ""
+        else:
+            output = render_command(Path.cwd(), os.environ, sys.stdin, args)
+    except tuple(ERROR_STATUSES) as exc:
         print(str(exc), file=sys.stderr)
-        return 4
+        return error_status(exc)
     except SystemExit as exc:
-        if isinstance(exc.code, int):
-            return exc.code
-
-        return 1
+        return error_status(exc)
 
     sys.stdout.write(output)
 
@@ -0,0 +1,176 @@
+"""
+Compact in-memory representation of large contexts
+
+Data parsed from large files often consists of many small mappings
+which share the same keys (lists of 'records'), and many repeated
+strings. Compacting the context stores each distinct string only once,
+and stores lists of mappings which all have the same keys as a single
+tuple of keys plus one tuple of values per record.
+"""
+
+from collections.abc import Iterator, Mapping, Sequence
+from typing import Any, overload
+
+
+class Record(Mapping[str, Any]):
+    """Read-only mapping which stores its values in a tuple, and shares
+    its keys with the other records in the same RecordList"""
+
+    __slots__ = ("_index", "_values")
+
+    def __init__(self, index: Mapping[str, int], values: tuple[Any, ...]):
+        self._index = index
+        self._values = values
+
+    def __getitem__(self, key: str) -> Any:
+        return self._values[self._index[key]]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __repr__(self) -> str:
+        return repr(dict(self))
+
+
+class RecordList(Sequence[Record]):
+    """Read-only list of Records which all have the same keys"""
+
+    __slots__ = ("_index", "_rows")
+
+    def __init__(self, keys: Sequence[str], rows: list[tuple[Any, ...]]):
+        self._index = {key: position for position, key in enumerate(keys)}
+        self._rows = rows
+
+    @overload
+    def __getitem__(self, index: int) -> Record: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[Record]: ...
+
+    def __getitem__(self, index: int | slice) -> Record | list[Record]:
+        if isinstance(index, slice):
+            return [Record(self._index, row) for row in self._rows[index]]
+
+        return Record(self._index, self._rows[index])
+
+    def __iter__(self) -> Iterator[Record]:
+        index = self._index
+        return (Record(index, row) for row in self._rows)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, Sequence) and not isinstance(other, str):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other, strict=True))
+
+        return NotImplemented
+
+    __hash__ = None  # type: ignore[assignment]
+
+    def __add__(self, other: object) -> list[Any]:
+        if isinstance(other, (list, RecordList)):
+            return [*self, *other]
+
+        return NotImplemented
+
+    def __radd__(self, other: object) -> list[Any]:
+        if isinstance(other, list):
+            return [*other, *self]
+
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+def json_default(value: Any) -> Any:
+    """Convert Records and RecordLists to dictionaries and lists when
+    they are serialized as JSON (the 'default' function for 'json.dumps',
+    used by the 'tojson' filter)"""
+    if isinstance(value, Record):
+        return dict(value)
+
+    if isinstance(value, RecordList):
+        return list(value)
+
+    msg = f"Object of type {type(value).__name__} is not JSON serializable"
+    raise TypeError(msg)
+
+
+class _Compactor:
+    def __init__(self) -> None:
+        self.strings: dict[str, str] = {}
+
+    def string(self, value: str) -> str:
+        return self.strings.setdefault(value, value)
+
+    def value(self, value: Any) -> Any:
+        if isinstance(value, str):
+            return self.string(value)
+
+        if isinstance(value, dict):
+            return self.mapping(value)
+
+        if isinstance(value, list):
+            return self.sequence(value)
+
+        return value
+
+    def mapping(self, data: dict[Any, Any]) -> dict[Any, Any]:
+        result = {}
+
+        # entries are removed from the original mapping as they are
+        # compacted, so the memory they use can be released as soon
+        # as possible
+        for key in list(data):
+            value = data.pop(key)
+            result[self.string(key) if isinstance(key, str) else key] = self.value(value)
+
+        return result
+
+    def sequence(self, data: list[Any]) -> list[Any] | RecordList:
+        keys = record_keys(data)
+
+        if keys is None:
+            return [self.value(item) for item in data]
+
+        rows = []
+
+        for position, item in enumerate(data):
+            rows.append(tuple(self.value(item[key]) for key in keys))
+            data[position] = None
+
+        return RecordList(tuple(self.string(key) for key in keys), rows)
+
+
+def record_keys(data: list[Any]) -> tuple[str, ...] | None:
+    """Determine whether a list contains only mappings with identical
+    (string) keys, returning the keys if it does"""
+    if not data or not isinstance(data[0], dict):
+        return None
+
+    keys = tuple(data[0])
+
+    if not all(isinstance(key, str) for key in keys):
+        return None
+
+    for item in data:
+        if not isinstance(item, dict) or tuple(item) != keys:
+            return None
+
+    return keys
+
+
+def compact_context(context: Mapping[str, Any]) -> dict[str, Any]:
+    """Build a compact copy of a context
+
+    Repeated strings (keys and values) are stored only once, and lists
+    of mappings which all have the same keys are replaced by
+    RecordLists. Mappings and lists in the context are emptied as they
+    are copied, so the original context should not be used afterwards.
+    """
+    return _Compactor().mapping(dict(context))
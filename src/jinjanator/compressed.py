@@ -0,0 +1,151 @@
+"""
+Support for compressed output (and input) files
+"""
+
+import bz2
+import contextlib
+import functools
+import gzip
+import importlib
+import lzma
+import os
+import shutil
+import uuid
+
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from types import ModuleType
+from typing import Any, TextIO, cast
+
+
+COMPRESSION_SUFFIXES = {
+    ".gz": "gzip",
+    ".xz": "xz",
+    ".bz2": "bz2",
+    ".zst": "zstd",
+}
+
+
+@functools.cache
+def zstd_module() -> ModuleType | None:
+    """Find a Zstandard implementation, if one is available
+
+    Python 3.14 includes one in the standard library, otherwise the
+    'zstandard' package can be installed to provide one.
+    """
+    for name in ("compression.zstd", "zstandard"):
+        with contextlib.suppress(ImportError):
+            return importlib.import_module(name)
+
+    return None
+
+
+def compression_for_path(path: Path) -> str | None:
+    """Determine the compression method implied by a file's suffix"""
+    return COMPRESSION_SUFFIXES.get(path.suffix)
+
+
+class CompressionUnavailableError(Exception):
+    def __init__(self, method: str):
+        self.method = method
+        super().__init__(
+            f"Compression method '{method}' is not available"
+            + (" (install the 'zstandard' package to enable it)" if method == "zstd" else ""),
+        )
+
+
+def opener_for(method: str) -> Callable[..., Any]:
+    """Find the function which opens files compressed with a method"""
+    if method == "gzip":
+        return gzip.open
+    if method == "xz":
+        return lzma.open
+    if method == "bz2":
+        return bz2.open
+    if method == "zstd" and (zstd := zstd_module()) is not None:
+        return cast("Callable[..., Any]", zstd.open)
+
+    raise CompressionUnavailableError(method)
+
+
+def open_compressed(path: Path, mode: str, method: str | None, **kwargs: Any) -> TextIO:
+    """Open a file in text mode, compressing or decompressing its content
+    with the specified method (or none)"""
+    if method is None:
+        return cast("TextIO", path.open(mode, **kwargs))
+
+    return cast("TextIO", opener_for(method)(path, mode + "t", **kwargs))
+
+
+def open_output(path: Path, compress: str | None) -> contextlib.AbstractContextManager[TextIO]:
+    """Open an output file, compressing it with the specified method
+
+    If no method is specified, it is determined from the file's
+    suffix; the method 'none' disables compression.
+
+    The output is written to a temporary file in the same directory,
+    which replaces the output file only when the 'with' block using it
+    completes without an exception, so an existing output file is never
+    left partly written. If the output file is a symbolic link, the file
+    it points to is replaced. An existing file's permissions, owner and
+    extended attributes are kept; if that is not possible (or the file
+    has other hard links), or the output is not a regular file (such as
+    a device or a pipe), it is written directly.
+    """
+    if compress is None:
+        compress = compression_for_path(path)
+    elif compress == "none":
+        compress = None
+
+    if compress is not None:
+        # report an unavailable method before anything is written
+        opener_for(compress)
+
+    target = path.resolve()
+
+    if target.exists() and (not target.is_file() or target.stat().st_nlink > 1):
+        return open_compressed(path, "w", compress)
+
+    return _replace_on_success(target, compress)
+
+
+def _copy_metadata(source: Path, target: Path) -> None:
+    """Copy the permissions, owner and extended attributes of a file,
+    raising OSError if the owner cannot be copied"""
+    shutil.copymode(source, target)
+
+    source_stat = source.stat()
+    target_stat = target.stat()
+    if (source_stat.st_uid, source_stat.st_gid) != (target_stat.st_uid, target_stat.st_gid):
+        os.chown(target, source_stat.st_uid, source_stat.st_gid)
+
+    if hasattr(os, "listxattr"):
+        with contextlib.suppress(OSError):
+            for name in os.listxattr(source):
+                os.setxattr(target, name, os.getxattr(source, name))
+
+
+@contextlib.contextmanager
+def _replace_on_success(path: Path, compress: str | None) -> Iterator[TextIO]:
+    temp_path = path.with_name(f".{path.name}.{uuid.uuid4().hex}.tmp")
+    # created like the output file would be (subject to the umask)
+    os.close(os.open(temp_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666))
+
+    if path.exists():
+        try:
+            _copy_metadata(path, temp_path)
+        except OSError:
+            # the replacement would not be owned like the original
+            temp_path.unlink()
+            with open_compressed(path, "w", compress) as f:
+                yield f
+            return
+
+    try:
+        with open_compressed(temp_path, "w", compress) as f:
+            yield f
+
+        temp_path.replace(path)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
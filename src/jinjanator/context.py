@@ -1,16 +1,135 @@
-from collections.abc import Mapping
-from typing import Any, TextIO
+import contextlib
+import functools
+import importlib
+
+from collections.abc import Mapping, Sequence
+from types import ModuleType
+from typing import Any, BinaryIO, TextIO
 
 from jinjanator_plugins import (
     Format,
 )
 
+from .compact import compact_context
+from .formats import JSONFormat
+
+
+class DataPathError(ValueError):
+    pass
+
+
+_NOT_FOUND = object()
+
+
+@functools.cache
+def ijson_module() -> ModuleType | None:
+    """Find the 'ijson' incremental JSON parser, if it is installed"""
+    with contextlib.suppress(ImportError):
+        return importlib.import_module("ijson")
+
+    return None
+
+
+def parse_data_path(expression: str) -> list[str]:
+    """Split a data path expression into its components
+
+    The expression can be either a dotted path ('services.web') or a
+    JSON pointer ('/services/web', as described in RFC 6901).
+    """
+    if expression.startswith("/"):
+        return [
+            component.replace("~1", "/").replace("~0", "~")
+            for component in expression[1:].split("/")
+        ]
+
+    if not expression:
+        return []
+
+    return expression.split(".")
+
+
+def lookup_data_path(data: Any, path: Sequence[str]) -> Any:
+    """Find the value in the data identified by a data path"""
+    for index, component in enumerate(path):
+        if isinstance(data, Mapping) and component in data:
+            data = data[component]
+        elif (
+            isinstance(data, Sequence)
+            and not isinstance(data, str)
+            and component.isdigit()
+            and int(component) < len(data)
+        ):
+            data = data[int(component)]
+        else:
+            msg = f"Data path '{'.'.join(path[: index + 1])}' not found in input data"
+            raise DataPathError(msg)
+
+    return data
+
+
+def select_data_path(data: Any, path: Sequence[str]) -> Mapping[str, Any]:
+    """Select the subtree of the data identified by a data path, which
+    must be a mapping"""
+    data = lookup_data_path(data, path)
 
-def read_context_data(
+    if not isinstance(data, Mapping):
+        msg = f"Data path '{'.'.join(path)}' does not select a mapping"
+        raise DataPathError(msg)
+
+    return data
+
+
+def streamable_data_path(fmt: Format, f: TextIO, path: Sequence[str]) -> BinaryIO | None:
+    """Determine whether a subtree can be extracted from the data using
+    the incremental JSON parser, returning the binary stream to parse
+
+    This is only possible for JSON data (without format options), when
+    'ijson' is installed, and when the path can be expressed as an
+    'ijson' prefix (no components which look like array indexes or
+    contain '.', and none named 'item', which 'ijson' uses to match any
+    array element).
+    """
+    if (
+        not isinstance(fmt, JSONFormat)
+        or fmt.array_name
+        or ijson_module() is None
+        or any(component.isdigit() or "." in component or component == "item" for component in path)
+    ):
+        return None
+
+    return getattr(f, "buffer", None)
+
+
+def read_data_path_stream(f: BinaryIO, path: Sequence[str]) -> Mapping[str, Any]:
+    """Extract a subtree from JSON data using the incremental parser, so
+    that the rest of the document is never materialized"""
+    ijson: Any = ijson_module()
+
+    try:
+        result = next(ijson.items(f, ".".join(path), use_float=True), _NOT_FOUND)
+    except ijson.JSONError as exc:
+        msg = "JSON input is neither an object nor an array"
+        raise TypeError(msg) from exc
+
+    if result is _NOT_FOUND:
+        msg = f"Data path '{'.'.join(path)}' not found in input data"
+        raise DataPathError(msg)
+
+    if not isinstance(result, Mapping):
+        msg = f"Data path '{'.'.join(path)}' does not select a mapping"
+        raise DataPathError(msg)
+
+    return result
+
+
+def read_context_data(  # noqa: PLR0913
     fmt: Format,
     f: TextIO | None,
     environ: Mapping[str, str],
     import_env: str | None = None,
+    data_path: str | None = None,
+    *,
+    compact: bool = False,
 ) -> Mapping[str, Any]:
     if not f:
         msg = "no input supplied"
@@ -18,10 +137,31 @@ def read_context_data(
 
     context: dict[str, Any] = {}
 
-    result = fmt.parse(f.read())
+    if data_path is None:
+        result = fmt.parse(f.read())
+    else:
+        path = parse_data_path(data_path)
+
+        if (stream := streamable_data_path(fmt, f, path)) is not None:
+            result = read_data_path_stream(stream, path)
+        else:
+            result = select_data_path(fmt.parse(f.read()), path)
+
+    if compact:
+        result = compact_context(result)
 
     context |= result
 
+    return import_environment(context, environ, import_env)
+
+
+def import_environment(
+    context: dict[str, Any],
+    environ: Mapping[str, str],
+    import_env: str | None,
+) -> dict[str, Any]:
+    """Import the environment variables into the context, either as a
+    variable named 'import_env', or (if it is empty) at the top level"""
     if import_env is not None:
         if import_env == "":
             context |= environ
@@ -15,6 +15,8 @@ from typing import Any, ClassVar
 
 import jinja2
 
+from .memoize import memoize_pure
+
 
 def imp_load_source(module_name: str, module_path: str) -> ModuleType:
     """
@@ -56,13 +58,23 @@ class CustomizationModule:
     def extra_tests(self) -> Mapping[str, FunctionType]:
         return {}
 
+    def context_indexes(self) -> Mapping[str, str]:
+        return {}
+
     _IMPORTED_METHOD_NAMES: ClassVar = [
         f.__name__
-        for f in (j2_environment_params, j2_environment, alter_context, extra_filters, extra_tests)
+        for f in (
+            j2_environment_params,
+            j2_environment,
+            alter_context,
+            extra_filters,
+            extra_tests,
+            context_indexes,
+        )
     ]
 
     @classmethod
-    def from_file(cls, filename: str) -> "CustomizationModule":
+    def from_file(cls, filename: str | None) -> "CustomizationModule":
         """Create Customize object"""
         if filename is not None:
             return cls(imp_load_source("customize-module", filename))
@@ -77,12 +89,12 @@ def import_functions(filename: str) -> Mapping[str, FunctionType]:
 
 def register_filters(j2env: jinja2.Environment, filters: Mapping[str, FunctionType]) -> None:
     """Register additional filters"""
-    j2env.filters.update(filters)
+    j2env.filters.update(memoize_pure(filters))
 
 
 def register_tests(j2env: jinja2.Environment, tests: Mapping[str, FunctionType]) -> None:
     """Register additional tests"""
-    j2env.tests.update(tests)  # type: ignore[arg-type]
+    j2env.tests.update(memoize_pure(tests))
 
 
 def import_filters(renderer_env: jinja2.Environment, filename: str) -> None:
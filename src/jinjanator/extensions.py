@@ -0,0 +1,176 @@
+"""
+Jinja2 extensions provided by jinjanator
+"""
+
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import jinja2
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+from jinja2.parser import Parser
+from jinja2.runtime import Macro
+
+from .fragments import FragmentCache, MemoizedMacro, fragment_key
+from .memoize import DEFAULT_MAXSIZE
+from .rendercache import digest
+
+
+def configure_output(
+    env: jinja2.Environment,
+    output_root: Path | None,
+    *,
+    write_if_changed: bool = False,
+) -> None:
+    """Configure the directory which 'output' blocks can write files into"""
+    env.jinjanator_output_root = output_root.resolve() if output_root else None  # type: ignore[attr-defined]
+    env.jinjanator_output_write_if_changed = write_if_changed  # type: ignore[attr-defined]
+
+
+class OutputExtension(Extension):
+    """Write the content of a block to a separate file, instead of the template's output
+
+    ```jinja2
+    {% for vhost in vhosts %}
+    {% output "sites/" ~ vhost.name ~ ".conf" %}
+    server_name {{ vhost.name }};
+    {% endoutput %}
+    {% endfor %}
+    ```
+
+    Paths are relative to the output root directory (which must be
+    configured, otherwise 'output' blocks raise an error), and cannot
+    refer to files outside of it.
+    """
+
+    tags = {"output"}  # noqa: RUF012
+
+    def __init__(self, environment: jinja2.Environment):
+        super().__init__(environment)
+        environment.extend(
+            jinjanator_output_root=None,
+            jinjanator_output_write_if_changed=False,
+        )
+
+    def parse(self, parser: Parser) -> nodes.Node:
+        lineno = next(parser.stream).lineno
+        path = parser.parse_expression()
+        body = parser.parse_statements(("name:endoutput",), drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method("_write_output", [path]),
+            [],
+            [],
+            body,
+        ).set_lineno(lineno)
+
+    def _write_output(self, path: str, caller: Callable[[], str]) -> str:
+        root: Path | None = self.environment.jinjanator_output_root  # type: ignore[attr-defined]
+
+        if root is None:
+            msg = "'output' blocks cannot be used unless an output root directory is configured"
+            raise jinja2.TemplateRuntimeError(msg)
+
+        target = (root / path).resolve()
+
+        if not target.is_relative_to(root):
+            msg = f"'output' block path '{path}' is outside of the output root directory"
+            raise jinja2.TemplateRuntimeError(msg)
+
+        content = str(caller())
+
+        if (
+            self.environment.jinjanator_output_write_if_changed  # type: ignore[attr-defined]
+            and target.is_file()
+            and target.read_text() == content
+        ):
+            return ""
+
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_text(content)
+
+        return ""
+
+
+def configure_fragment_cache(
+    env: jinja2.Environment,
+    directory: Path | None,
+    maxsize: int | None = DEFAULT_MAXSIZE,
+) -> None:
+    """Configure the cache used by 'cache' blocks and memoized macros,
+    optionally storing the fragments in a directory (so they can be
+    reused by later runs) as well as in memory"""
+    env.jinjanator_fragment_cache = FragmentCache(maxsize, directory)  # type: ignore[attr-defined]
+
+
+class CacheExtension(Extension):
+    """Cache the content of a block, for each combination of the values of its keys
+
+    ```jinja2
+    {% for host in hosts %}
+    {% cache host.role, acls_version %}
+    {{ acl_table(acls[host.role]) }}
+    {% endcache %}
+    {% endfor %}
+    ```
+
+    Also provides the 'memoize_macro' global function, which wraps a
+    macro so that its output is cached for each combination of its
+    arguments:
+
+    ```jinja2
+    {% macro acl_table(rules) %}...{% endmacro %}
+    {% set acl_table = memoize_macro(acl_table) %}
+    ```
+
+    The content of a block (or the output of a macro) must depend only
+    on its keys (or arguments).
+    """
+
+    tags = {"cache"}  # noqa: RUF012
+
+    def __init__(self, environment: jinja2.Environment):
+        super().__init__(environment)
+        environment.extend(jinjanator_fragment_cache=FragmentCache())
+        environment.globals["memoize_macro"] = self._memoize_macro
+
+    def parse(self, parser: Parser) -> nodes.Node:
+        lineno = next(parser.stream).lineno
+        keys = [parser.parse_expression()]
+
+        while parser.stream.skip_if("comma"):
+            keys.append(parser.parse_expression())
+
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+
+        # identify the block by its content, so changing the block changes
+        # the keys of its fragments
+        identity = f"block:{parser.name}:{digest(repr(body).encode('utf-8'))}"
+
+        return nodes.CallBlock(
+            self.call_method("_cached_block", [nodes.Const(identity), nodes.List(keys)]),
+            [],
+            [],
+            body,
+        ).set_lineno(lineno)
+
+    def _cached_block(self, identity: str, keys: list[Any], caller: Callable[[], str]) -> str:
+        cache: FragmentCache = self.environment.jinjanator_fragment_cache  # type: ignore[attr-defined]
+        key = fragment_key(identity, keys)
+
+        if (fragment := cache.get(key)) is None:
+            fragment = caller()
+            cache.set(key, fragment)
+
+        return fragment
+
+    def _memoize_macro(self, macro: Macro) -> MemoizedMacro:
+        if not isinstance(macro, Macro):
+            msg = "memoize_macro() can only be used with macros"
+            raise jinja2.TemplateRuntimeError(msg)
+
+        return MemoizedMacro(
+            macro,
+            self.environment.jinjanator_fragment_cache,  # type: ignore[attr-defined]
+        )
@@ -0,0 +1,154 @@
+"""
+Fan-out mode: render one template once for each of many data files
+"""
+
+import glob
+
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+import jinja2
+
+from attrs import define, field
+
+from .compressed import compression_for_path, open_output
+from .renderer import Renderer
+
+
+@define(frozen=True)
+class FanOutOptions:
+    template: str
+    output_pattern: str
+    static_data: Path | None = None
+    data_format: str | None = None
+    format_options: Sequence[str] | None = None
+    environ: Mapping[str, str] = field(factory=dict)
+    import_env: str | None = None
+    data_path: str | None = None
+    compact: bool = False
+    compress: str | None = None
+
+
+@define(frozen=True)
+class FanOutFailure:
+    data_file: Path
+    message: str
+
+
+def find_data_files(spec: str) -> list[Path]:
+    """Find the data files specified by a directory name or a glob pattern"""
+    path = Path(spec)
+
+    if path.is_dir():
+        return sorted(p for p in path.iterdir() if p.is_file())
+
+    return sorted(
+        Path(name)
+        for name in glob.glob(spec, recursive=True)  # noqa: PTH207
+        if Path(name).is_file()
+    )
+
+
+def output_path(pattern: str, data_file: Path) -> Path:
+    """Build the path of an output file from a pattern, by substituting
+    '{name}' (the data file's name), '{stem}' (its name without its
+    format and compression suffixes) and '{parent}' (its directory)"""
+    stem = data_file.stem
+
+    if compression_for_path(data_file):
+        stem = Path(stem).stem
+
+    return Path(pattern.format(name=data_file.name, stem=stem, parent=data_file.parent))
+
+
+def load_template(
+    renderer: Renderer,
+    template_name: str,
+    static_data: Path | None,
+) -> str | jinja2.Template:
+    """Specialize the template against the static data, if there is any
+    (otherwise the template will be loaded when it is rendered)"""
+    if static_data is None:
+        return template_name
+
+    return renderer.specialize(template_name, renderer.load_data_file(static_data))
+
+
+def render_data_file(
+    renderer: Renderer,
+    template: str | jinja2.Template,
+    options: FanOutOptions,
+    data_file: Path,
+) -> FanOutFailure | None:
+    try:
+        context = renderer.load_data_file(
+            data_file,
+            options.data_format,
+            options.format_options,
+            options.environ,
+            options.import_env,
+            data_path=options.data_path,
+            compact=options.compact,
+        )
+
+        output_file = output_path(options.output_pattern, data_file)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+
+        with open_output(output_file, options.compress) as f:
+            renderer.render_to(f, template, context)
+    except Exception as exc:  # noqa: BLE001
+        return FanOutFailure(data_file, f"{type(exc).__name__}: {exc}")
+
+    return None
+
+
+# each worker process builds its own renderer (and template), once
+_worker_state: dict[str, Any] = {}
+
+
+def _init_worker(renderer_factory: Callable[[], Renderer], options: FanOutOptions) -> None:
+    renderer = renderer_factory()
+    _worker_state["renderer"] = renderer
+    _worker_state["template"] = load_template(renderer, options.template, options.static_data)
+
+
+def _render_in_worker(options: FanOutOptions, data_file: Path) -> FanOutFailure | None:
+    return render_data_file(
+        _worker_state["renderer"],
+        _worker_state["template"],
+        options,
+        data_file,
+    )
+
+
+def fan_out(
+    renderer_factory: Callable[[], Renderer],
+    options: FanOutOptions,
+    data_files: Iterable[Path],
+    jobs: int = 1,
+) -> list[FanOutFailure]:
+    """Render the template for each data file, returning a list of failures
+
+    With more than one job, the data files are distributed across a pool
+    of worker processes; 'renderer_factory' must then be picklable.
+    """
+    if jobs <= 1:
+        renderer = renderer_factory()
+        template = load_template(renderer, options.template, options.static_data)
+        results = [
+            render_data_file(renderer, template, options, data_file) for data_file in data_files
+        ]
+    else:
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            initializer=_init_worker,
+            initargs=(renderer_factory, options),
+        ) as executor:
+            results = list(
+                executor.map(partial(_render_in_worker, options), data_files, chunksize=16),
+            )
+
+    return [result for result in results if result is not None]
@@ -1,5 +1,7 @@
 import os
 
+from contextvars import ContextVar
+
 from jinjanator_plugins import (
     Filters,
     Globals,
@@ -7,6 +9,12 @@ from jinjanator_plugins import (
     plugin_globals_hook,
 )
 
+from . import bulk
+
+
+# when set, the names of environment variables read by 'env' are added to this set
+environment_reads: ContextVar[set[str] | None] = ContextVar("environment_reads", default=None)
+
 
 def env(varname: str, default: str | None = None) -> str:
     """Use an environment variable's value inside your template.
@@ -35,6 +43,9 @@ def env(varname: str, default: str | None = None) -> str:
 
     Notice that there must be quotes around the environment variable name
     """
+    if (reads := environment_reads.get()) is not None:
+        reads.add(varname)
+
     if default is not None:
         # With the default, there's never an error
         return os.getenv(varname, default)
@@ -45,7 +56,7 @@ def env(varname: str, default: str | None = None) -> str:
 
 @plugin_filters_hook
 def plugin_filters() -> Filters:
-    return {"env": env}
+    return {"env": env, **bulk.FILTERS}
 
 
 @plugin_globals_hook
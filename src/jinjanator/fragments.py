@@ -0,0 +1,162 @@
+"""
+Caching of rendered template fragments ('cache' blocks and memoized macros)
+
+Each fragment is identified by a key computed from the identity of the
+block or macro which produced it (derived from its compiled form, so
+changing the template changes the identity) and the values it was
+rendered with ('cache' block keys, or macro arguments). Fragments are
+kept in a bounded in-process LRU cache, and optionally also stored in
+a directory, so they can be reused by later runs.
+"""
+
+import functools
+import hashlib
+import json
+import threading
+
+from collections import OrderedDict
+from pathlib import Path
+from types import CodeType
+from typing import Any
+
+from markupsafe import Markup
+
+from .memoize import DEFAULT_MAXSIZE, CacheInfo
+from .rendercache import digest, write_json
+
+
+def fragment_key(identity: str, values: Any) -> str:
+    """Compute the key of a fragment from the identity of the block or
+    macro which produced it and the values it was rendered with"""
+    try:
+        serialized = json.dumps([identity, values], sort_keys=True, default=repr)
+    except (TypeError, ValueError):
+        # keys which cannot be sorted, or circular references
+        serialized = repr([identity, values])
+
+    return digest(serialized.encode("utf-8"))
+
+
+class FragmentCache:
+    """LRU cache of rendered fragments, optionally backed by a directory"""
+
+    def __init__(self, maxsize: int | None = DEFAULT_MAXSIZE, directory: Path | None = None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.fragments: OrderedDict[str, str] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def entry_path(self, key: str) -> Path | None:
+        if self.directory is None:
+            return None
+
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> str | None:
+        """Return the cached fragment for a key (as 'Markup', if it was
+        stored as 'Markup'), if there is one"""
+        with self._lock:
+            if (fragment := self.fragments.get(key)) is not None:
+                self.fragments.move_to_end(key)
+                self.hits += 1
+                return fragment
+
+        if (path := self.entry_path(key)) is not None:
+            try:
+                entry = json.loads(path.read_text(encoding="utf-8"))
+                # the fragment was already escaped when it was stored
+                fragment = Markup(entry["fragment"]) if entry["markup"] else entry["fragment"]  # noqa: S704
+            except (OSError, ValueError, KeyError, TypeError):
+                pass
+            else:
+                self._remember(key, fragment)
+                with self._lock:
+                    self.hits += 1
+                return fragment
+
+        with self._lock:
+            self.misses += 1
+
+        return None
+
+    def _remember(self, key: str, fragment: str) -> None:
+        with self._lock:
+            self.fragments[key] = fragment
+            self.fragments.move_to_end(key)
+
+            if self.maxsize is not None:
+                while len(self.fragments) > self.maxsize:
+                    self.fragments.popitem(last=False)
+
+    def set(self, key: str, fragment: str) -> None:
+        self._remember(key, fragment)
+
+        if (path := self.entry_path(key)) is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            write_json(
+                path,
+                {"fragment": str(fragment), "markup": isinstance(fragment, Markup)},
+            )
+
+    def cache_info(self) -> CacheInfo:
+        with self._lock:
+            return CacheInfo(self.hits, self.misses, 0, self.maxsize, len(self.fragments))
+
+    def cache_clear(self) -> None:
+        """Discard the fragments cached in memory (but not those stored
+        in the directory)"""
+        with self._lock:
+            self.fragments.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+def _hash_code(code: CodeType, h: "hashlib._Hash") -> None:
+    h.update(code.co_code)
+    h.update(repr((code.co_filename, code.co_name, code.co_names, code.co_varnames)).encode())
+
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            _hash_code(const, h)
+        elif isinstance(const, frozenset):
+            # the order of the items depends on string hash randomization
+            h.update(repr(sorted(repr(item) for item in const)).encode())
+        else:
+            h.update(repr(const).encode())
+
+
+@functools.lru_cache(maxsize=DEFAULT_MAXSIZE)
+def code_identity(code: CodeType) -> str:
+    """Compute the identity of a macro from its compiled code (including
+    the code of any nested functions, and the name of the template), so
+    that it is the same in every process which compiles the same macro"""
+    h = hashlib.sha256()
+    _hash_code(code, h)
+    return h.hexdigest()
+
+
+class MemoizedMacro:
+    """Wrapper for a macro which caches its output for each set of arguments
+
+    Calls which pass a 'caller' (from a 'call' block) are not cached,
+    since the output depends on the content of the block.
+    """
+
+    def __init__(self, macro: Any, cache: FragmentCache):
+        self.macro = macro
+        self.cache = cache
+        self.identity = f"macro:{macro.name}:{code_identity(macro._func.__code__)}"  # noqa: SLF001
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        if "caller" in kwargs:
+            return self.macro(*args, **kwargs)
+
+        key = fragment_key(self.identity, [args, kwargs])
+
+        if (fragment := self.cache.get(key)) is None:
+            fragment = self.macro(*args, **kwargs)
+            self.cache.set(key, fragment)
+
+        return fragment
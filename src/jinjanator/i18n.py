@@ -0,0 +1,36 @@
+"""
+Loading gettext translation catalogs, for use with the Jinja2 'i18n' extension
+"""
+
+import functools
+import gettext
+
+from pathlib import Path
+
+
+DEFAULT_DOMAIN = "messages"
+
+
+class CatalogNotFoundError(Exception):
+    def __init__(self, locale_dir: Path, domain: str, locale: str):
+        self.locale_dir = locale_dir
+        self.domain = domain
+        self.locale = locale
+        super().__init__(
+            f"No translation catalog for locale '{locale}' found"
+            f" ('{locale_dir}/{locale}/LC_MESSAGES/{domain}.mo')",
+        )
+
+
+@functools.cache
+def load_translations(
+    locale_dir: Path,
+    locale: str,
+    domain: str = DEFAULT_DOMAIN,
+) -> gettext.GNUTranslations:
+    """Load (once) the compiled catalog (.mo file) for a locale, from the
+    standard directory layout: 'locale_dir/locale/LC_MESSAGES/domain.mo'"""
+    try:
+        return gettext.translation(domain, localedir=locale_dir, languages=[locale])
+    except FileNotFoundError as exc:
+        raise CatalogNotFoundError(locale_dir, domain, locale) from exc
@@ -0,0 +1,130 @@
+"""
+Incremental rendering, based on the context variables each template accesses
+
+While a template is rendered, the names of the context variables it
+(and any templates it includes or imports) looks up are recorded,
+along with a digest of each variable's value. On later runs, if the
+values of those variables, the templates and the environment
+variables read through the 'env' filter are unchanged, the existing
+output file is still current and rendering can be skipped.
+"""
+
+import contextlib
+import json
+
+from collections.abc import Iterator, Mapping
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any
+
+from .lazy import LazyGlobalsContext
+from .rendercache import digest, file_digest, write_json
+
+
+# when set, the names of context variables looked up by templates are added to this set
+accessed_names: ContextVar[set[str] | None] = ContextVar("accessed_names", default=None)
+
+
+class TrackingContext(LazyGlobalsContext):
+    """Jinja2 template context which records the names of the variables
+    looked up in it"""
+
+    def resolve_or_missing(self, key: str) -> Any:
+        if (names := accessed_names.get()) is not None:
+            names.add(key)
+
+        return super().resolve_or_missing(key)
+
+
+@contextlib.contextmanager
+def record_context_access() -> Iterator[set[str]]:
+    """Record the names of the context variables looked up by templates
+    rendered (with a TrackingContext) in the current thread"""
+    names: set[str] = set()
+    token = accessed_names.set(names)
+
+    try:
+        yield names
+    finally:
+        accessed_names.reset(token)
+
+
+def value_digest(context: Mapping[str, Any], name: str) -> str | None:
+    """Compute a digest of the value of a context variable ('None' if
+    the variable is not present)"""
+    if name not in context:
+        return None
+
+    value = context[name]
+
+    try:
+        serialized = json.dumps(value, sort_keys=True, default=repr)
+    except (TypeError, ValueError):
+        # keys which cannot be sorted, or circular references
+        serialized = repr(value)
+
+    return digest(serialized.encode("utf-8"))
+
+
+class IncrementalState:
+    """Records of the inputs used to render output files, stored as one
+    JSON file per output file in a state directory"""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+
+    def entry_path(self, output_file: Path) -> Path:
+        return self.directory / f"{digest(str(output_file.resolve()).encode('utf-8'))}.json"
+
+    def is_current(
+        self,
+        output_file: Path,
+        inputs: str,
+        context: Mapping[str, Any],
+        environ: Mapping[str, str],
+    ) -> bool:
+        """Determine whether an output file is current: it exists, and was
+        rendered with the same inputs (options, versions, etc.), the
+        same values of the context variables it accessed, the same
+        templates and the same environment variables"""
+        if not output_file.is_file():
+            return False
+
+        try:
+            entry = json.loads(self.entry_path(output_file).read_text(encoding="utf-8"))
+
+            return (
+                entry["inputs"] == inputs
+                and all(
+                    value_digest(context, name) == value
+                    for name, value in entry["variables"].items()
+                )
+                and all(environ.get(name) == value for name, value in entry["environment"].items())
+                and all(
+                    file_digest(Path(path)) == template_digest
+                    for path, template_digest in entry["templates"].items()
+                )
+            )
+        except (OSError, ValueError, KeyError):
+            return False
+
+    def update(
+        self,
+        output_file: Path,
+        inputs: str,
+        variables: Mapping[str, str | None],
+        templates: Mapping[str, str],
+        environment: Mapping[str, str | None],
+    ) -> None:
+        """Record the inputs which were used to render an output file"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        write_json(
+            self.entry_path(output_file),
+            {
+                "inputs": inputs,
+                "variables": dict(variables),
+                "templates": dict(templates),
+                "environment": dict(environment),
+            },
+        )
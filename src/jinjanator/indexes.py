@@ -0,0 +1,96 @@
+"""
+Lookup indexes over lists in the context
+
+Templates which look up items in a list by the value of one of their
+keys (for example, finding a host by name inside a loop) scan the
+list for every lookup. An index is a dictionary of the items in the
+list, keyed by that value, built once (after the 'alter_context'
+customization has been applied) and added to the context, so each
+lookup is a single dictionary access.
+"""
+
+from collections.abc import Iterable, Mapping
+from typing import Any
+
+from attrs import define
+
+from .bulk import index_by
+from .context import DataPathError, lookup_data_path, parse_data_path
+
+
+class IndexSpecError(ValueError):
+    pass
+
+
+class IndexBuildError(ValueError):
+    def __init__(self, name: str, reason: str):
+        self.name = name
+        self.reason = reason
+        super().__init__(f"Index '{name}' could not be built: {reason}")
+
+
+@define(frozen=True)
+class IndexSpec:
+    """An index named 'name', over the list selected by 'path' (a data
+    path, see jinjanator.context.parse_data_path), keyed by the value of
+    'key' (a possibly dotted key, see jinjanator.bulk.key_getter) in
+    each item"""
+
+    name: str
+    path: tuple[str, ...]
+    key: str
+
+    @classmethod
+    def from_definition(cls, name: str, definition: str) -> "IndexSpec":
+        """Create an index specification from a 'path:key' definition"""
+        path, sep, key = definition.rpartition(":")
+
+        if not name or not sep or not path or not key:
+            msg = f"Index definition '{definition}' for '{name}' is not of the form 'path:key'"
+            raise IndexSpecError(msg)
+
+        return cls(name, tuple(parse_data_path(path)), key)
+
+    @classmethod
+    def parse(cls, spec: str) -> "IndexSpec":
+        """Create an index specification from a 'name=path:key' string"""
+        name, sep, definition = spec.partition("=")
+
+        if not sep or not name:
+            msg = f"Index specification '{spec}' is not of the form 'name=path:key'"
+            raise IndexSpecError(msg)
+
+        return cls.from_definition(name, definition)
+
+
+def build_index(context: Mapping[str, Any], spec: IndexSpec) -> dict[Any, Any]:
+    try:
+        items = lookup_data_path(context, spec.path)
+    except DataPathError as exc:
+        raise IndexBuildError(spec.name, str(exc)) from exc
+
+    if isinstance(items, str | bytes | Mapping) or not isinstance(items, Iterable):
+        msg = f"data path '{'.'.join(spec.path)}' does not select a list"
+        raise IndexBuildError(spec.name, msg)
+
+    try:
+        return index_by(items, spec.key)
+    except KeyError as exc:
+        raise IndexBuildError(spec.name, exc.args[0]) from exc
+
+
+def add_indexes(context: Mapping[str, Any], specs: Iterable[IndexSpec]) -> Mapping[str, Any]:
+    """Build the indexes, returning a copy of the context with the
+    indexes added to it"""
+    indexes: dict[str, Any] = {}
+
+    for spec in specs:
+        if spec.name in context or spec.name in indexes:
+            raise IndexBuildError(spec.name, "the name is already used in the context")
+
+        indexes[spec.name] = build_index(context, spec)
+
+    if not indexes:
+        return context
+
+    return {**context, **indexes}
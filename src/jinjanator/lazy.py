@@ -0,0 +1,87 @@
+"""
+Lazily evaluated global variables
+
+A plugin's 'plugin_globals' hook (or a customization) can provide a
+global variable whose value is expensive to compute (reading key
+material, scanning directories, etc.) by wrapping a function which
+computes the value with 'lazy'. The function is only called when a
+template first uses the variable, and its result is used for every
+later use, in the same render and in later renders.
+"""
+
+import threading
+
+from collections.abc import Callable
+from typing import Any
+
+from jinja2.runtime import Context
+
+
+_UNSET = object()
+
+
+class LazyGlobal:
+    """Global variable whose value is computed by a provider function
+    the first time it is used
+
+    Calling the object returns the value (calling the provider if it
+    has not been called yet).
+    """
+
+    def __init__(self, provider: Callable[[], Any]):
+        self.provider = provider
+        self._value: Any = _UNSET
+        self._lock = threading.Lock()
+
+    @property
+    def evaluated(self) -> bool:
+        return self._value is not _UNSET
+
+    def __call__(self) -> Any:
+        if self._value is _UNSET:
+            with self._lock:
+                # another thread may have computed the value while this
+                # one was waiting for the lock
+                if self._value is _UNSET:
+                    self._value = self.provider()
+
+        return self._value
+
+    def reset(self) -> None:
+        """Discard the value, so the provider is called again the next
+        time the variable is used"""
+        with self._lock:
+            self._value = _UNSET
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.provider!r})"
+
+
+def lazy(provider: Callable[[], Any]) -> LazyGlobal:
+    """Make a lazily evaluated global variable, whose value is computed
+    by calling 'provider' (with no arguments) when it is first used
+
+    Usage (in a plugin):
+
+    ```python
+    from jinjanator import lazy
+    from jinjanator_plugins import Globals, plugin_globals_hook
+
+    def load_signing_key():
+        ...
+
+    @plugin_globals_hook
+    def plugin_globals() -> Globals:
+        return {"signing_key": lazy(load_signing_key)}
+    ```
+    """
+    return LazyGlobal(provider)
+
+
+class LazyGlobalsContext(Context):
+    """Jinja2 template context which replaces lazily evaluated global
+    variables with their values when they are looked up"""
+
+    def resolve_or_missing(self, key: str) -> Any:
+        value = super().resolve_or_missing(key)
+        return value() if isinstance(value, LazyGlobal) else value
@@ -0,0 +1,209 @@
+"""
+Resource limits for rendering: elapsed time, output size and memory
+
+The limits are checked each time the template produces a chunk of
+output, so a render which exceeds one of them is stopped as soon as it
+produces more output (before that output is written anywhere), rather
+than running to completion. Note that time spent in a part of a
+template which produces no output at all (such as a loop containing
+only 'set' statements) is only detected when the next chunk of output
+is produced, unless the render runs in the main thread of a process on
+a platform which supports interval timers (see RenderLimits.deadline),
+where the time limit is also enforced by a timer.
+"""
+
+import contextlib
+import functools
+import importlib
+import re
+import signal
+import sys
+import threading
+import time
+
+from collections.abc import Iterable, Iterator
+from types import FrameType, ModuleType
+from typing import TypeVar
+
+from attrs import define
+
+
+# peak memory usage is checked after this many chunks of output, since
+# it requires a system call
+MEMORY_CHECK_INTERVAL = 256
+
+ChunkT = TypeVar("ChunkT")
+
+_SIZE_SUFFIXES = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+class RenderLimitExceededError(Exception):
+    pass
+
+
+class RenderTimeExceededError(RenderLimitExceededError):
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        super().__init__(f"Render time limit of {seconds} seconds exceeded")
+
+
+class RenderOutputExceededError(RenderLimitExceededError):
+    def __init__(self, size: int):
+        self.size = size
+        super().__init__(f"Render output limit of {size} bytes exceeded")
+
+
+class RenderMemoryExceededError(RenderLimitExceededError):
+    def __init__(self, size: int):
+        self.size = size
+        super().__init__(f"Memory limit of {size} bytes exceeded")
+
+
+class MemoryLimitUnsupportedError(Exception):
+    def __init__(self) -> None:
+        super().__init__("Memory limits are not supported on this platform")
+
+
+def parse_size(value: str) -> int:
+    """Parse a size in bytes, optionally with a binary suffix ('512K',
+    '64M', '2G', '1T')"""
+    match = re.fullmatch(r"\s*(\d+)\s*([KMGT]?)B?\s*", value.upper())
+
+    if match is None:
+        msg = f"'{value}' is not a valid size (expected a number of bytes, like 512K or 2G)"
+        raise ValueError(msg)
+
+    return int(match[1]) * _SIZE_SUFFIXES[match[2]]
+
+
+@functools.cache
+def resource_module() -> ModuleType | None:
+    """Find the 'resource' module, which is not available on Windows"""
+    with contextlib.suppress(ImportError):
+        return importlib.import_module("resource")
+
+    return None  # pragma: no cover
+
+
+def peak_memory() -> int:
+    """Report the peak memory usage (resident set size) of this process, in bytes"""
+    resource = resource_module()
+
+    if resource is None:  # pragma: no cover
+        raise MemoryLimitUnsupportedError
+
+    usage: int = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # reported in bytes on macOS, and in kilobytes elsewhere
+    return usage if sys.platform == "darwin" else usage * 1024
+
+
+@define(frozen=True)
+class RenderLimits:
+    """Limits on a single render; a limit of 'None' is not enforced
+
+    'max_memory' limits the peak memory usage of the whole process
+    (including the parsed data and the compiled templates), not only
+    the memory used by the render itself.
+    """
+
+    max_seconds: float | None = None
+    max_output_bytes: int | None = None
+    max_memory: int | None = None
+
+    def __attrs_post_init__(self) -> None:
+        if self.max_memory is not None and resource_module() is None:  # pragma: no cover
+            raise MemoryLimitUnsupportedError
+
+    def __bool__(self) -> bool:
+        return any(
+            limit is not None
+            for limit in (self.max_seconds, self.max_output_bytes, self.max_memory)
+        )
+
+    @contextlib.contextmanager
+    def deadline(self) -> Iterator[None]:
+        """Stop the render in this block (by raising RenderTimeExceededError)
+        when the time limit expires, even if it is not producing any output
+
+        This uses an interval timer (ITIMER_REAL, delivering SIGALRM), so
+        it is only possible in the main thread, on platforms which provide
+        'signal.setitimer' (not Windows); elsewhere only the checks in
+        'enforce' are made. An interval timer the program already has
+        running is restored afterwards (less the time spent in the
+        block); if it would expire before the time limit, it is left
+        alone, and only the checks in 'enforce' are made.
+        """
+        if (
+            self.max_seconds is None
+            or not hasattr(signal, "setitimer")
+            or threading.current_thread() is not threading.main_thread()
+        ):
+            yield
+            return
+
+        max_seconds = self.max_seconds
+        running, _ = signal.getitimer(signal.ITIMER_REAL)
+
+        if running and running <= max_seconds:
+            yield
+            return
+
+        def expired(signum: int, frame: FrameType | None) -> None:  # noqa: ARG001
+            raise RenderTimeExceededError(max_seconds)
+
+        previous_handler = signal.signal(signal.SIGALRM, expired)
+        start = time.monotonic()
+        previous_delay, previous_interval = signal.setitimer(signal.ITIMER_REAL, max_seconds)
+
+        try:
+            yield
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous_handler)
+
+            if previous_delay:
+                # a delay of zero would disarm the timer instead
+                remaining = max(previous_delay - (time.monotonic() - start), 1e-6)
+                signal.setitimer(signal.ITIMER_REAL, remaining, previous_interval)
+
+    def enforce(self, chunks: Iterable[ChunkT]) -> Iterator[ChunkT]:
+        """Pass through chunks of output, raising RenderLimitExceededError
+        when one of the limits is exceeded
+
+        Only string chunks count towards the output limit; the values
+        produced by native templates (see jinjanator.native) are not
+        the output, which is checked by 'check_output' once they have
+        been serialized.
+        """
+        start = time.monotonic()
+        output_bytes = 0
+
+        for count, chunk in enumerate(chunks, 1):
+            if self.max_seconds is not None and time.monotonic() - start > self.max_seconds:
+                raise RenderTimeExceededError(self.max_seconds)
+
+            if self.max_output_bytes is not None and isinstance(chunk, str):
+                output_bytes += len(chunk) if chunk.isascii() else len(chunk.encode("utf-8"))
+                if output_bytes > self.max_output_bytes:
+                    raise RenderOutputExceededError(self.max_output_bytes)
+
+            if count % MEMORY_CHECK_INTERVAL == 0:
+                self.check_memory()
+
+            yield chunk
+
+        # in case the render produced too few chunks to reach a periodic check
+        self.check_memory()
+
+    def check_output(self, output: str) -> None:
+        """Check the size of a complete output"""
+        if (
+            self.max_output_bytes is not None
+            and len(output.encode("utf-8")) > self.max_output_bytes
+        ):
+            raise RenderOutputExceededError(self.max_output_bytes)
+
+    def check_memory(self) -> None:
+        if self.max_memory is not None and peak_memory() > self.max_memory:
+            raise RenderMemoryExceededError(self.max_memory)
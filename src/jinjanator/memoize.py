@@ -0,0 +1,139 @@
+"""
+Memoization of 'pure' filters, tests and global functions
+
+Functions marked with the 'pure' decorator are wrapped in a bounded
+LRU cache when they are registered in the Jinja2 environment, so
+repeated calls with the same arguments only call the function once.
+"""
+
+import functools
+
+from collections.abc import Callable, Mapping
+from typing import Any, NamedTuple, TypeVar, overload
+
+import jinja2
+
+
+PURE_ATTRIBUTE = "jinjanator_pure_maxsize"
+DEFAULT_MAXSIZE = 1024
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+@overload
+def pure(func: F, *, maxsize: int | None = DEFAULT_MAXSIZE) -> F: ...
+
+
+@overload
+def pure(*, maxsize: int | None = DEFAULT_MAXSIZE) -> Callable[[F], F]: ...
+
+
+def pure(
+    func: F | None = None,
+    *,
+    maxsize: int | None = DEFAULT_MAXSIZE,
+) -> F | Callable[[F], F]:
+    """Mark a filter, test or global function as pure
+
+    A pure function's result depends only on its arguments, and calling it
+    has no side effects, so its results can be cached. 'maxsize' is the
+    number of results which will be cached ('None' for no limit).
+
+    Usage (in a filters or tests file, where every function, including
+    imported ones, is registered, so 'pure' itself is not imported):
+
+    ```python
+    import jinjanator
+
+    @jinjanator.pure
+    def netmask(cidr):
+        ...
+
+    @jinjanator.pure(maxsize=100)
+    def digest(value):
+        ...
+    ```
+    """
+
+    def decorator(f: F) -> F:
+        setattr(f, PURE_ATTRIBUTE, maxsize)
+        return f
+
+    if func is None:
+        return decorator
+
+    return decorator(func)
+
+
+class CacheInfo(NamedTuple):
+    hits: int
+    misses: int
+    uncacheable: int
+    maxsize: int | None
+    currsize: int
+
+
+class MemoizedFunction:
+    """Wrapper which caches the results of calls to a pure function
+
+    Calls with unhashable arguments (lists, dicts, etc.) are passed
+    through to the function without caching.
+    """
+
+    def __init__(self, func: Callable[..., Any], maxsize: int | None):
+        functools.update_wrapper(self, func)
+        self.func = func
+        # typed, so that equal values of different types (1, 1.0 and True) have
+        # separate results
+        self.cached_func = functools.lru_cache(maxsize=maxsize, typed=True)(func)
+        self.uncacheable = 0
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        try:
+            hash((args, tuple(kwargs.items())))
+        except TypeError:
+            self.uncacheable += 1
+            return self.func(*args, **kwargs)
+
+        return self.cached_func(*args, **kwargs)
+
+    def cache_info(self) -> CacheInfo:
+        info = self.cached_func.cache_info()
+        return CacheInfo(info.hits, info.misses, self.uncacheable, info.maxsize, info.currsize)
+
+    def cache_clear(self) -> None:
+        self.cached_func.cache_clear()
+        self.uncacheable = 0
+
+
+def memoize(func: Any) -> Any:
+    """Wrap a function in a cache if it has been marked as pure"""
+    if not hasattr(func, PURE_ATTRIBUTE) or isinstance(func, MemoizedFunction):
+        return func
+
+    # functions which receive the template context can't be cached,
+    # as their results depend on more than their arguments
+    pass_arg = getattr(getattr(func, "jinja_pass_arg", None), "name", None)
+    if pass_arg in ("context", "eval_context"):
+        return func
+
+    return MemoizedFunction(func, getattr(func, PURE_ATTRIBUTE))
+
+
+def memoize_pure(functions: Mapping[str, Any]) -> dict[str, Any]:
+    """Wrap every function marked as pure in a cache"""
+    return {name: memoize(func) for name, func in functions.items()}
+
+
+def memoized_functions(env: jinja2.Environment) -> dict[str, MemoizedFunction]:
+    """Find all memoized filters, tests and globals in an environment"""
+    return {
+        f"{kind}:{name}": func
+        for kind, functions in (
+            ("filter", env.filters),
+            ("test", env.tests),
+            ("global", env.globals),
+        )
+        for name, func in functions.items()
+        if isinstance(func, MemoizedFunction)
+    }
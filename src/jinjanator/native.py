@@ -0,0 +1,104 @@
+"""
+Rendering templates to structured data ('--native-output')
+
+Templates are compiled by Jinja2's NativeEnvironment, so a template
+evaluates to a Python object (a dictionary, list, number, etc.) rather
+than a string; the object is then serialized as JSON or YAML. A
+template consisting of a single expression produces the value of that
+expression; otherwise, the output of the template is parsed as a
+Python literal, if possible.
+
+Undefined values in the result are serialized as null (or raise
+UndefinedError, unless undefined variables are allowed).
+
+JSON is serialized using 'orjson', if it is installed, or the standard
+library's 'json' module; YAML is serialized using PyYAML's C-based
+dumper (if PyYAML was built with LibYAML) or its pure-Python dumper.
+"""
+
+import contextlib
+import functools
+import importlib
+import json
+
+from collections.abc import Callable, Iterator, Mapping
+from types import ModuleType
+from typing import Any
+
+import jinja2
+import yaml
+
+from .usage import is_list
+
+
+class NativeOutputError(ValueError):
+    def __init__(self, output_format: str, reason: str):
+        self.output_format = output_format
+        super().__init__(f"Template result cannot be serialized as {output_format}: {reason}")
+
+
+@functools.cache
+def orjson_module() -> ModuleType | None:
+    """Find the 'orjson' JSON serializer, if it is installed"""
+    with contextlib.suppress(ImportError):
+        return importlib.import_module("orjson")
+
+    return None
+
+
+def to_data(value: Any) -> Any:
+    """Convert the result of a native template to plain dictionaries and
+    lists (including the results of filters like 'map', which produce
+    iterators), replacing undefined values with 'None'"""
+    if isinstance(value, jinja2.Undefined):
+        # a strict undefined value raises UndefinedError when converted
+        str(value)
+        return None
+
+    if isinstance(value, Mapping):
+        return {k: to_data(v) for k, v in value.items()}
+
+    if is_list(value) or isinstance(value, Iterator):
+        return [to_data(item) for item in value]
+
+    return value
+
+
+def serialize_json(value: Any) -> str:
+    orjson: Any = orjson_module()
+
+    if orjson is None:
+        return json.dumps(value, indent=2, ensure_ascii=False)
+
+    # non-string keys are converted to strings, as the 'json' module does
+    options = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+    return str(orjson.dumps(value, option=options).decode("utf-8"))
+
+
+def serialize_yaml(value: Any) -> str:
+    return yaml.dump(
+        value,
+        Dumper=getattr(yaml, "CSafeDumper", yaml.SafeDumper),
+        allow_unicode=True,
+        default_flow_style=False,
+        sort_keys=False,
+    )
+
+
+SERIALIZERS: dict[str, Callable[[Any], str]] = {
+    "json": serialize_json,
+    "yaml": serialize_yaml,
+}
+
+
+def serialize(value: Any, output_format: str) -> str:
+    """Serialize the result of a native template in an output format"""
+    value = to_data(value)
+
+    try:
+        output = SERIALIZERS[output_format](value)
+    except (TypeError, ValueError, yaml.YAMLError) as exc:
+        # orjson.JSONEncodeError is a subclass of TypeError
+        raise NativeOutputError(output_format, str(exc)) from exc
+
+    return output if output.endswith("\n") else output + "\n"
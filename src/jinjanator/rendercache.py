@@ -0,0 +1,125 @@
+"""
+Content-addressed cache of rendered output
+
+Each cache entry is identified by a key computed from everything which
+is known before rendering starts (the input data, options, the
+customization/filter/test files, and the versions of jinjanator,
+Jinja2 and any plugins). The entry records the templates which were
+loaded while rendering, and the environment variables which were read
+through the 'env' filter/function, so a cached result is only used if
+all of those are unchanged.
+"""
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+
+from collections.abc import Iterator, Mapping
+from pathlib import Path
+from typing import Any
+
+import jinja2
+
+from .filters import environment_reads
+from .renderer import FilePathLoader
+
+
+def digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_digest(path: Path) -> str:
+    return digest(path.read_bytes())
+
+
+def write_json(path: Path, data: Any) -> None:
+    """Write data to a JSON file, by writing it to a temporary file and
+    then renaming it, so that concurrent readers never see a partial file"""
+    with tempfile.NamedTemporaryFile(
+        "w",
+        encoding="utf-8",
+        dir=path.parent,
+        suffix=".tmp",
+        delete=False,
+    ) as f:
+        json.dump(data, f)
+
+    os.replace(f.name, path)  # noqa: PTH105
+
+
+@contextlib.contextmanager
+def record_environment_reads() -> Iterator[set[str]]:
+    """Record the names of environment variables read through the 'env'
+    filter/function in the current thread"""
+    reads: set[str] = set()
+    token = environment_reads.set(reads)
+
+    try:
+        yield reads
+    finally:
+        environment_reads.reset(token)
+
+
+def template_dependencies(env: jinja2.Environment) -> dict[str, str]:
+    """Get the digests of the template files which have been loaded
+    by the environment"""
+    if isinstance(env.loader, FilePathLoader):
+        return dict(env.loader.loaded)
+
+    return {}
+
+
+class RenderCache:
+    def __init__(self, directory: Path):
+        self.directory = directory
+
+    @staticmethod
+    def key(components: Mapping[str, Any]) -> str:
+        """Compute a cache key from a JSON-serializable mapping"""
+        return digest(json.dumps(components, sort_keys=True, default=str).encode("utf-8"))
+
+    def entry_path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def lookup(self, key: str) -> str | None:
+        """Return the cached output for a key, if there is an entry for it
+        and none of the templates or environment variables it depends
+        on have changed"""
+        try:
+            entry = json.loads(self.entry_path(key).read_text(encoding="utf-8"))
+
+            for path, template_digest in entry["dependencies"].items():
+                if file_digest(Path(path)) != template_digest:
+                    return None
+        except (OSError, ValueError, KeyError):
+            return None
+
+        for name, value in entry["environment"].items():
+            if os.environ.get(name) != value:
+                return None
+
+        return str(entry["output"])
+
+    def store(
+        self,
+        key: str,
+        output: str,
+        dependencies: Mapping[str, str],
+        environment: Mapping[str, str | None],
+    ) -> None:
+        """Store the output for a key, along with the digests of the
+        templates and the values of the environment variables it
+        depends on"""
+        path = self.entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        write_json(
+            path,
+            {
+                "dependencies": dict(dependencies),
+                "environment": dict(environment),
+                "output": output,
+            },
+        )
@@ -0,0 +1,463 @@
+import gettext
+import hashlib
+
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from pathlib import Path
+from typing import Any, TextIO, cast
+
+import jinja2
+import jinjanator_plugins
+import pluggy
+
+from jinja2.nativetypes import NativeEnvironment, native_concat
+
+from . import filters as builtin_filters
+from . import formats as builtin_formats
+from .compact import json_default
+from .compressed import compression_for_path, open_compressed
+from .context import read_context_data
+from .customize import CustomizationModule
+from .customize import apply as apply_customizations
+from .indexes import IndexSpec, add_indexes
+from .lazy import LazyGlobal, LazyGlobalsContext
+from .limits import RenderLimits
+from .memoize import CacheInfo, memoize_pure, memoized_functions
+from .native import serialize
+from .specialize import specialize
+from .stats import Stats
+
+
+class FilePathLoader(jinja2.BaseLoader):
+    def __init__(self, cwd: Path, encoding: str = "utf-8"):
+        self.cwd = cwd
+        self.encoding = encoding
+        # digests of the content of the template files which have been loaded
+        self.loaded: dict[str, str] = {}
+
+    def get_source(
+        self,
+        environment: jinja2.Environment,  # noqa: ARG002
+        template_name: str,
+    ) -> tuple[str, str, Callable[[], bool]]:
+        template_path = Path(template_name)
+
+        if not template_path.is_absolute():
+            template_path = self.cwd / template_name
+
+        if not template_path.is_file():
+            raise jinja2.TemplateNotFound(template_name)
+
+        mtime = template_path.stat().st_mtime
+
+        source = template_path.read_bytes()
+
+        self.loaded[str(template_path)] = hashlib.sha256(source).hexdigest()
+
+        return (
+            source.decode(self.encoding),
+            str(template_path),
+            lambda: template_path.stat().st_mtime == mtime,
+        )
+
+
+class Jinja2TemplateRenderer:
+    ENABLED_EXTENSIONS = (
+        "jinja2.ext.i18n",
+        "jinja2.ext.do",
+        "jinja2.ext.loopcontrols",
+        "jinjanator.extensions.OutputExtension",
+        "jinjanator.extensions.CacheExtension",
+    )
+
+    def __init__(  # noqa: PLR0913
+        self,
+        cwd: Path,
+        allow_undefined: bool,  # noqa: FBT001
+        j2_env_params: dict[str, Any],
+        plugin_hook_callers: jinjanator_plugins.PluginHookCallers,
+        limits: RenderLimits | None = None,
+        *,
+        native: bool = False,
+    ):
+        self.limits = limits or RenderLimits()
+
+        # the trailing newline of a native template would turn its result
+        # into a string
+        j2_env_params.setdefault("keep_trailing_newline", not native)
+        j2_env_params.setdefault(
+            "undefined",
+            jinja2.Undefined if allow_undefined else jinja2.StrictUndefined,
+        )
+        j2_env_params.setdefault("extensions", self.ENABLED_EXTENSIONS)
+        j2_env_params.setdefault("loader", FilePathLoader(cwd))
+
+        environment_class = NativeEnvironment if native else jinja2.Environment
+        self.env = environment_class(**j2_env_params, autoescape=False)
+        # resolves lazily evaluated globals (see jinjanator.lazy)
+        self.env.context_class = LazyGlobalsContext
+        # lets 'tojson' serialize compacted data (see jinjanator.compact)
+        self.env.policies["json.dumps_kwargs"] = {
+            "default": json_default,
+            **self.env.policies["json.dumps_kwargs"],
+        }
+
+        for plugin_globals in plugin_hook_callers.plugin_globals():
+            self.env.globals |= memoize_pure(plugin_globals)
+
+        for plugin_filters in plugin_hook_callers.plugin_filters():
+            self.env.filters |= memoize_pure(plugin_filters)
+
+        for plugin_tests in plugin_hook_callers.plugin_tests():
+            self.env.tests |= memoize_pure(plugin_tests)
+
+        for plugin_extensions in plugin_hook_callers.plugin_extensions():
+            for extension in plugin_extensions:
+                self.env.add_extension(extension)
+
+    def generate(self, template: jinja2.Template, context: Mapping[str, Any]) -> Iterator[Any]:
+        """Render a template, enforcing the limits while the output is generated"""
+        chunks = template.generate(context)
+        return self.limits.enforce(chunks) if self.limits else chunks
+
+    def render_template(self, template: jinja2.Template, context: Mapping[str, Any]) -> str:
+        if not self.limits:
+            return template.render(context)
+
+        with self.limits.deadline():
+            return "".join(self.generate(template, context))
+
+    def write_template(
+        self,
+        stream: TextIO,
+        template: jinja2.Template,
+        context: Mapping[str, Any],
+    ) -> None:
+        """Render a template, writing the output to a stream as it is generated"""
+        with self.limits.deadline():
+            stream.writelines(self.generate(template, context))
+
+    def render_native(self, template: jinja2.Template, context: Mapping[str, Any]) -> Any:
+        """Render a native template (see jinjanator.native), returning its result"""
+        with self.limits.deadline():
+            return native_concat(self.generate(template, context))
+
+    def render(self, template_name: str, context: Mapping[str, Any]) -> str:
+        return self.render_template(self.env.get_template(template_name), context)
+
+    def render_to(self, stream: TextIO, template_name: str, context: Mapping[str, Any]) -> None:
+        self.write_template(stream, self.env.get_template(template_name), context)
+
+
+def get_hook_callers() -> jinjanator_plugins.PluginHookCallers:
+    pm = pluggy.PluginManager("jinjanator")
+    pm.add_hookspecs(jinjanator_plugins.PluginHooks)
+    pm.register(builtin_filters)
+    pm.register(builtin_formats)
+    pm.load_setuptools_entrypoints("jinjanator")
+    return cast("jinjanator_plugins.PluginHookCallers", pm.hook)
+
+
+def get_formats(
+    plugin_hook_callers: jinjanator_plugins.PluginHookCallers,
+) -> dict[str, type[jinjanator_plugins.Format]]:
+    available_formats: dict[str, type[jinjanator_plugins.Format]] = {}
+
+    for plugin_formats in plugin_hook_callers.plugin_formats():
+        available_formats |= plugin_formats
+
+    return available_formats
+
+
+class FormatNotFoundError(Exception):
+    def __init__(self, suffix: str):
+        self.suffix = suffix
+        super().__init__(f"No format which can read '{suffix}' files available")
+
+
+def detect_format(
+    data: Path,
+    available_formats: Mapping[str, type[jinjanator_plugins.Format]],
+) -> str:
+    """Determine the format of a data file from its suffix"""
+    suffix = data.suffix
+
+    if compression_for_path(data):
+        # use the suffix of the decompressed file's name
+        suffix = Path(data.stem).suffix
+
+    for k, v in available_formats.items():
+        if v.suffixes and suffix in v.suffixes:
+            return k
+
+    raise FormatNotFoundError(suffix)
+
+
+def validate_format_options(
+    fmt: type[jinjanator_plugins.Format],
+    options: Sequence[str] | None,
+) -> jinjanator_plugins.Format:
+    if options:
+        if not fmt.option_names:
+            raise jinjanator_plugins.FormatOptionUnknownError(fmt, options[0])
+
+        for opt in options:
+            if opt.split("=")[0] not in fmt.option_names:
+                raise jinjanator_plugins.FormatOptionUnknownError(fmt, opt)
+
+    return fmt(options)
+
+
+class Renderer:
+    """Reusable template renderer, for embedding jinjanator in other programs.
+
+    All of the setup work needed for rendering (discovering plugins,
+    loading the customization, filters and tests files, and building
+    the Jinja2 environment) is done once, when the renderer is
+    constructed. Compiled templates are cached in the Jinja2
+    environment, so rendering the same template again does not
+    recompile it.
+
+    The 'render' and 'render_to' methods can be called concurrently
+    from multiple threads (including on free-threaded Python builds),
+    as long as the environment is not modified after construction and
+    any customization/filter/test functions are themselves
+    thread-safe.
+
+    If limits are specified (see jinjanator.limits), a render which
+    exceeds one of them raises RenderLimitExceededError. A time limit
+    is enforced (in the main thread, where available) using an
+    ITIMER_REAL interval timer and a SIGALRM handler, which replace the
+    program's own for the duration of each render; a timer the program
+    has running is restored afterwards (see RenderLimits.deadline).
+
+    If a native output format ('json' or 'yaml') is specified, templates
+    are compiled as native templates (see jinjanator.native): the
+    'render_native' method returns the object a template evaluates to,
+    and 'render' and 'render_to' produce that object serialized in the
+    output format.
+    """
+
+    def __init__(  # noqa: PLR0913
+        self,
+        *,
+        cwd: Path | None = None,
+        allow_undefined: bool = False,
+        customize: str | None = None,
+        filters: Iterable[str] = (),
+        tests: Iterable[str] = (),
+        loader: jinja2.BaseLoader | None = None,
+        indexes: Iterable[IndexSpec] = (),
+        limits: RenderLimits | None = None,
+        native_output: str | None = None,
+        plugin_hook_callers: jinjanator_plugins.PluginHookCallers | None = None,
+        stats: Stats | None = None,
+    ):
+        self.stats = stats or Stats()
+        self.limits = limits or RenderLimits()
+        self.native_output = native_output
+
+        with self.stats.phase("plugin discovery"):
+            self.plugin_hook_callers = plugin_hook_callers or get_hook_callers()
+            self.plugin_identities = list(self.plugin_hook_callers.plugin_identities())
+            self.formats = get_formats(self.plugin_hook_callers)
+
+        with self.stats.phase("customization load"):
+            self.customizations = CustomizationModule.from_file(customize)
+
+            self.indexes = [
+                *indexes,
+                *(
+                    IndexSpec.from_definition(name, definition)
+                    for name, definition in self.customizations.context_indexes().items()
+                ),
+            ]
+
+        with self.stats.phase("environment construction"):
+            j2_env_params = self.customizations.j2_environment_params()
+
+            if loader is not None:
+                j2_env_params["loader"] = loader
+
+            self.template_renderer = Jinja2TemplateRenderer(
+                cwd or Path.cwd(),
+                allow_undefined,
+                j2_env_params=j2_env_params,
+                plugin_hook_callers=self.plugin_hook_callers,
+                limits=self.limits,
+                native=native_output is not None,
+            )
+
+            self.env = self.template_renderer.env
+
+            apply_customizations(
+                self.customizations,
+                self.env,
+                filters=list(filters),
+                tests=list(tests),
+            )
+
+    def cache_info(self) -> dict[str, CacheInfo]:
+        """Report cache statistics for memoized (pure) filters, tests and
+        globals, and for cached fragments ('cache' blocks and memoized
+        macros)"""
+        info = {name: func.cache_info() for name, func in memoized_functions(self.env).items()}
+
+        if (fragments := getattr(self.env, "jinjanator_fragment_cache", None)) is not None:
+            info["fragment"] = fragments.cache_info()
+
+        return info
+
+    def clear_caches(self) -> None:
+        """Discard cached results of memoized (pure) filters, tests and
+        globals, cached fragments (except those stored on disk) and the
+        values of lazily evaluated globals"""
+        for func in memoized_functions(self.env).values():
+            func.cache_clear()
+
+        for value in self.env.globals.values():
+            if isinstance(value, LazyGlobal):
+                value.reset()
+
+        if (fragments := getattr(self.env, "jinjanator_fragment_cache", None)) is not None:
+            fragments.cache_clear()
+
+    def load_context(  # noqa: PLR0913
+        self,
+        f: TextIO,
+        data_format: str,
+        format_options: Sequence[str] | None = None,
+        environ: Mapping[str, str] | None = None,
+        import_env: str | None = None,
+        *,
+        data_path: str | None = None,
+        compact: bool = False,
+    ) -> Mapping[str, Any]:
+        """Parse data from a stream into a context, using one of the available formats
+
+        If a data path is specified, only the subtree it selects is used;
+        if 'compact' is true, the data is stored in a compact form (see
+        jinjanator.compact).
+        """
+        fmt = validate_format_options(self.formats[data_format], format_options)
+
+        return read_context_data(
+            fmt,
+            f,
+            environ or {},
+            import_env,
+            data_path,
+            compact=compact,
+        )
+
+    def load_data_file(  # noqa: PLR0913
+        self,
+        path: Path,
+        data_format: str | None = None,
+        format_options: Sequence[str] | None = None,
+        environ: Mapping[str, str] | None = None,
+        import_env: str | None = None,
+        *,
+        data_path: str | None = None,
+        compact: bool = False,
+    ) -> Mapping[str, Any]:
+        """Parse a (possibly compressed) data file into a context
+
+        If no format is specified, it is determined from the file's suffix.
+        """
+        data_format = data_format or detect_format(path, self.formats)
+
+        with open_compressed(path, "r", compression_for_path(path)) as f:
+            return self.load_context(
+                f,
+                data_format,
+                format_options,
+                environ,
+                import_env,
+                data_path=data_path,
+                compact=compact,
+            )
+
+    def install_translations(self, translations: gettext.NullTranslations) -> None:
+        """Install the translations to be used by the 'i18n' extension in
+        subsequent renders; compiled templates are not affected, so a
+        template can be rendered for many locales by installing each
+        locale's translations in turn"""
+        self.env.install_gettext_translations(translations)  # type: ignore[attr-defined]
+
+    def prepare_context(self, context: Mapping[str, Any]) -> Mapping[str, Any]:
+        """Apply the 'alter_context' customization to a copy of the
+        context, then add the indexes (see jinjanator.indexes) to it"""
+        with self.stats.phase("alter context"):
+            context = self.customizations.alter_context(dict(context))
+
+        if self.indexes:
+            with self.stats.phase("index building"):
+                context = add_indexes(context, self.indexes)
+
+        return context
+
+    def get_template(self, template_name: str | jinja2.Template) -> jinja2.Template:
+        """Load (and compile, if not already cached) a template"""
+        with self.stats.phase("template load"):
+            return self.env.get_template(template_name)
+
+    def specialize(self, template_name: str, static: Mapping[str, Any]) -> jinja2.Template:
+        """Compile a template with a static context folded into it (see
+        jinjanator.specialize); the result can be passed to 'render' and
+        'render_to' instead of a template name, along with the dynamic
+        context for each render"""
+        with self.stats.phase("template specialization"):
+            return specialize(self.env, template_name, static)
+
+    def render(self, template_name: str | jinja2.Template, context: Mapping[str, Any]) -> str:
+        """Render a template, returning the output as a string"""
+        if self.native_output is not None:
+            return self.serialize(self.render_native(template_name, context))
+
+        template = self.get_template(template_name)
+        context = self.prepare_context(context)
+
+        with self.stats.phase("render"):
+            return self.template_renderer.render_template(template, context)
+
+    def render_native(
+        self,
+        template_name: str | jinja2.Template,
+        context: Mapping[str, Any],
+    ) -> Any:
+        """Render a native template, returning the object it evaluates to
+        (only available if a native output format was specified)"""
+        if self.native_output is None:
+            msg = "render_native() requires a native output format"
+            raise RuntimeError(msg)
+
+        template = self.get_template(template_name)
+        context = self.prepare_context(context)
+
+        with self.stats.phase("render"):
+            return self.template_renderer.render_native(template, context)
+
+    def serialize(self, value: Any) -> str:
+        """Serialize the result of a native template in the native output format"""
+        with self.stats.phase("serialization"):
+            output = serialize(value, cast("str", self.native_output))
+
+        self.limits.check_output(output)
+        return output
+
+    def render_to(
+        self,
+        stream: TextIO,
+        template_name: str | jinja2.Template,
+        context: Mapping[str, Any],
+    ) -> None:
+        """Render a template, writing the output to a stream as it is generated"""
+        if self.native_output is not None:
+            stream.write(self.serialize(self.render_native(template_name, context)))
+            return
+
+        template = self.get_template(template_name)
+        context = self.prepare_context(context)
+
+        with self.stats.phase("render"):
+            self.template_renderer.write_template(stream, template, context)
@@ -0,0 +1,162 @@
+"""
+Line-delimited JSON request protocol, for the '--stdio-server' mode
+
+A long-lived process reads requests from stdin, one JSON object per
+line, each describing a render; the response to each request is
+written to stdout as one JSON object per line. Every request is
+handled by the same renderer, so plugin discovery, loading of the
+customizations and construction of the Jinja2 environment happen
+once, and compiled templates are reused by later requests.
+"""
+
+import json
+
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import Any
+
+from attrs import define
+
+from .compressed import open_output
+from .context import import_environment, parse_data_path, select_data_path
+from .renderer import Renderer
+
+
+class RequestError(ValueError):
+    pass
+
+
+# request fields, with their types and the RenderRequest attributes they set
+REQUEST_FIELDS: dict[str, tuple[type, str]] = {
+    "id": (object, "request_id"),
+    "template": (str, "template"),
+    "context": (dict, "context"),
+    "data": (str, "data"),
+    "format": (str, "data_format"),
+    "format_options": (list, "format_options"),
+    "data_path": (str, "data_path"),
+    "import_env": (str, "import_env"),
+    "output": (str, "output"),
+}
+
+
+@define(frozen=True, kw_only=True)
+class RenderRequest:
+    """A request to render 'template', with either an inline 'context' or
+    the content of a 'data' file, writing the output to the 'output'
+    file or returning it in the response"""
+
+    template: str
+    request_id: Any = None
+    context: Mapping[str, Any] | None = None
+    data: str | None = None
+    data_format: str | None = None
+    format_options: Sequence[str] = ()
+    data_path: str | None = None
+    import_env: str | None = None
+    output: str | None = None
+
+    @classmethod
+    def from_json(cls, line: str) -> "RenderRequest":
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as exc:
+            msg = f"Request is not valid JSON: {exc}"
+            raise RequestError(msg) from exc
+
+        if not isinstance(request, dict):
+            msg = "Request is not a JSON object"
+            raise RequestError(msg)
+
+        attributes: dict[str, Any] = {}
+
+        for name, value in request.items():
+            if name not in REQUEST_FIELDS:
+                msg = f"Unknown request field '{name}'"
+                raise RequestError(msg)
+
+            field_type, attribute = REQUEST_FIELDS[name]
+
+            if value is None:
+                continue
+
+            valid = isinstance(value, field_type)
+
+            if name == "format_options":
+                valid = valid and all(isinstance(opt, str) for opt in value)
+
+            if not valid:
+                msg = f"Request field '{name}' has the wrong type"
+                raise RequestError(msg)
+
+            attributes[attribute] = value
+
+        if "template" not in attributes:
+            msg = "Request has no 'template'"
+            raise RequestError(msg)
+
+        if ("context" in attributes) == ("data" in attributes):
+            msg = "Request must have either 'context' or 'data'"
+            raise RequestError(msg)
+
+        return cls(**attributes)
+
+    @staticmethod
+    def request_id_of(line: str) -> Any:
+        """Find the 'id' of a request, if possible, for the response to a
+        request which could not be parsed"""
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError:
+            return None
+
+        return request.get("id") if isinstance(request, dict) else None
+
+
+def load_context(
+    renderer: Renderer,
+    cwd: Path,
+    environ: Mapping[str, str],
+    request: RenderRequest,
+) -> Mapping[str, Any]:
+    if request.data is not None:
+        return renderer.load_data_file(
+            cwd / request.data,
+            request.data_format,
+            request.format_options,
+            environ,
+            request.import_env,
+            data_path=request.data_path,
+        )
+
+    context = dict(request.context or {})
+
+    if request.data_path is not None:
+        context = dict(select_data_path(context, parse_data_path(request.data_path)))
+
+    return import_environment(context, environ, request.import_env)
+
+
+def handle_request(
+    renderer: Renderer,
+    cwd: Path,
+    environ: Mapping[str, str],
+    request: RenderRequest,
+) -> str | None:
+    """Perform a render, returning the output (or 'None', if it was
+    written to the request's output file)"""
+    context = load_context(renderer, cwd, environ, request)
+
+    if request.output is None:
+        return renderer.render(request.template, context)
+
+    output = cwd / request.output
+
+    with open_output(output, None) as f:
+        renderer.render_to(f, request.template, context)
+
+    return None
+
+
+def response(request_id: Any, status: int, **fields: Any) -> str:
+    return json.dumps({"id": request_id, "status": status, **fields}) + "\n"
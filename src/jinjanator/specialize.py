@@ -0,0 +1,142 @@
+"""
+Partial evaluation: specialize templates against static data
+
+When a template is rendered many times with a large context which
+does not change between renders (site-wide data) plus a small one
+which does (per-host data), the static part can be folded into the
+template when it is compiled. References to static variables are
+replaced by their values, and Jinja2's optimizer then evaluates every
+expression, condition and output which depends only on static data
+once, at compile time; each render only evaluates the dynamic parts.
+"""
+
+from collections.abc import Iterable, Iterator, Mapping
+from typing import Any, cast
+
+import jinja2
+
+from jinja2 import nodes
+from jinja2.compiler import has_safe_repr
+from jinja2.optimizer import optimize
+from jinja2.visitor import NodeTransformer
+
+
+# names which have special meanings in templates, and are never replaced
+RESERVED_NAMES = frozenset({"caller", "kwargs", "loop", "self", "super", "varargs"})
+
+# prefix of the names of the globals holding containers from the static
+# variables which are referenced by the compiled template
+STATIC_GLOBAL_PREFIX = "__jinjanator_static_"
+
+
+def assigned_names(template: nodes.Template) -> set[str]:
+    """Find the names which are assigned anywhere in a template (by 'set',
+    'for', 'with', macro parameters, imports, etc.), since references to
+    them cannot be replaced by static values"""
+    names = {node.name for node in template.find_all(nodes.Name) if node.ctx in ("store", "param")}
+
+    for node in template.find_all((nodes.Import, nodes.FromImport, nodes.Macro)):
+        if isinstance(node, nodes.Import):
+            names.add(node.target)
+        elif isinstance(node, nodes.FromImport):
+            names.update(name if isinstance(name, str) else name[1] for name in node.names)
+        elif isinstance(node, nodes.Macro):
+            names.add(node.name)
+
+    return names
+
+
+class StaticNameReplacer(NodeTransformer):
+    """Replace references to static variables with their values"""
+
+    def __init__(self, static: Mapping[str, Any], excluded: set[str]):
+        self.static = static
+        self.excluded = excluded
+
+    def visit_Name(self, node: nodes.Name) -> nodes.Node:  # noqa: N802
+        if node.ctx == "load" and node.name in self.static and node.name not in self.excluded:
+            return nodes.Const(self.static[node.name], lineno=node.lineno)
+
+        return node
+
+
+def container_ids(value: Any, ids: set[int] | None = None) -> set[int]:
+    """Find the identities of all of the containers within a value"""
+    if ids is None:
+        ids = set()
+
+    if isinstance(value, str | bytes) or id(value) in ids:
+        return ids
+
+    if isinstance(value, Mapping):
+        ids.add(id(value))
+        for item in value.values():
+            container_ids(item, ids)
+    elif isinstance(value, Iterable) and not isinstance(value, Iterator):
+        ids.add(id(value))
+        for item in value:
+            container_ids(item, ids)
+
+    return ids
+
+
+class StaticValueExtractor(NodeTransformer):
+    """Replace constants holding containers from the static variables
+    (or values which cannot be represented as literals) with references
+    to globals holding them, so they are not rebuilt on every render"""
+
+    def __init__(self, static: Mapping[str, Any]):
+        self.static_ids = container_ids(static)
+        self.values: dict[str, Any] = {}
+        self.names: dict[int, str] = {}
+
+    def visit_Const(self, node: nodes.Const) -> nodes.Node:  # noqa: N802
+        value = node.value
+
+        if id(value) not in self.static_ids and has_safe_repr(value):
+            return node
+
+        if (name := self.names.get(id(value))) is None:
+            name = f"{STATIC_GLOBAL_PREFIX}{len(self.values)}"
+            self.names[id(value)] = name
+            self.values[name] = value
+
+        return nodes.Name(name, "load", lineno=node.lineno)
+
+
+def specialize(
+    env: jinja2.Environment,
+    template_name: str,
+    static: Mapping[str, Any],
+) -> jinja2.Template:
+    """Compile a template with the static variables folded into it
+
+    The resulting template is rendered with only the dynamic variables
+    (though the static variables are also available as globals of the
+    template, for use by any templates it includes, imports or
+    extends). Variables in the dynamic context must not have the same
+    names as variables in the static context.
+    """
+    if env.loader is None:
+        msg = "no loader for this environment specified"
+        raise TypeError(msg)
+
+    source, filename, _ = env.loader.get_source(env, template_name)
+
+    template = env.parse(source, template_name, filename)
+
+    excluded = assigned_names(template) | RESERVED_NAMES
+
+    ast = StaticNameReplacer(static, excluded).visit(template)
+    ast = optimize(ast, env)
+
+    extractor = StaticValueExtractor(static)
+    ast = extractor.visit(ast)
+
+    code = env.compile(cast("nodes.Template", ast), template_name, filename)
+
+    return env.template_class.from_code(
+        env,
+        code,
+        env.make_globals({**static, **extractor.values}),
+    )
@@ -0,0 +1,177 @@
+"""
+Phase timing and counters, reported by the '--stats' option
+"""
+
+import json
+import threading
+import time
+
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any, BinaryIO, TextIO
+
+from attrs import define, field
+
+
+@define
+class PhaseTime:
+    wall: float = 0.0
+    cpu: float = 0.0
+
+
+@define
+class _ActivePhase:
+    name: str
+    wall_start: float
+    cpu_start: float
+
+
+@define
+class Stats:
+    """Collects wall-clock and CPU time spent in named phases, and named counters
+
+    Phases can be nested; time spent in a nested phase is only
+    attributed to that phase, not to the phase which encloses it.
+    Each thread has its own stack of active phases.
+    """
+
+    phases: dict[str, PhaseTime] = field(factory=dict)
+    counters: dict[str, int] = field(factory=dict)
+    _local: threading.local = field(factory=threading.local)
+    _lock: threading.Lock = field(factory=threading.Lock)
+
+    def _stack(self) -> list[_ActivePhase]:
+        try:
+            stack: list[_ActivePhase] = self._local.stack
+        except AttributeError:
+            stack = self._local.stack = []
+        return stack
+
+    def _accumulate(self, active: _ActivePhase, wall: float, cpu: float) -> None:
+        with self._lock:
+            phase = self.phases.setdefault(active.name, PhaseTime())
+            phase.wall += wall - active.wall_start
+            phase.cpu += cpu - active.cpu_start
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        stack = self._stack()
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+
+        if stack:
+            self._accumulate(stack[-1], wall, cpu)
+
+        stack.append(_ActivePhase(name, wall, cpu))
+
+        try:
+            yield
+        finally:
+            wall = time.perf_counter()
+            cpu = time.thread_time()
+            self._accumulate(stack.pop(), wall, cpu)
+
+            if stack:
+                stack[-1].wall_start = wall
+                stack[-1].cpu_start = cpu
+
+    def count(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "phases": {
+                name: {"wall": phase.wall, "cpu": phase.cpu} for name, phase in self.phases.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+    def report(self, stream: TextIO, report_format: str = "text") -> None:
+        if report_format == "json":
+            json.dump(self.as_dict(), stream, indent=2)
+            print(file=stream)
+            return
+
+        width = max((len(name) for name in self.phases), default=0)
+        print(f"{'phase':<{width}}  {'wall (s)':>10}  {'cpu (s)':>10}", file=stream)
+        for name, phase in self.phases.items():
+            print(f"{name:<{width}}  {phase.wall:>10.6f}  {phase.cpu:>10.6f}", file=stream)
+        print(
+            f"{'total':<{width}}"
+            f"  {sum(phase.wall for phase in self.phases.values()):>10.6f}"
+            f"  {sum(phase.cpu for phase in self.phases.values()):>10.6f}",
+            file=stream,
+        )
+
+        for name, value in self.counters.items():
+            print(f"{name}: {value}", file=stream)
+
+
+class CountingReader:
+    """Text stream wrapper which counts the bytes (as UTF-8) read from the stream"""
+
+    def __init__(self, stream: TextIO, stats: Stats, counter: str = "bytes read"):
+        self.stream = stream
+        self.stats = stats
+        self.counter = counter
+
+    def read(self, size: int = -1) -> str:
+        data = self.stream.read(size)
+        self.stats.count(self.counter, len(data.encode("utf-8")))
+        return data
+
+    @property
+    def buffer(self) -> "CountingBinaryReader":
+        """The underlying binary stream (used by the incremental JSON parser),
+        wrapped so that the bytes read from it are counted as well"""
+        return CountingBinaryReader(self.stream.buffer, self.stats, self.counter)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.stream, name)
+
+
+class CountingBinaryReader:
+    """Binary stream wrapper which counts the bytes read from the stream"""
+
+    def __init__(self, stream: BinaryIO, stats: Stats, counter: str = "bytes read"):
+        self.stream = stream
+        self.stats = stats
+        self.counter = counter
+
+    def read(self, size: int = -1) -> bytes:
+        data = self.stream.read(size)
+        self.stats.count(self.counter, len(data))
+        return data
+
+    def readinto(self, buffer: bytearray | memoryview) -> int:
+        # used by the C backend of 'ijson' instead of 'read'
+        size = self.stream.readinto(buffer)  # type: ignore[attr-defined]
+        self.stats.count(self.counter, size)
+        return int(size)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.stream, name)
+
+
+class CountingWriter:
+    """Text stream wrapper which counts the bytes (as UTF-8) written to the stream,
+    and records the time spent writing as the 'output write' phase"""
+
+    def __init__(self, stream: TextIO, stats: Stats, counter: str = "bytes written"):
+        self.stream = stream
+        self.stats = stats
+        self.counter = counter
+
+    def write(self, data: str) -> int:
+        with self.stats.phase("output write"):
+            result = self.stream.write(data)
+        self.stats.count(self.counter, len(data.encode("utf-8")))
+        return result
+
+    def writelines(self, lines: Any) -> None:
+        for line in lines:
+            self.write(line)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.stream, name)
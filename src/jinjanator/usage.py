@@ -0,0 +1,173 @@
+"""
+Reporting the parts of the context data which are never used
+
+While a template is rendered, every key read from the context data is
+recorded, by replacing the mappings in the data with dictionaries
+which record the keys read from them. Keys are identified by dotted
+paths, with '[]' standing for every item of a list: 'hosts[].address'
+is the 'address' key of the items in the 'hosts' list, and is used if
+it is read from any of them. Operations which read all of a mapping's
+keys (iterating over it, 'items()', 'values()', converting it to a
+string, etc.) mark all of them as used.
+
+The report lists the keys which were never read, with an estimate of
+the space each of them occupies in the data (the size of the key and
+its value when serialized as compact JSON, summed over all of the
+items of any lists the key is in).
+"""
+
+import json
+
+from collections.abc import Iterator, Mapping, Sequence
+from typing import Any, TextIO
+
+
+# suffix added to a mapping's path to indicate that all of its keys were read
+ALL_KEYS = ".*"
+
+
+class TrackedDict(dict[Any, Any]):
+    """Dictionary which records the keys read from it"""
+
+    # the names start with underscores, since Jinja2 tries attribute
+    # lookups (which would find these) before item lookups
+    __slots__ = ("_usage_path", "_usage_used")
+
+    def __init__(self, items: Mapping[Any, Any], path: str, used: set[str]):
+        super().__init__(items)
+        self._usage_path = path
+        self._usage_used = used
+
+    def _read(self, key: Any) -> None:
+        self._usage_used.add(f"{self._usage_path}.{key}")
+
+    def _read_all(self) -> None:
+        self._usage_used.add(f"{self._usage_path}{ALL_KEYS}")
+
+    def __getitem__(self, key: Any) -> Any:
+        self._read(key)
+        return super().__getitem__(key)
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        self._read(key)
+        return super().get(key, default)
+
+    def __contains__(self, key: object) -> bool:
+        self._read(key)
+        return super().__contains__(key)
+
+    def __iter__(self) -> Iterator[Any]:
+        self._read_all()
+        return super().__iter__()
+
+    def keys(self) -> Any:
+        self._read_all()
+        return super().keys()
+
+    def values(self) -> Any:
+        self._read_all()
+        return super().values()
+
+    def items(self) -> Any:
+        self._read_all()
+        return super().items()
+
+    def __repr__(self) -> str:
+        self._read_all()
+        return super().__repr__()
+
+
+def is_list(value: Any) -> bool:
+    return isinstance(value, Sequence) and not isinstance(value, str | bytes)
+
+
+class ContextUsage:
+    """Records which keys of the context data are read"""
+
+    def __init__(self) -> None:
+        self.used: set[str] = set()
+
+    def _track(self, value: Any, path: str) -> Any:
+        if isinstance(value, Mapping):
+            return TrackedDict(
+                {k: self._track(v, f"{path}.{k}") for k, v in value.items()},
+                path,
+                self.used,
+            )
+
+        if is_list(value):
+            return [self._track(item, f"{path}[]") for item in value]
+
+        return value
+
+    def track(self, context: Mapping[str, Any]) -> dict[str, Any]:
+        """Make a copy of the context in which the keys read from the
+        mappings within it are recorded
+
+        Reads of the top-level keys (the names of context variables) are
+        not recorded by the copy, and must be added to 'used' separately
+        (see jinjanator.incremental.record_context_access).
+        """
+        return {k: self._track(v, str(k)) for k, v in context.items()}
+
+    def unused(self, context: Mapping[str, Any]) -> dict[str, int]:
+        """Find the keys in the (original) context data which were not
+        read, with the estimated size of each of them"""
+        unused: dict[str, int] = {}
+        self._find_unused(context, "", unused)
+        return dict(sorted(unused.items(), key=lambda item: (-item[1], item[0])))
+
+    def _find_unused(self, value: Any, path: str, unused: dict[str, int]) -> None:
+        if isinstance(value, Mapping):
+            all_used = f"{path}{ALL_KEYS}" in self.used
+
+            for k, v in value.items():
+                key_path = f"{path}.{k}" if path else str(k)
+
+                if all_used or key_path in self.used:
+                    self._find_unused(v, key_path, unused)
+                else:
+                    unused[key_path] = unused.get(key_path, 0) + serialized_size(k, v)
+        elif is_list(value):
+            for item in value:
+                self._find_unused(item, f"{path}[]", unused)
+
+
+def plain(value: Any) -> Any:
+    """Convert a value to plain dictionaries and lists, so it can be
+    serialized as JSON (even if it was stored in a compact form)"""
+    if isinstance(value, Mapping):
+        return {str(k): plain(v) for k, v in value.items()}
+
+    if is_list(value):
+        return [plain(item) for item in value]
+
+    return value
+
+
+def serialized_size(key: Any, value: Any) -> int:
+    """Estimate the size of a key and its value in the data"""
+    serialized = json.dumps(
+        {str(key): plain(value)},
+        ensure_ascii=False,
+        default=str,
+        separators=(",", ":"),
+    )
+    # without the enclosing braces, but with a separating comma
+    return len(serialized.encode("utf-8")) - 1
+
+
+def write_report(f: TextIO, context: Mapping[str, Any], usage: ContextUsage) -> None:
+    """Write a JSON report of the keys in the context data which were not used"""
+    unused = usage.unused(context)
+
+    json.dump(
+        {
+            "data_bytes": sum(serialized_size(k, v) for k, v in context.items()),
+            "unused_bytes": sum(unused.values()),
+            "unused": [{"key": key, "bytes": size} for key, size in unused.items()],
+        },
+        f,
+        indent=2,
+    )
+    f.write("\n")
@@ -14,6 +14,9 @@ class FilePair:
 
 FilePairFactory = Callable[[str, str, str], FilePair]
 
+# maps template names (paths relative to the tree) to their content
+TemplateTreeFactory = Callable[[Mapping[str, str]], Path]
+
 
 def render_file(
     files: FilePair,
@@ -1,8 +1,9 @@
+from collections.abc import Mapping
 from pathlib import Path
 
 import pytest
 
-from . import FilePair, FilePairFactory
+from . import FilePair, FilePairFactory, TemplateTreeFactory
 
 
 @pytest.fixture
@@ -19,3 +20,16 @@ def make_file_pair(tmp_path: Path) -> FilePairFactory:
         return FilePair(template_file=template_file, data_file=data_file)
 
     return _make_file_pair
+
+
+@pytest.fixture
+def make_template_tree(tmp_path: Path) -> TemplateTreeFactory:
+    def _make_template_tree(templates: Mapping[str, str]) -> Path:
+        tree = tmp_path / "templates"
+        for name, content in templates.items():
+            template_file = tree / name
+            template_file.parent.mkdir(parents=True, exist_ok=True)
+            template_file.write_text(content)
+        return tree
+
+    return _make_template_tree
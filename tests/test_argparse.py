@@ -43,6 +43,32 @@ def test_invalid_arg() -> None:
         ["--customize", "customize.py"],
         ["--filters", "filename.py"],
         ["--tests", "filename.py"],
+        ["--template-bundle", "bundle.zip"],
+        ["--stats=json"],
+        ["--stats-file", "stats.txt"],
+        ["--report-context-usage", "usage.json"],
+        ["--compress", "gzip"],
+        ["--native-output", "json"],
+        ["--output-root", "out/"],
+        ["--write-if-changed"],
+        ["--fan-out", "data/"],
+        ["--output-pattern", "{stem}.out"],
+        ["--jobs", "2"],
+        ["--max-render-seconds", "60"],
+        ["--max-output-bytes", "1G"],
+        ["--max-memory", "512M"],
+        ["-j", "2"],
+        ["--data-path", "services.web"],
+        ["--compact-context"],
+        ["--index", "hosts_by_name=hosts:name"],
+        ["--render-cache", "cache/"],
+        ["--fragment-cache", "fragments/"],
+        ["--incremental", "state/"],
+        ["--static-data", "site.yaml"],
+        ["--template-archive", "templates.zip"],
+        ["--locale-dir", "locale/"],
+        ["--locale", "de"],
+        ["--gettext-domain", "site"],
     ],
 )
 def test_args(args: list[str]) -> None:
@@ -0,0 +1,83 @@
+from typing import Any
+
+import pytest
+
+from jinjanator.bulk import FILTERS, key_getter
+from jinjanator.renderer import Renderer
+
+
+HOSTS = [
+    {"name": "web1", "dc": "east", "cores": 4, "site": {"city": "Boston"}},
+    {"name": "web2", "dc": "west", "cores": 8, "site": {"city": "Seattle"}},
+    {"name": "db1", "dc": "east", "cores": 16, "site": {"city": "Boston"}},
+]
+
+DATACENTERS = [{"name": "east", "power": "grid"}, {"name": "north", "power": "solar"}]
+
+
+@pytest.fixture(scope="module")
+def renderer() -> Renderer:
+    return Renderer()
+
+
+def render(renderer: Renderer, source: str) -> str:
+    template = renderer.env.from_string(source)
+    return template.render(hosts=HOSTS, dcs=DATACENTERS)
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        ('{{ (hosts|index_by("name"))["db1"].cores }}', "16"),
+        ('{{ (hosts|index_by("site.city")).Seattle.name }}', "web2"),
+        (
+            (
+                '{% for dc, members in hosts|group_by_key("dc")|items %}'
+                "{{ dc }}={{ members|map(attribute='name')|join(',') }};{% endfor %}"
+            ),
+            "east=web1,db1;west=web2;",
+        ),
+        ('{{ hosts|unique_by("dc")|map(attribute="name")|join(",") }}', "web1,web2"),
+        ('{{ hosts|count_by("site.city") }}', "{'Boston': 2, 'Seattle': 1}"),
+        (
+            (
+                '{% for host, dc in hosts|join_on(dcs, "dc", "name") %}'
+                "{{ host.name }}:{{ dc.power }};{% endfor %}"
+            ),
+            "web1:grid;db1:grid;",
+        ),
+        (
+            (
+                '{% for host, dc in hosts|join_on(dcs, "dc", "name", outer=true) %}'
+                "{{ host.name }}:{{ dc.power if dc else '-' }};{% endfor %}"
+            ),
+            "web1:grid;web2:-;db1:grid;",
+        ),
+        ('{{ hosts|sum_by("dc", "cores") }}', "{'east': 20, 'west': 8}"),
+        (
+            '{{ (hosts|aggregate_by("dc", "cores")).east }}',
+            "{'count': 2, 'sum': 20, 'min': 4, 'max': 16, 'mean': 10.0}",
+        ),
+    ],
+)
+def test_filters(renderer: Renderer, source: str, expected: str) -> None:
+    assert expected == render(renderer, source)
+
+
+def test_filters_only(renderer: Renderer) -> None:
+    for name in FILTERS:
+        assert name in renderer.env.filters
+        assert name not in renderer.env.globals
+
+
+class Item:
+    def __init__(self, **kwargs: Any):
+        self.__dict__.update(kwargs)
+
+
+def test_key_getter() -> None:
+    assert 3 == key_getter("a.b")({"a": Item(b=3)})  # noqa: PLR2004
+    with pytest.raises(KeyError, match=r"item has no 'a\.c'"):
+        key_getter("a.c")({"a": Item(b=3)})
+    with pytest.raises(KeyError, match="item has no 'items'"):
+        key_getter("items")({})
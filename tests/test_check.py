@@ -0,0 +1,90 @@
+import json
+
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+import jinjanator.cli
+
+from . import TemplateTreeFactory
+
+
+TEMPLATES = {
+    "good.j2": '{% include "sub/part.j2" %}{{ name|env }}{% do [] %}',
+    "sub/part.j2": "{{ name|shout }}",
+    "syntax.j2": "{% for x in y %}{{ x }}",
+    "filter.j2": "{{ name|no_such_filter }}",
+    "test.j2": "{{ name is no_such_test }}",
+    "deferred.j2": (
+        "{% if name %}\n{{ name|if_filter }}{% endif %}\n"
+        "{% if name is if_test %}{% endif %}\n"
+        '{% if "maybe" is filter %}{{ name|maybe }}{% endif %}'
+    ),
+    "mixed.j2": (
+        "{{ name|outside1 }}\n{{ name|outside2 }}\n{% if name %}{{ name|inside }}{% endif %}"
+    ),
+    "README": "{{ this is not a template",
+}
+
+
+@pytest.fixture
+def tree(tmp_path: Path, make_template_tree: TemplateTreeFactory) -> Path:
+    (tmp_path / "filters.py").write_text("def shout(value):\n    return value.upper()\n")
+    return make_template_tree(TEMPLATES)
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_check(tmp_path: Path, tree: Path, capsys: Any, jobs: str) -> None:
+    report = tmp_path / "report.json"
+    assert 1 == jinjanator.cli.main(
+        [
+            "",
+            "check",
+            "--suffix",
+            ".j2",
+            "--filters",
+            str(tmp_path / "filters.py"),
+            "--jobs",
+            jobs,
+            "--report",
+            str(report),
+            str(tree),
+        ],
+    )
+    err = capsys.readouterr().err
+    assert "Checked 7 templates, 8 errors" in err
+    assert "syntax.j2:1: TemplateSyntaxError: Unexpected end of template." in err
+    assert "deferred.j2:2: TemplateAssertionError: No filter named 'if_filter'." in err
+    assert "deferred.j2:3: TemplateAssertionError: No test named 'if_test'." in err
+    assert "mixed.j2:1: TemplateAssertionError: No filter named 'outside1'." in err
+    assert "mixed.j2:2: TemplateAssertionError: No filter named 'outside2'." in err
+    assert "mixed.j2:3: TemplateAssertionError: No filter named 'inside'." in err
+
+    result = json.loads(report.read_text())
+    assert 7 == result["templates"]  # noqa: PLR2004
+    assert 5 == result["failed"]  # noqa: PLR2004
+    assert [
+        ("deferred.j2", "TemplateAssertionError", "No filter named 'if_filter'."),
+        ("deferred.j2", "TemplateAssertionError", "No test named 'if_test'."),
+        ("filter.j2", "TemplateAssertionError", "No filter named 'no_such_filter'."),
+        ("mixed.j2", "TemplateAssertionError", "No filter named 'inside'."),
+        ("mixed.j2", "TemplateAssertionError", "No filter named 'outside1'."),
+        ("mixed.j2", "TemplateAssertionError", "No filter named 'outside2'."),
+        ("syntax.j2", "TemplateSyntaxError", "Unexpected end of template."),
+        ("test.j2", "TemplateAssertionError", "No test named 'no_such_test'."),
+    ] == sorted(
+        (failure["template"], failure["error"], failure["message"].split(" Jinja")[0])
+        for failure in result["failures"]
+    )
+
+
+def test_check_success(tmp_path: Path, tree: Path) -> None:
+    assert None is jinjanator.cli.main(
+        ["", "check", "--quiet", "--filters", str(tmp_path / "filters.py"), str(tree / "sub")],
+    )
+
+
+def test_missing_template_dir(tmp_path: Path, capsys: Any) -> None:
+    assert 1 == jinjanator.cli.main(["", "check", str(tmp_path / "missing")])
+    assert "does not exist" in capsys.readouterr().err
@@ -1,5 +1,6 @@
 from typing import Any
 
+import jinja2
 import pytest
 
 import jinjanator.cli
@@ -84,3 +85,8 @@ def test_main_format_option_value_error(make_file_pair: FilePairFactory) -> None
     assert 4 == jinjanator.cli.main(  # noqa: PLR2004
         ["", "--format-option", "val", str(files.template_file), str(files.data_file)],
     )
+
+
+def test_renderer_classes_importable_from_cli() -> None:
+    assert "jinja2.ext.do" in jinjanator.cli.Jinja2TemplateRenderer.ENABLED_EXTENSIONS
+    assert issubclass(jinjanator.cli.FilePathLoader, jinja2.BaseLoader)
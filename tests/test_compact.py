@@ -0,0 +1,84 @@
+import pytest
+
+from jinjanator.compact import Record, RecordList, compact_context
+
+from . import (
+    FilePairFactory,
+    render_file,
+)
+
+
+HOSTS_YAML = """\
+domain: example.com
+hosts:
+  - name: web1
+    role: web
+    tags: [a, b]
+  - name: web2
+    role: web
+    tags: [b]
+  - name: db1
+    role: db
+    tags: []
+mixed:
+  - name: x
+  - id: 1
+"""
+
+
+def test_compact_context() -> None:
+    context = compact_context(
+        {
+            "hosts": [{"name": "web1", "role": "web"}, {"name": "db1", "role": "db"}],
+            "mixed": [{"name": "x"}, {"id": 1}, 3],
+            "nested": {"role": "web"},
+        },
+    )
+    hosts = context["hosts"]
+    assert isinstance(hosts, RecordList)
+    assert isinstance(hosts[0], Record)
+    assert 2 == len(hosts)  # noqa: PLR2004
+    assert {"name": "db1", "role": "db"} == hosts[-1]
+    assert [{"name": "web1", "role": "web"}] == hosts[:1]
+    assert [{"name": "web1", "role": "web"}, {"name": "db1", "role": "db"}] == hosts
+    assert [{"name": "x"}, {"id": 1}, 3] == context["mixed"]
+    # repeated strings are stored only once
+    assert hosts[0]["role"] is context["nested"]["role"]
+
+
+def test_render(make_file_pair: FilePairFactory) -> None:
+    files = make_file_pair(
+        "{% for host in hosts if host.role == 'web' %}"
+        "{{ host.name }}.{{ domain }} {{ host['tags']|join(',') }};"
+        "{% endfor %}"
+        "{{ hosts|map(attribute='name')|join(',') }} {{ hosts|length }} {{ mixed[1].id }}",
+        HOSTS_YAML,
+        "yaml",
+    )
+    assert "web1.example.com a,b;web2.example.com b;web1,web2,db1 3 1" == render_file(
+        files,
+        ["--quiet", "--compact-context"],
+    )
+
+
+def test_tojson(make_file_pair: FilePairFactory) -> None:
+    files = make_file_pair("{{ hosts[:2]|tojson }} {{ hosts[2]|tojson }}", HOSTS_YAML, "yaml")
+    assert (
+        '[{"name": "web1", "role": "web", "tags": ["a", "b"]},'
+        ' {"name": "web2", "role": "web", "tags": ["b"]}]'
+        ' {"name": "db1", "role": "db", "tags": []}'
+    ) == render_file(files, ["--quiet", "--compact-context"])
+
+    files = make_file_pair("{{ hosts|tojson }}", HOSTS_YAML, "yaml")
+    assert render_file(files, ["--quiet"]) == render_file(files, ["--quiet", "--compact-context"])
+
+
+def test_concatenation() -> None:
+    hosts = compact_context({"hosts": [{"name": "a"}, {"name": "b"}]})["hosts"]
+    extra = {"name": "c"}
+
+    assert [{"name": "a"}, {"name": "b"}, extra] == hosts + [extra]  # noqa: RUF005
+    assert [extra, {"name": "a"}, {"name": "b"}] == [extra] + hosts  # noqa: RUF005
+    assert 4 == len(hosts + hosts)  # noqa: PLR2004
+    with pytest.raises(TypeError):
+        hosts + "x"
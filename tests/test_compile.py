@@ -0,0 +1,90 @@
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from attrs import evolve
+from jinja2 import TemplateNotFound, TemplateSyntaxError
+
+import jinjanator.cli
+
+from . import (
+    FilePair,
+    FilePairFactory,
+    TemplateTreeFactory,
+    render_env,
+)
+
+
+TEMPLATES = {
+    "main.j2": '{% include "sub/part.j2" %}/{{ name }}',
+    "sub/part.j2": "{% do [] %}part",
+    "README": "{{ this is not a template",
+}
+
+
+@pytest.fixture
+def files(make_file_pair: FilePairFactory) -> FilePair:
+    return make_file_pair("", "", "json")
+
+
+def render_bundle(files: FilePair, bundle: Path, template: str, env: dict[str, str]) -> str:
+    # the template is named by its path in the bundle
+    return render_env(
+        evolve(files, template_file=Path(template)),
+        ["--quiet", "--template-bundle", str(bundle)],
+        env,
+    )
+
+
+def test_compile_and_render(
+    files: FilePair,
+    tmp_path: Path,
+    make_template_tree: TemplateTreeFactory,
+) -> None:
+    tree = make_template_tree(TEMPLATES)
+    bundle = tmp_path / "bundle.zip"
+    assert (
+        jinjanator.cli.main(
+            ["", "compile", "--quiet", "--suffix", ".j2", str(tree), str(bundle)],
+        )
+        is None
+    )
+    assert bundle.is_file()
+
+    # remove the sources to prove that the bundle is used
+    (tree / "main.j2").unlink()
+    (tree / "sub" / "part.j2").unlink()
+
+    assert "part/Blart" == render_bundle(files, bundle, "main.j2", {"name": "Blart"})
+
+
+def test_compile_syntax_error(tmp_path: Path, make_template_tree: TemplateTreeFactory) -> None:
+    tree = make_template_tree(TEMPLATES)
+    with pytest.raises(TemplateSyntaxError):
+        jinjanator.cli.compile_command(
+            tmp_path,
+            ["", "compile", "--quiet", str(tree), str(tmp_path / "bundle.zip")],
+        )
+
+
+def test_compile_missing_directory(tmp_path: Path, capsys: Any) -> None:
+    assert 1 == jinjanator.cli.main(
+        ["", "compile", "--quiet", str(tmp_path / "nope"), str(tmp_path / "bundle.zip")],
+    )
+    assert "does not exist" in capsys.readouterr().err
+
+
+def test_bundle_template_not_found(
+    files: FilePair,
+    tmp_path: Path,
+    make_template_tree: TemplateTreeFactory,
+) -> None:
+    tree = make_template_tree(TEMPLATES)
+    bundle = tmp_path / "bundle.zip"
+    jinjanator.cli.compile_command(
+        tmp_path,
+        ["", "compile", "--quiet", "--suffix", ".j2", str(tree), str(bundle)],
+    )
+    with pytest.raises(TemplateNotFound):
+        render_bundle(files, bundle, "other.j2", {})
@@ -0,0 +1,80 @@
+import bz2
+import gzip
+import lzma
+
+from collections.abc import Callable, Sequence
+from typing import Any
+
+import pytest
+
+from jinjanator.compressed import zstd_module
+
+from . import (
+    FilePairFactory,
+    render_file,
+)
+
+
+def render_compressed(
+    make_file_pair: FilePairFactory,
+    data_format: str,
+    data: bytes,
+    compress: Callable[[bytes], bytes],
+    options: Sequence[str] = (),
+) -> str:
+    files = make_file_pair("{{ name }}", "", data_format)
+    files.data_file.write_bytes(compress(data))
+    return render_file(files, ["--quiet", *options])
+
+
+@pytest.mark.parametrize(
+    ("suffix", "compress"),
+    [
+        (".gz", gzip.compress),
+        (".xz", lzma.compress),
+        (".bz2", bz2.compress),
+    ],
+)
+@pytest.mark.parametrize(
+    ("data_format", "data"),
+    [
+        ("json", b'{"name": "Blart"}'),
+        ("yaml", b"name: Blart"),
+        ("env", b"name=Blart"),
+    ],
+)
+def test_compressed_data(
+    make_file_pair: FilePairFactory,
+    suffix: str,
+    compress: Callable[[bytes], bytes],
+    data_format: str,
+    data: bytes,
+) -> None:
+    assert "Blart" == render_compressed(make_file_pair, f"{data_format}{suffix}", data, compress)
+
+
+@pytest.mark.skipif(zstd_module() is None, reason="Zstandard support is not available")
+def test_zstd_data(make_file_pair: FilePairFactory) -> None:
+    zstd: Any = zstd_module()
+    assert "Blart" == render_compressed(
+        make_file_pair,
+        "yaml.zst",
+        b"name: Blart",
+        zstd.compress,
+    )
+
+
+def test_explicit_format(make_file_pair: FilePairFactory) -> None:
+    assert "Blart" == render_compressed(
+        make_file_pair,
+        "gz",
+        b'{"name": "Blart"}',
+        gzip.compress,
+        ["--format", "json"],
+    )
+
+
+def test_unknown_inner_suffix(make_file_pair: FilePairFactory, capsys: Any) -> None:
+    with pytest.raises(SystemExit):
+        render_compressed(make_file_pair, "xyz.gz", b"", gzip.compress)
+    assert "No format which can read '.xyz' files available" == capsys.readouterr().err.strip()
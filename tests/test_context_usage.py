@@ -0,0 +1,136 @@
+import json
+import pathlib
+
+from collections.abc import Mapping, Sequence
+from typing import Any
+
+import pytest
+
+from jinjanator.usage import ContextUsage, serialized_size
+
+from . import (
+    FilePairFactory,
+    render_file,
+    render_file_env,
+)
+
+
+DATA = {
+    "site": {"name": "example", "owner": "ops", "tags": ["a", "b"]},
+    "hosts": [
+        {"name": "web1", "ram": 4, "address": "10.0.0.1"},
+        {"name": "web2", "ram": 8, "address": "10.0.0.2", "extra": {"rack": 1}},
+    ],
+    "unused_list": [1, 2, 3],
+    "meta": {"a": 1},
+}
+
+
+def report(
+    make_file_pair: FilePairFactory,
+    template: str,
+    options: Sequence[str] = (),
+    environ: Mapping[str, str] | None = None,
+) -> dict[str, Any]:
+    files = make_file_pair(template, json.dumps(DATA), "json")
+    report_file = files.template_file.parent / "report.json"
+    render_file_env(
+        files,
+        ["--quiet", "--report-context-usage", str(report_file), *options],
+        environ or {},
+    )
+    result: dict[str, Any] = json.loads(report_file.read_text())
+    return result
+
+
+def unused_keys(result: dict[str, Any]) -> set[str]:
+    return {entry["key"] for entry in result["unused"]}
+
+
+def test_report(make_file_pair: FilePairFactory) -> None:
+    result = report(
+        make_file_pair,
+        "{{ site.name }}{% for host in hosts %}{{ host.name }}{% endfor %}",
+    )
+    assert {
+        "site.owner",
+        "site.tags",
+        "hosts[].ram",
+        "hosts[].address",
+        "hosts[].extra",
+        "unused_list",
+        "meta",
+    } == unused_keys(result)
+    assert sum(entry["bytes"] for entry in result["unused"]) == result["unused_bytes"]
+    assert result["unused_bytes"] < result["data_bytes"]
+
+
+def test_sizes(make_file_pair: FilePairFactory) -> None:
+    result = report(make_file_pair, "{{ site }}{{ hosts|length }}{{ meta }}")
+    # 'ram' is summed over both hosts
+    assert {
+        "hosts[].name": serialized_size("name", "web1") + serialized_size("name", "web2"),
+        "hosts[].ram": serialized_size("ram", 4) + serialized_size("ram", 8),
+        "hosts[].address": 2 * serialized_size("address", "10.0.0.1"),
+        "hosts[].extra": serialized_size("extra", {"rack": 1}),
+        "unused_list": len('"unused_list":[1,2,3],'),
+    } == {entry["key"]: entry["bytes"] for entry in result["unused"]}
+    # sorted by decreasing size
+    sizes = [entry["bytes"] for entry in result["unused"]]
+    assert sorted(sizes, reverse=True) == sizes
+
+
+@pytest.mark.parametrize(
+    "template",
+    [
+        "{{ meta|tojson }}",
+        "{% for k, v in meta|items %}{{ k }}{% endfor %}",
+        "{% for k in meta %}{% endfor %}",
+        "{{ meta|dictsort }}",
+        "{% if 'a' in meta %}{% endif %}",
+        "{{ meta.get('a') }}",
+        "{{ meta['a'] }}",
+    ],
+)
+def test_mapping_reads(make_file_pair: FilePairFactory, template: str) -> None:
+    assert "meta" not in unused_keys(report(make_file_pair, template))
+    assert "meta.a" not in unused_keys(report(make_file_pair, template))
+
+
+def test_nested_through_all_keys(make_file_pair: FilePairFactory) -> None:
+    # iterating over a mapping uses its keys, but not necessarily
+    # everything within their values
+    result = report(make_file_pair, "{% for k, v in site|items %}{{ k }}{% endfor %}")
+    assert {"site.name", "site.owner", "site.tags"}.isdisjoint(unused_keys(result))
+
+
+def test_import_env(make_file_pair: FilePairFactory) -> None:
+    result = report(
+        make_file_pair,
+        "{{ env.USER }}{{ site }}{{ hosts }}{{ meta }}{{ unused_list }}",
+        ["--import-env", "env"],
+        {"USER": "me", "SECRET": "xyz"},
+    )
+    assert {"env.SECRET"} == unused_keys(result)
+
+
+def test_output(make_file_pair: FilePairFactory, tmp_path: pathlib.Path) -> None:
+    files = make_file_pair("{{ hosts[1].extra.rack }}", json.dumps(DATA), "json")
+    assert "1" == render_file(
+        files,
+        ["--quiet", "--report-context-usage", str(tmp_path / "report.json")],
+    )
+
+
+def test_track_does_not_modify_context() -> None:
+    usage = ContextUsage()
+    tracked = usage.track(DATA)
+    assert DATA == tracked
+    assert tracked["site"]["name"] == "example"
+    assert {"site.name"} == usage.used
+    assert "site.name" not in usage.unused(DATA)
+
+
+def test_incompatible_options(make_file_pair: FilePairFactory, tmp_path: pathlib.Path) -> None:
+    with pytest.raises(SystemExit):
+        report(make_file_pair, "", ["--render-cache", str(tmp_path / "cache")])
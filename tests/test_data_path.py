@@ -0,0 +1,104 @@
+import gzip
+
+from typing import Any
+
+import pytest
+
+from jinjanator.cli import main
+from jinjanator.context import DataPathError, ijson_module, parse_data_path
+
+from . import (
+    FilePairFactory,
+    render_env,
+    render_explicit_stream,
+    render_file,
+)
+
+
+DATA = '{"services": {"web": {"port": 80, "hosts": [{"name": "a"}]}, "db": {"port": 5432}}}'
+
+TEMPLATE = "{{ port }}{{ name }}"
+
+OPTIONS = ["--quiet", "--undefined"]
+
+
+@pytest.mark.parametrize("data_path", ["services.web", "/services/web"])
+def test_json(make_file_pair: FilePairFactory, data_path: str) -> None:
+    files = make_file_pair(TEMPLATE, DATA, "json")
+    assert "80" == render_file(files, [*OPTIONS, "--data-path", data_path])
+
+
+def test_compressed_json(make_file_pair: FilePairFactory) -> None:
+    files = make_file_pair(TEMPLATE, "", "json.gz")
+    files.data_file.write_bytes(gzip.compress(DATA.encode()))
+    assert "5432" == render_file(files, [*OPTIONS, "--data-path", "services.db"])
+
+
+def test_array_index(make_file_pair: FilePairFactory) -> None:
+    files = make_file_pair(TEMPLATE, DATA, "json")
+    assert "a" == render_file(files, [*OPTIONS, "--data-path", "services.web.hosts.0"])
+
+
+def test_yaml(make_file_pair: FilePairFactory) -> None:
+    files = make_file_pair(TEMPLATE, "services:\n  web:\n    port: 80\n", "yaml")
+    assert "80" == render_file(files, [*OPTIONS, "--data-path", "services.web"])
+
+
+def test_stream(make_file_pair: FilePairFactory) -> None:
+    files = make_file_pair("{{ port }}", DATA, "json")
+    assert "80" == render_explicit_stream(
+        files,
+        ["--quiet", "--format", "json", "--data-path", "services.web"],
+    )
+
+
+@pytest.mark.parametrize("data_format", ["json", "yaml"])
+def test_not_found(make_file_pair: FilePairFactory, data_format: str) -> None:
+    files = make_file_pair(TEMPLATE, DATA, data_format)
+    with pytest.raises(DataPathError, match=r"'services\.mail' not found"):
+        render_file(files, [*OPTIONS, "--data-path", "services.mail"])
+
+
+@pytest.mark.parametrize("data_format", ["json", "yaml"])
+def test_not_mapping(make_file_pair: FilePairFactory, data_format: str) -> None:
+    files = make_file_pair(TEMPLATE, DATA, data_format)
+    with pytest.raises(DataPathError, match="does not select a mapping"):
+        render_file(files, [*OPTIONS, "--data-path", "services.web.port"])
+
+
+@pytest.mark.parametrize("data_format", ["json", "yaml"])
+def test_item_component(make_file_pair: FilePairFactory, data_format: str) -> None:
+    data = '{"svc": [{"port": 80}], "other": {"item": {"port": 443}}}'
+    files = make_file_pair(TEMPLATE, data, data_format)
+    # 'item' is only ever a key, never any array element
+    with pytest.raises(DataPathError, match=r"'svc\.item' not found"):
+        render_file(files, [*OPTIONS, "--data-path", "svc.item"])
+    assert "443" == render_file(files, [*OPTIONS, "--data-path", "other.item"])
+
+
+def test_not_found_exit(make_file_pair: FilePairFactory, capsys: Any) -> None:
+    files = make_file_pair("{{ port }}", DATA, "json")
+    assert 1 == main(
+        ["", "--quiet", "--data-path", "x.b", str(files.template_file), str(files.data_file)],
+    )
+    assert "Data path 'x.b' not found in input data" in capsys.readouterr().err
+
+
+def test_environment(make_file_pair: FilePairFactory, capsys: Any) -> None:
+    files = make_file_pair("", "", "json")
+    with pytest.raises(SystemExit):
+        render_env(files, ["--data-path", "a.b"], env={})
+    assert "--data-path cannot be used without input data" in capsys.readouterr().err
+
+
+@pytest.mark.skipif(ijson_module() is None, reason="ijson is not installed")
+def test_incremental_parser_ignores_rest_of_document(make_file_pair: FilePairFactory) -> None:
+    files = make_file_pair(TEMPLATE, '{"services": {"web": {"port": 80}}, "broken": ', "json")
+    # the subtree is extracted before the invalid content is reached
+    assert "80" == render_file(files, [*OPTIONS, "--data-path", "services.web"])
+
+
+def test_parse_data_path() -> None:
+    assert ["a", "b.c", "d/e", "f~g"] == parse_data_path("/a/b.c/d~1e/f~0g")
+    assert ["a", "b", "0"] == parse_data_path("a.b.0")
+    assert [] == parse_data_path("")
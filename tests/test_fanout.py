@@ -0,0 +1,116 @@
+import gzip
+import pathlib
+
+from typing import Any
+
+import pytest
+
+from jinjanator.fanout import output_path
+
+from . import (
+    FilePair,
+    FilePairFactory,
+    render_env,
+)
+
+
+@pytest.fixture
+def files(make_file_pair: FilePairFactory) -> FilePair:
+    # the data files are in the fan-out directory, not the pair's data file
+    return make_file_pair("host {{ name }}", "", "json")
+
+
+def make_data_files(tmp_path: pathlib.Path) -> pathlib.Path:
+    data_dir = tmp_path / "data"
+    data_dir.mkdir()
+    (data_dir / "alpha.json").write_text('{"name": "Alpha"}')
+    (data_dir / "beta.yaml").write_text("name: Beta")
+    (data_dir / "gamma.env.gz").write_bytes(gzip.compress(b"name=Gamma"))
+    return data_dir
+
+
+def fan_out(files: FilePair, options: list[str]) -> str:
+    return render_env(files, ["--quiet", *options], env={})
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_fan_out_directory(files: FilePair, tmp_path: pathlib.Path, jobs: str) -> None:
+    data_dir = make_data_files(tmp_path)
+    assert "" == fan_out(
+        files,
+        [
+            "--fan-out",
+            str(data_dir),
+            "--output-pattern",
+            str(tmp_path / "out" / "{stem}.conf"),
+            "--jobs",
+            jobs,
+        ],
+    )
+    assert "host Alpha" == (tmp_path / "out" / "alpha.conf").read_text()
+    assert "host Beta" == (tmp_path / "out" / "beta.conf").read_text()
+    assert "host Gamma" == (tmp_path / "out" / "gamma.conf").read_text()
+
+
+def test_fan_out_glob_with_failures(files: FilePair, tmp_path: pathlib.Path, capsys: Any) -> None:
+    data_dir = make_data_files(tmp_path)
+    (data_dir / "broken.json").write_text("{")
+    (data_dir / "missing.json").write_text("{}")
+    with pytest.raises(SystemExit):
+        fan_out(
+            files,
+            [
+                "--fan-out",
+                str(data_dir / "*.json"),
+                "--output-pattern",
+                str(tmp_path / "out" / "{name}.out"),
+            ],
+        )
+    assert "host Alpha" == (tmp_path / "out" / "alpha.json.out").read_text()
+    assert not (tmp_path / "out" / "beta.yaml.out").exists()
+    assert not (tmp_path / "out" / "missing.json.out").exists()
+    err = capsys.readouterr().err.splitlines()
+    assert 2 == len(err)  # noqa: PLR2004
+    assert err[0].startswith(f"{data_dir / 'broken.json'}: TypeError")
+    assert err[1].startswith(f"{data_dir / 'missing.json'}: UndefinedError")
+
+
+def test_fan_out_failure_keeps_existing_output(files: FilePair, tmp_path: pathlib.Path) -> None:
+    data_dir = make_data_files(tmp_path)
+    (data_dir / "missing.json").write_text("{}")
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    (out_dir / "missing.conf").write_text("GOOD")
+
+    with pytest.raises(SystemExit):
+        fan_out(
+            files,
+            ["--fan-out", str(data_dir), "--output-pattern", str(out_dir / "{stem}.conf")],
+        )
+
+    assert "GOOD" == (out_dir / "missing.conf").read_text()
+    assert 4 == len(list(out_dir.iterdir()))  # noqa: PLR2004
+
+
+def test_fan_out_summary(files: FilePair, tmp_path: pathlib.Path, capsys: Any) -> None:
+    data_dir = make_data_files(tmp_path)
+    render_env(
+        files,
+        ["--fan-out", str(data_dir), "--output-pattern", str(tmp_path / "{stem}.conf")],
+        env={},
+    )
+    assert "Rendered 3 of 3 data files" in capsys.readouterr().err
+
+
+def test_fan_out_requires_pattern(files: FilePair, tmp_path: pathlib.Path) -> None:
+    data_dir = make_data_files(tmp_path)
+    with pytest.raises(SystemExit):
+        fan_out(files, ["--fan-out", str(data_dir)])
+
+
+def test_output_path() -> None:
+    data_file = pathlib.Path("hosts/web1.yaml.gz")
+    assert pathlib.Path("out/hosts/web1.yaml.gz/web1.conf") == output_path(
+        "out/{parent}/{name}/{stem}.conf",
+        data_file,
+    )
@@ -0,0 +1,165 @@
+from pathlib import Path
+
+import jinja2
+import pytest
+
+from markupsafe import Markup
+
+from jinjanator import Renderer
+from jinjanator.extensions import configure_fragment_cache
+from jinjanator.fragments import FragmentCache, fragment_key
+
+from . import (
+    FilePairFactory,
+    render_file,
+)
+
+
+FILTERS = """
+calls = []
+
+def expensive(value):
+    calls.append(value)
+    return value.upper()
+"""
+
+
+def make_renderer(tmp_path: Path, template: str) -> tuple[Renderer, list[str]]:
+    (tmp_path / "filters.py").write_text(FILTERS)
+    (tmp_path / "template.j2").write_text(template)
+    renderer = Renderer(cwd=tmp_path, filters=[str(tmp_path / "filters.py")])
+    calls: list[str] = renderer.env.filters["expensive"].__globals__["calls"]
+    return renderer, calls
+
+
+def test_cache_block(tmp_path: Path) -> None:
+    renderer, calls = make_renderer(
+        tmp_path,
+        "{% for h in hosts %}{% cache h.role %}{{ h.role | expensive }}{% endcache %},{% endfor %}",
+    )
+    hosts = [{"role": "web"}, {"role": "db"}, {"role": "web"}]
+
+    assert "WEB,DB,WEB," == renderer.render("template.j2", {"hosts": hosts})
+    assert ["web", "db"] == calls
+
+    info = renderer.cache_info()["fragment"]
+    assert (1, 2, 2) == (info.hits, info.misses, info.currsize)
+
+    renderer.clear_caches()
+    assert 0 == renderer.cache_info()["fragment"].currsize
+
+
+def test_cache_block_multiple_keys(tmp_path: Path) -> None:
+    renderer, calls = make_renderer(
+        tmp_path,
+        "{% for x in items %}{% cache x, version %}{{ x | expensive }}{{ version }}"
+        "{% endcache %}{% endfor %}",
+    )
+
+    assert "A1B1A1" == renderer.render("template.j2", {"items": ["a", "b", "a"], "version": 1})
+    assert "A2" == renderer.render("template.j2", {"items": ["a"], "version": 2})
+    assert ["a", "b", "a"] == calls
+
+
+def test_blocks_have_separate_fragments(tmp_path: Path) -> None:
+    renderer, _ = make_renderer(
+        tmp_path,
+        "{% cache 1 %}one{% endcache %}{% cache 1 %}two{% endcache %}",
+    )
+
+    assert "onetwo" == renderer.render("template.j2", {})
+
+
+def test_cache_block_escaping() -> None:
+    env = jinja2.Environment(
+        extensions=["jinjanator.extensions.CacheExtension"],
+        autoescape=True,
+    )
+    template = env.from_string("{% cache 1 %}{{ value }}{% endcache %}")
+
+    assert "&lt;b&gt;" == template.render(value="<b>")
+    # the cached fragment is not escaped again
+    assert "&lt;b&gt;" == template.render(value="<i>")
+
+
+def test_memoize_macro(tmp_path: Path) -> None:
+    renderer, calls = make_renderer(
+        tmp_path,
+        "{% macro shout(x, suffix='!') %}{{ x | expensive }}{{ suffix }}{% endmacro %}"
+        "{% set shout = memoize_macro(shout) %}"
+        "{{ shout('a') }}{{ shout('b') }}{{ shout('a') }}{{ shout('a', suffix='?') }}",
+    )
+
+    assert "A!B!A!A?" == renderer.render("template.j2", {})
+    assert ["a", "b", "a"] == calls
+
+
+def test_memoize_macro_with_caller(tmp_path: Path) -> None:
+    renderer, calls = make_renderer(
+        tmp_path,
+        "{% macro wrap(x) %}[{{ x | expensive }}{{ caller() }}]{% endmacro %}"
+        "{% set wrap = memoize_macro(wrap) %}"
+        "{% call wrap('a') %}1{% endcall %}{% call wrap('a') %}2{% endcall %}",
+    )
+
+    assert "[A1][A2]" == renderer.render("template.j2", {})
+    assert ["a", "a"] == calls
+
+
+def test_memoize_not_macro(tmp_path: Path) -> None:
+    renderer, _ = make_renderer(tmp_path, "{{ memoize_macro(range) }}")
+
+    with pytest.raises(jinja2.TemplateRuntimeError, match="can only be used with macros"):
+        renderer.render("template.j2", {})
+
+
+def test_fragment_directory(tmp_path: Path) -> None:
+    template = "{% cache x %}{{ x | expensive }}{% endcache %}"
+    renderer, calls = make_renderer(tmp_path, template)
+    configure_fragment_cache(renderer.env, tmp_path / "fragments")
+    assert "A" == renderer.render("template.j2", {"x": "a"})
+    assert ["a"] == calls
+
+    # a new renderer (as in a later run) reuses the stored fragment
+    renderer, calls = make_renderer(tmp_path, template)
+    configure_fragment_cache(renderer.env, tmp_path / "fragments")
+    assert "A" == renderer.render("template.j2", {"x": "a"})
+    assert [] == calls
+
+    # changing the block changes the identity of its fragments
+    renderer, calls = make_renderer(tmp_path, template.replace("}}", "}}!"))
+    configure_fragment_cache(renderer.env, tmp_path / "fragments")
+    assert "A!" == renderer.render("template.j2", {"x": "a"})
+    assert ["a"] == calls
+
+
+def test_stored_markup(tmp_path: Path) -> None:
+    cache = FragmentCache(directory=tmp_path)
+    key = fragment_key("block:test", ["a"])
+    cache.set(key, Markup("<b>"))
+
+    fragment = FragmentCache(directory=tmp_path).get(key)
+    assert isinstance(fragment, Markup)
+    assert "<b>" == fragment
+
+
+def test_lru_eviction() -> None:
+    cache = FragmentCache(maxsize=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert "1" == cache.get("a")
+    cache.set("c", "3")
+
+    assert cache.get("b") is None
+    assert "1" == cache.get("a")
+    assert cache.cache_info().currsize == cache.maxsize
+
+
+def test_cli_fragment_cache(make_file_pair: FilePairFactory, tmp_path: Path) -> None:
+    files = make_file_pair("{% cache x %}{{ x }}{% endcache %}", '{"x": "a"}', "json")
+
+    assert "a" == render_file(
+        files,
+        ["--quiet", "--fragment-cache", str(tmp_path / "fragments")],
+    )
+    assert list((tmp_path / "fragments").glob("*/*.json"))
@@ -0,0 +1,99 @@
+import array
+import pathlib
+import struct
+
+from typing import Any
+
+import pytest
+
+from . import (
+    FilePair,
+    FilePairFactory,
+    render_file,
+)
+
+
+TEMPLATE = "{% trans %}Hello{% endtrans %}, {{ name }}! {{ _('Goodbye') }}"
+
+CATALOGS = {
+    "de": {"Hello": "Hallo", "Goodbye": "Auf Wiedersehen"},
+    "fr": {"Hello": "Bonjour", "Goodbye": "Au revoir"},
+}
+
+
+def make_mo(messages: dict[str, str]) -> bytes:
+    """Build a compiled gettext catalog, as msgfmt does"""
+    messages = {"": "Content-Type: text/plain; charset=UTF-8\n", **messages}
+    keys = sorted(messages)
+    ids = strs = b""
+    offsets = []
+
+    for key in keys:
+        msgid, msgstr = key.encode(), messages[key].encode()
+        offsets.append((len(ids), len(msgid), len(strs), len(msgstr)))
+        ids += msgid + b"\0"
+        strs += msgstr + b"\0"
+
+    keystart = 7 * 4 + 16 * len(keys)
+    valuestart = keystart + len(ids)
+    koffsets: list[int] = []
+    voffsets: list[int] = []
+
+    for o1, l1, o2, l2 in offsets:
+        koffsets += [l1, o1 + keystart]
+        voffsets += [l2, o2 + valuestart]
+
+    header = struct.pack(
+        "Iiiiiii",
+        0x950412DE,
+        0,
+        len(keys),
+        7 * 4,
+        7 * 4 + len(keys) * 8,
+        0,
+        0,
+    )
+
+    return header + array.array("i", koffsets + voffsets).tobytes() + ids + strs
+
+
+@pytest.fixture
+def files(make_file_pair: FilePairFactory) -> FilePair:
+    files = make_file_pair(TEMPLATE, '{"name": "Blart"}', "json")
+
+    for locale, messages in CATALOGS.items():
+        catalog_dir = files.template_file.parent / "locale" / locale / "LC_MESSAGES"
+        catalog_dir.mkdir(parents=True)
+        (catalog_dir / "messages.mo").write_bytes(make_mo(messages))
+
+    return files
+
+
+def render(files: FilePair, options: list[str]) -> str:
+    locale_dir = files.template_file.parent / "locale"
+    return render_file(files, ["--quiet", "--locale-dir", str(locale_dir), *options])
+
+
+def test_single_locale(files: FilePair) -> None:
+    assert "Hallo, Blart! Auf Wiedersehen" == render(files, ["--locale", "de"])
+
+
+def test_multiple_locales(files: FilePair, tmp_path: pathlib.Path) -> None:
+    assert "" == render(
+        files,
+        ["--locale", "de", "--locale", "fr", "-o", str(tmp_path / "out" / "{locale}.txt")],
+    )
+    assert "Hallo, Blart! Auf Wiedersehen" == (tmp_path / "out" / "de.txt").read_text()
+    assert "Bonjour, Blart! Au revoir" == (tmp_path / "out" / "fr.txt").read_text()
+
+
+def test_missing_catalog(files: FilePair, capsys: Any) -> None:
+    with pytest.raises(SystemExit):
+        render(files, ["--locale", "es"])
+    assert "No translation catalog for locale 'es' found" in capsys.readouterr().err
+
+
+def test_multiple_locales_require_output_pattern(files: FilePair, capsys: Any) -> None:
+    with pytest.raises(SystemExit):
+        render(files, ["--locale", "de", "--locale", "fr"])
+    assert "requires an --output-file containing '{locale}'" in capsys.readouterr().err
@@ -0,0 +1,104 @@
+import json
+import os
+import pathlib
+
+from typing import Any
+
+import pytest
+
+from attrs import evolve
+
+from . import (
+    FilePair,
+    FilePairFactory,
+    render_file,
+)
+
+
+DATA = {"web": {"port": 80}, "db": {"port": 5432}, "domain": "example.com"}
+
+
+def render(files: FilePair) -> pathlib.Path:
+    output_file = files.template_file.with_name(f"{files.template_file.name}.out")
+    render_file(files, ["--quiet", "--incremental", "state", "-o", str(output_file)])
+    return output_file
+
+
+def set_mtime(path: pathlib.Path) -> None:
+    os.utime(path, (0, 0))
+
+
+@pytest.fixture
+def files(make_file_pair: FilePairFactory, monkeypatch: pytest.MonkeyPatch) -> FilePair:
+    files = make_file_pair('{{ web.port }} {% include "part.j2" %}', json.dumps(DATA), "json")
+    # included templates (and the state) are relative to the current directory
+    monkeypatch.chdir(files.template_file.parent)
+    pathlib.Path("part.j2").write_text("{{ domain }}")
+    pathlib.Path("other.j2").write_text("{{ db.port }}")
+    return files
+
+
+def update_data(files: FilePair, **changes: Any) -> None:
+    data = json.loads(files.data_file.read_text())
+    data.update(changes)
+    files.data_file.write_text(json.dumps(data))
+
+
+def test_skips_unaffected_templates(files: FilePair) -> None:
+    other = evolve(files, template_file=files.template_file.with_name("other.j2"))
+    web = render(files)
+    db = render(other)
+    assert "80 example.com" == web.read_text()
+    assert "5432" == db.read_text()
+    set_mtime(web)
+    set_mtime(db)
+
+    update_data(files, db={"port": 5433})
+    render(files)
+    render(other)
+    assert 0 == web.stat().st_mtime
+    assert "5433" == db.read_text()
+
+
+@pytest.mark.parametrize(
+    ("name", "content"),
+    [
+        ("part.j2", "{{ domain }}!"),
+        ("template.j2", "{{ web.port }}"),
+    ],
+)
+def test_template_changes(files: FilePair, name: str, content: str) -> None:
+    output_file = render(files)
+    set_mtime(output_file)
+    pathlib.Path(name).write_text(content)
+    render(files)
+    assert 0 != output_file.stat().st_mtime
+
+
+def test_included_template_variables(files: FilePair) -> None:
+    output_file = render(files)
+    update_data(files, domain="example.org")
+    render(files)
+    assert "80 example.org" == output_file.read_text()
+
+
+def test_missing_output_file(files: FilePair) -> None:
+    output_file = render(files)
+    output_file.unlink()
+    render(files)
+    assert output_file.exists()
+
+
+def test_variable_added(files: FilePair) -> None:
+    files.template_file.write_text("{{ extra | default('none') }}")
+    output_file = render(files)
+    assert "none" == output_file.read_text()
+    update_data(files, extra="some")
+    render(files)
+    assert "some" == output_file.read_text()
+
+
+def test_requires_output_file(files: FilePair, capsys: Any) -> None:
+    with pytest.raises(SystemExit):
+        render_file(files, ["--incremental", "state"])
+    assert "--incremental requires --output-file" in capsys.readouterr().err
@@ -0,0 +1,139 @@
+import json
+import pathlib
+
+import pytest
+
+from jinjanator import Renderer
+from jinjanator.cli import main
+from jinjanator.indexes import IndexBuildError, IndexSpec, IndexSpecError
+
+from . import (
+    FilePairFactory,
+    render_file,
+)
+
+
+DATA = {
+    "inventory": {
+        "hosts": [
+            {"name": "web1", "address": "10.0.0.1", "site": {"city": "Boston"}},
+            {"name": "db1", "address": "10.0.0.2", "site": {"city": "Seattle"}},
+        ],
+    },
+    "services": [{"name": "http", "host": "web1"}, {"name": "sql", "host": "db1"}],
+}
+
+TEMPLATE = (
+    "{% for service in services %}"
+    "{{ service.name }}={{ hosts_by_name[service.host].address }};"
+    "{% endfor %}"
+)
+
+
+def render(make_file_pair: FilePairFactory, template: str, options: list[str]) -> str:
+    files = make_file_pair(template, json.dumps(DATA), "json")
+    return render_file(files, ["--quiet", *options])
+
+
+@pytest.mark.parametrize("path", ["inventory.hosts", "/inventory/hosts"])
+def test_index(make_file_pair: FilePairFactory, path: str) -> None:
+    assert "http=10.0.0.1;sql=10.0.0.2;" == render(
+        make_file_pair,
+        TEMPLATE,
+        ["--index", f"hosts_by_name={path}:name"],
+    )
+
+
+def test_multiple_indexes(make_file_pair: FilePairFactory) -> None:
+    assert "db1/http" == render(
+        make_file_pair,
+        "{{ hosts_by_city.Seattle.name }}/{{ services_by_host.web1.name }}",
+        [
+            "--index",
+            "hosts_by_city=inventory.hosts:site.city",
+            "--index",
+            "services_by_host=services:host",
+        ],
+    )
+
+
+def test_compact_context(make_file_pair: FilePairFactory) -> None:
+    assert "http=10.0.0.1;sql=10.0.0.2;" == render(
+        make_file_pair,
+        TEMPLATE,
+        ["--compact-context", "--index", "hosts_by_name=inventory.hosts:name"],
+    )
+
+
+def test_customization_hook(make_file_pair: FilePairFactory, tmp_path: pathlib.Path) -> None:
+    # the index is built after 'alter_context' is applied
+    (tmp_path / "customize.py").write_text(
+        "def alter_context(context):\n"
+        "    context['hosts'] = context['inventory']['hosts']\n"
+        "    return context\n"
+        "\n"
+        "def context_indexes():\n"
+        "    return {'hosts_by_name': 'hosts:name'}\n",
+    )
+    assert "http=10.0.0.1;sql=10.0.0.2;" == render(
+        make_file_pair,
+        TEMPLATE,
+        ["--customize", str(tmp_path / "customize.py")],
+    )
+
+
+def test_renderer(tmp_path: pathlib.Path) -> None:
+    (tmp_path / "template.j2").write_text(TEMPLATE)
+    renderer = Renderer(
+        cwd=tmp_path,
+        indexes=[IndexSpec.parse("hosts_by_name=inventory.hosts:name")],
+    )
+    assert "http=10.0.0.1;sql=10.0.0.2;" == renderer.render("template.j2", DATA)
+    # the caller's context must not be modified
+    assert "hosts_by_name" not in DATA
+
+
+@pytest.mark.parametrize("spec", ["hosts", "=hosts:name", "x=hosts", "x=:name", "x=hosts:"])
+def test_invalid_spec(spec: str) -> None:
+    with pytest.raises(IndexSpecError):
+        IndexSpec.parse(spec)
+
+
+def test_invalid_option(
+    make_file_pair: FilePairFactory, capsys: pytest.CaptureFixture[str]
+) -> None:
+    with pytest.raises(SystemExit):
+        render(make_file_pair, TEMPLATE, ["--index", "hosts_by_name"])
+    assert "is not of the form 'name=path:key'" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize(
+    ("spec", "message"),
+    [
+        ("x=inventory.vms:name", "Data path 'inventory.vms' not found"),
+        ("x=inventory:name", "does not select a list"),
+        ("x=inventory.hosts:role", "item has no 'role'"),
+        ("services=inventory.hosts:name", "the name is already used in the context"),
+    ],
+)
+def test_build_errors(make_file_pair: FilePairFactory, spec: str, message: str) -> None:
+    with pytest.raises(IndexBuildError, match=message):
+        render(make_file_pair, TEMPLATE, ["--index", spec])
+
+
+def test_build_error_exit(
+    make_file_pair: FilePairFactory,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    files = make_file_pair(TEMPLATE, json.dumps(DATA), "json")
+    assert 1 == main(
+        [
+            "",
+            "--quiet",
+            "--index",
+            "x=nothing:name",
+            str(files.template_file),
+            str(files.data_file),
+        ],
+    )
+    assert "Index 'x' could not be built" in capsys.readouterr().err
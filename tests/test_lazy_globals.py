@@ -0,0 +1,119 @@
+import threading
+
+from pathlib import Path
+from types import SimpleNamespace
+from typing import cast
+
+import jinjanator_plugins
+import pluggy
+
+from jinjanator_plugins import Globals, plugin_globals_hook
+
+from jinjanator import Renderer, lazy
+from jinjanator import filters as builtin_filters
+from jinjanator import formats as builtin_formats
+from jinjanator.incremental import TrackingContext, record_context_access
+from jinjanator.lazy import LazyGlobal
+
+
+def make_plugin(calls: list[str]) -> SimpleNamespace:
+    def load_key() -> str:
+        calls.append("load_key")
+        return "secret"
+
+    @plugin_globals_hook
+    def plugin_globals() -> Globals:
+        return {"signing_key": lazy(load_key)}
+
+    return SimpleNamespace(plugin_globals=plugin_globals)
+
+
+def make_renderer(tmp_path: Path, template: str) -> tuple[Renderer, list[str]]:
+    calls: list[str] = []
+    pm = pluggy.PluginManager("jinjanator")
+    pm.add_hookspecs(jinjanator_plugins.PluginHooks)
+    pm.register(builtin_filters)
+    pm.register(builtin_formats)
+    pm.register(make_plugin(calls))
+
+    (tmp_path / "template.j2").write_text(template)
+    renderer = Renderer(
+        cwd=tmp_path,
+        plugin_hook_callers=cast("jinjanator_plugins.PluginHookCallers", pm.hook),
+    )
+    return renderer, calls
+
+
+def test_not_evaluated_when_unused(tmp_path: Path) -> None:
+    renderer, calls = make_renderer(tmp_path, "{{ name }}")
+
+    assert "web" == renderer.render("template.j2", {"name": "web"})
+    assert [] == calls
+
+
+def test_evaluated_once(tmp_path: Path) -> None:
+    renderer, calls = make_renderer(
+        tmp_path,
+        "{% macro sign(x) %}{{ x }}:{{ signing_key }}{% endmacro %}"
+        "{{ signing_key | upper }} {% for x in items %}{{ sign(x) }} {% endfor %}",
+    )
+
+    assert "SECRET a:secret b:secret " == renderer.render("template.j2", {"items": ["a", "b"]})
+    assert "SECRET " == renderer.render("template.j2", {"items": []})
+    assert ["load_key"] == calls
+
+
+def test_included_template(tmp_path: Path) -> None:
+    renderer, calls = make_renderer(tmp_path, "{% include 'key.j2' %}")
+    (tmp_path / "key.j2").write_text("{{ signing_key }}")
+
+    assert "secret" == renderer.render("template.j2", {})
+    assert ["load_key"] == calls
+
+
+def test_clear_caches(tmp_path: Path) -> None:
+    renderer, calls = make_renderer(tmp_path, "{{ signing_key }}")
+    renderer.render("template.j2", {})
+
+    signing_key = renderer.env.globals["signing_key"]
+    assert isinstance(signing_key, LazyGlobal)
+    assert signing_key.evaluated
+
+    renderer.clear_caches()
+    assert not signing_key.evaluated
+
+    renderer.render("template.j2", {})
+    assert ["load_key", "load_key"] == calls
+
+
+def test_tracking_context(tmp_path: Path) -> None:
+    renderer, _ = make_renderer(tmp_path, "{{ signing_key }}")
+    renderer.env.context_class = TrackingContext
+
+    with record_context_access() as names:
+        assert "secret" == renderer.render("template.j2", {})
+
+    assert {"signing_key"} == names
+
+
+def test_concurrent_first_use() -> None:
+    calls: list[int] = []
+    started = threading.Barrier(4)
+
+    def provider() -> int:
+        calls.append(1)
+        return 42
+
+    value = LazyGlobal(provider)
+
+    def use() -> None:
+        started.wait()
+        assert 42 == value()  # noqa: PLR2004
+
+    threads = [threading.Thread(target=use) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [1] == calls
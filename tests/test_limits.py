@@ -0,0 +1,171 @@
+import itertools
+import pathlib
+import signal
+import time
+
+from unittest import mock
+
+import pytest
+
+from jinjanator import Renderer
+from jinjanator.cli import main
+from jinjanator.limits import (
+    RenderLimits,
+    RenderMemoryExceededError,
+    RenderOutputExceededError,
+    RenderTimeExceededError,
+    parse_size,
+)
+
+from . import FilePairFactory
+
+
+LOOP_TEMPLATE = "{% for i in range(count|int) %}{{ i }}\n{% endfor %}"
+
+
+def run(make_file_pair: FilePairFactory, template: str, args: list[str]) -> int | None:
+    files = make_file_pair(template, "count=1000\n", "env")
+    return main(["", "--quiet", *args, str(files.template_file), str(files.data_file)])
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [("100", 100), ("512K", 512 * 1024), ("64m", 64 * 1024**2), ("2GB", 2 * 1024**3)],
+)
+def test_parse_size(value: str, expected: int) -> None:
+    assert expected == parse_size(value)
+
+
+@pytest.mark.parametrize("value", ["", "M", "1.5G", "-1", "10X"])
+def test_parse_size_invalid(value: str) -> None:
+    with pytest.raises(ValueError, match="is not a valid size"):
+        parse_size(value)
+
+
+def test_no_limits() -> None:
+    assert not RenderLimits()
+    assert RenderLimits(max_output_bytes=10)
+
+
+def test_output_limit(
+    make_file_pair: FilePairFactory,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    assert 5 == run(make_file_pair, LOOP_TEMPLATE, ["--max-output-bytes", "1K"])  # noqa: PLR2004
+    assert "Render output limit of 1024 bytes exceeded" in capsys.readouterr().err
+
+
+def test_output_limit_not_reached(
+    make_file_pair: FilePairFactory,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    assert (
+        run(
+            make_file_pair, "{{ count }}", ["--max-output-bytes", "4", "--max-render-seconds", "10"]
+        )
+        is None
+    )
+    assert "1000" == capsys.readouterr().out
+
+
+def test_output_limit_counts_bytes() -> None:
+    limits = RenderLimits(max_output_bytes=5)
+    assert ["é", "é"] == list(limits.enforce(["é", "é"]))
+    with pytest.raises(RenderOutputExceededError):
+        list(limits.enforce(["é", "é", "é"]))
+
+
+def test_output_file_removed(make_file_pair: FilePairFactory, tmp_path: pathlib.Path) -> None:
+    assert 5 == run(  # noqa: PLR2004
+        make_file_pair,
+        LOOP_TEMPLATE,
+        ["--max-output-bytes", "100", "--output-file", str(tmp_path / "out.txt")],
+    )
+    assert not (tmp_path / "out.txt").exists()
+
+
+def test_time_limit(
+    make_file_pair: FilePairFactory,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    with mock.patch("jinjanator.limits.time.monotonic", side_effect=range(0, 100000, 10)):
+        assert 5 == run(  # noqa: PLR2004
+            make_file_pair,
+            "{% for i in range(count|int) %}{{ i }}{% endfor %}",
+            ["--max-render-seconds", "25"],
+        )
+    assert "Render time limit of 25.0 seconds exceeded" in capsys.readouterr().err
+
+
+@pytest.mark.skipif(not hasattr(signal, "setitimer"), reason="interval timers are not available")
+def test_time_limit_without_output(tmp_path: pathlib.Path) -> None:
+    (tmp_path / "template.j2").write_text(
+        "{% for i in range(10 ** 9) %}{% set x = i %}{% endfor %}done",
+    )
+    renderer = Renderer(cwd=tmp_path, limits=RenderLimits(max_seconds=0.2))
+    handler = signal.getsignal(signal.SIGALRM)
+
+    start = time.monotonic()
+    with pytest.raises(RenderTimeExceededError):
+        renderer.render("template.j2", {})
+
+    assert time.monotonic() - start < 5  # noqa: PLR2004
+    assert handler == signal.getsignal(signal.SIGALRM)
+    assert (0.0, 0.0) == signal.getitimer(signal.ITIMER_REAL)
+
+
+@pytest.mark.skipif(not hasattr(signal, "setitimer"), reason="interval timers are not available")
+@pytest.mark.parametrize("delay", [60.0, 0.5])
+def test_time_limit_keeps_running_timer(tmp_path: pathlib.Path, delay: float) -> None:
+    (tmp_path / "template.j2").write_text("done")
+    renderer = Renderer(cwd=tmp_path, limits=RenderLimits(max_seconds=30))
+    fired: list[int] = []
+    handler = signal.signal(signal.SIGALRM, lambda signum, _: fired.append(signum))
+
+    try:
+        signal.setitimer(signal.ITIMER_REAL, delay, 120)
+        assert "done" == renderer.render("template.j2", {})
+        remaining, interval = signal.getitimer(signal.ITIMER_REAL)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, handler)
+
+    assert 0 < remaining <= delay
+    assert 120 == interval  # noqa: PLR2004
+    assert [] == fired
+
+
+def test_incremental_output_limit(make_file_pair: FilePairFactory, tmp_path: pathlib.Path) -> None:
+    assert 5 == run(  # noqa: PLR2004
+        make_file_pair,
+        LOOP_TEMPLATE,
+        [
+            "--incremental",
+            str(tmp_path / "state"),
+            "--max-output-bytes",
+            "100",
+            "--output-file",
+            str(tmp_path / "out.txt"),
+        ],
+    )
+    assert not (tmp_path / "out.txt").exists()
+
+
+def test_memory_limit(tmp_path: pathlib.Path) -> None:
+    (tmp_path / "template.j2").write_text("{{ value }}")
+    renderer = Renderer(cwd=tmp_path, limits=RenderLimits(max_memory=1024))
+    with pytest.raises(RenderMemoryExceededError, match="Memory limit of 1024 bytes exceeded"):
+        renderer.render("template.j2", {"value": 1})
+
+
+def test_renderer_render_to(tmp_path: pathlib.Path) -> None:
+    (tmp_path / "template.j2").write_text("{% for i in range(100) %}{{ i }}{% endfor %}")
+    renderer = Renderer(cwd=tmp_path, limits=RenderLimits(max_seconds=5.0))
+    with (
+        mock.patch("jinjanator.limits.time.monotonic", side_effect=itertools.count(0, 1)),
+        (tmp_path / "out.txt").open("w") as f,
+        pytest.raises(RenderTimeExceededError),
+    ):
+        renderer.render_to(f, "template.j2", {})
+    # the output generated before the limit was exceeded was written
+    assert "01234" == (tmp_path / "out.txt").read_text()
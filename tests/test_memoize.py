@@ -0,0 +1,110 @@
+from pathlib import Path
+
+import jinja2
+
+from jinjanator import Renderer, pure
+from jinjanator.memoize import MemoizedFunction, memoize
+
+
+FILTERS = """
+import jinjanator
+
+calls = []
+
+@jinjanator.pure
+def slow_double(value):
+    calls.append(value)
+    return value * 2
+
+@jinjanator.pure(maxsize=1)
+def slow_triple(value):
+    calls.append(value)
+    return value * 3
+
+def not_pure(value):
+    calls.append(value)
+    return value
+"""
+
+
+def test_pure_filters(tmp_path: Path) -> None:
+    (tmp_path / "filters.py").write_text(FILTERS)
+    (tmp_path / "template.j2").write_text(
+        "{% for x in items %}{{ x | slow_double }}{{ x | not_pure }}{% endfor %}",
+    )
+    renderer = Renderer(cwd=tmp_path, filters=[str(tmp_path / "filters.py")])
+    assert isinstance(renderer.env.filters["slow_double"], MemoizedFunction)
+    assert not isinstance(renderer.env.filters["not_pure"], MemoizedFunction)
+    assert "pure" not in renderer.env.filters
+
+    assert "21214221" == renderer.render("template.j2", {"items": [1, 1, 2, 1]})
+
+    info = renderer.cache_info()["filter:slow_double"]
+    assert (2, 2, 0) == (info.hits, info.misses, info.uncacheable)
+
+    renderer.clear_caches()
+    assert 0 == renderer.cache_info()["filter:slow_double"].currsize
+
+
+def test_maxsize(tmp_path: Path) -> None:
+    (tmp_path / "filters.py").write_text(FILTERS)
+    (tmp_path / "template.j2").write_text(
+        "{% for x in items %}{{ x | slow_triple }}{% endfor %}",
+    )
+    renderer = Renderer(cwd=tmp_path, filters=[str(tmp_path / "filters.py")])
+    assert "3636" == renderer.render("template.j2", {"items": [1, 2, 1, 2]})
+    info = renderer.cache_info()["filter:slow_triple"]
+    assert 0 == info.hits
+    assert 1 == info.currsize
+
+
+def test_equal_values_of_different_types(tmp_path: Path) -> None:
+    (tmp_path / "customize.py").write_text(
+        "from jinjanator import pure\n"
+        "\n"
+        "@pure\n"
+        "def show(value):\n"
+        "    return repr(value)\n"
+        "\n"
+        "def extra_filters():\n"
+        "    return {'show': show}\n",
+    )
+    (tmp_path / "template.j2").write_text("{{ 1|show }} {{ 1.0|show }} {{ true|show }}")
+    renderer = Renderer(cwd=tmp_path, customize=str(tmp_path / "customize.py"))
+    assert "1 1.0 True" == renderer.render("template.j2", {})
+
+
+def test_unhashable_arguments() -> None:
+    calls = []
+
+    @pure
+    def total(values: list[int]) -> int:
+        calls.append(values)
+        return sum(values)
+
+    memoized = memoize(total)
+    assert [3, 3] == [memoized([1, 2]), memoized([1, 2])]
+    assert [[1, 2], [1, 2]] == calls
+    assert 2 == memoized.cache_info().uncacheable  # noqa: PLR2004
+
+
+def test_context_functions_not_memoized() -> None:
+    @pure
+    @jinja2.pass_context
+    def lookup(context: jinja2.runtime.Context, name: str) -> str:
+        return str(context.get(name))
+
+    assert lookup is memoize(lookup)
+
+
+def test_customize_extra_filters(tmp_path: Path) -> None:
+    (tmp_path / "customize.py").write_text(
+        "from jinjanator import pure\n"
+        "\n"
+        "def extra_filters():\n"
+        "    return {'upper': pure(lambda v: v.upper())}\n",
+    )
+    (tmp_path / "template.j2").write_text("{{ 'a' | upper }}{{ 'a' | upper }}")
+    renderer = Renderer(cwd=tmp_path, customize=str(tmp_path / "customize.py"))
+    assert "AA" == renderer.render("template.j2", {})
+    assert 1 == renderer.cache_info()["filter:upper"].hits
@@ -0,0 +1,159 @@
+import json
+
+from pathlib import Path
+
+import jinja2
+import pytest
+import yaml
+
+from jinjanator import Renderer, native
+from jinjanator.limits import RenderLimits, RenderOutputExceededError
+from jinjanator.native import NativeOutputError, orjson_module, serialize
+
+from . import (
+    FilePairFactory,
+    render_file,
+)
+
+
+HOSTS = {"hosts": [{"name": 'web"1', "port": 80}, {"name": "db1", "port": 5432}]}
+
+TEMPLATE = """\
+{{ {
+  "names": hosts | map(attribute="name"),
+  "ports": hosts | map(attribute="port") | list,
+  "count": hosts | length,
+  "enabled": true,
+  "missing": none,
+} }}
+"""
+
+EXPECTED = {
+    "names": ['web"1', "db1"],
+    "ports": [80, 5432],
+    "count": 2,
+    "enabled": True,
+    "missing": None,
+}
+
+
+def make_renderer(tmp_path: Path, template: str, native_output: str, **kwargs: object) -> Renderer:
+    (tmp_path / "template.j2").write_text(template)
+    return Renderer(cwd=tmp_path, native_output=native_output, **kwargs)  # type: ignore[arg-type]
+
+
+def test_json(tmp_path: Path) -> None:
+    renderer = make_renderer(tmp_path, TEMPLATE, "json")
+    output = renderer.render("template.j2", HOSTS)
+
+    assert output.endswith("}\n")
+    assert EXPECTED == json.loads(output)
+
+
+def test_yaml(tmp_path: Path) -> None:
+    renderer = make_renderer(tmp_path, TEMPLATE, "yaml")
+
+    assert EXPECTED == yaml.safe_load(renderer.render("template.j2", HOSTS))
+
+
+def test_render_native(tmp_path: Path) -> None:
+    renderer = make_renderer(tmp_path, "{{ hosts | map(attribute='port') | sum }}\n", "json")
+
+    assert 5512 == renderer.render_native("template.j2", HOSTS)  # noqa: PLR2004
+
+
+def test_render_native_requires_format(tmp_path: Path) -> None:
+    (tmp_path / "template.j2").write_text("{{ 1 }}")
+    renderer = Renderer(cwd=tmp_path)
+
+    with pytest.raises(RuntimeError, match="requires a native output format"):
+        renderer.render_native("template.j2", {})
+
+
+def test_literal_output(tmp_path: Path) -> None:
+    renderer = make_renderer(
+        tmp_path,
+        "[{% for h in hosts %}{{ h.port }}, {% endfor %}]\n",
+        "json",
+    )
+
+    assert [80, 5432] == json.loads(renderer.render("template.j2", HOSTS))
+
+
+def test_strict_undefined(tmp_path: Path) -> None:
+    renderer = make_renderer(tmp_path, "{{ {'a': missing} }}", "json")
+
+    with pytest.raises(jinja2.UndefinedError):
+        renderer.render("template.j2", {})
+
+
+def test_allowed_undefined(tmp_path: Path) -> None:
+    renderer = make_renderer(tmp_path, "{{ {'a': missing} }}", "json", allow_undefined=True)
+
+    assert {"a": None} == json.loads(renderer.render("template.j2", {}))
+
+
+def test_unserializable(tmp_path: Path) -> None:
+    renderer = make_renderer(tmp_path, "{{ value }}", "json")
+
+    with pytest.raises(NativeOutputError, match="cannot be serialized as json"):
+        renderer.render("template.j2", {"value": {1, 2}})
+
+
+def test_output_limit(tmp_path: Path) -> None:
+    renderer = make_renderer(
+        tmp_path,
+        TEMPLATE,
+        "json",
+        limits=RenderLimits(max_output_bytes=20),
+    )
+
+    with pytest.raises(RenderOutputExceededError):
+        renderer.render("template.j2", HOSTS)
+
+
+@pytest.mark.skipif(orjson_module() is None, reason="orjson is not installed")
+def test_json_serializers_agree(monkeypatch: pytest.MonkeyPatch) -> None:
+    value = {"a": [1, 2.5, "é"], 3: None}
+    output = serialize(value, "json")
+
+    monkeypatch.setattr(native, "orjson_module", lambda: None)
+    assert output == serialize(value, "json")
+
+
+def test_cli(make_file_pair: FilePairFactory) -> None:
+    files = make_file_pair(TEMPLATE, json.dumps(HOSTS), "json")
+    output = render_file(files, ["--quiet", "--native-output", "yaml"])
+    assert EXPECTED == yaml.safe_load(output)
+
+
+def test_cli_incremental(make_file_pair: FilePairFactory, tmp_path: Path) -> None:
+    files = make_file_pair(TEMPLATE, json.dumps(HOSTS), "json")
+    output_file = tmp_path / "out.json"
+    options = [
+        "--quiet",
+        "--native-output",
+        "json",
+        "--incremental",
+        str(tmp_path / "state"),
+        "-o",
+        str(output_file),
+    ]
+
+    assert "" == render_file(files, options)
+    assert EXPECTED == json.loads(output_file.read_text())
+
+    # skipped, since nothing changed
+    output_file.write_text("unchanged")
+    assert "" == render_file(files, options)
+    assert "unchanged" == output_file.read_text()
+
+
+def test_cli_unserializable(make_file_pair: FilePairFactory, tmp_path: Path) -> None:
+    files = make_file_pair("{{ {'f': lipsum} }}", json.dumps(HOSTS), "json")
+    output_file = tmp_path / "out.json"
+
+    with pytest.raises(NativeOutputError):
+        render_file(files, ["--quiet", "--native-output", "json", "-o", str(output_file)])
+
+    assert not output_file.exists()
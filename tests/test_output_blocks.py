@@ -0,0 +1,54 @@
+import os
+import pathlib
+
+import pytest
+
+from jinja2 import TemplateRuntimeError
+
+from . import (
+    FilePairFactory,
+    render_file,
+)
+
+
+TEMPLATE = """\
+{%- for vhost in vhosts -%}
+{% output "sites/" ~ vhost ~ ".conf" %}server_name {{ vhost }};{% endoutput %}
+{%- endfor -%}
+done
+"""
+
+DATA = '{"vhosts": ["alpha", "beta"]}'
+
+
+def test_output_blocks(make_file_pair: FilePairFactory, tmp_path: pathlib.Path) -> None:
+    files = make_file_pair(TEMPLATE, DATA, "json")
+    out = tmp_path / "out"
+    assert "done\n" == render_file(files, ["--quiet", "--output-root", str(out)])
+    assert "server_name alpha;" == (out / "sites" / "alpha.conf").read_text()
+    assert "server_name beta;" == (out / "sites" / "beta.conf").read_text()
+
+
+def test_write_if_changed(make_file_pair: FilePairFactory, tmp_path: pathlib.Path) -> None:
+    files = make_file_pair(TEMPLATE, DATA, "json")
+    out = tmp_path / "out"
+    render_file(files, ["--quiet", "--output-root", str(out)])
+    alpha = out / "sites" / "alpha.conf"
+    os.utime(alpha, (0, 0))
+    render_file(files, ["--quiet", "--output-root", str(out), "--write-if-changed"])
+    assert 0 == alpha.stat().st_mtime
+    render_file(files, ["--quiet", "--output-root", str(out)])
+    assert 0 != alpha.stat().st_mtime
+
+
+def test_no_output_root(make_file_pair: FilePairFactory) -> None:
+    files = make_file_pair(TEMPLATE, DATA, "json")
+    with pytest.raises(TemplateRuntimeError, match="output root directory is configured"):
+        render_file(files, ["--quiet"])
+
+
+def test_outside_output_root(make_file_pair: FilePairFactory, tmp_path: pathlib.Path) -> None:
+    files = make_file_pair('{% output "../escape.txt" %}x{% endoutput %}', DATA, "json")
+    with pytest.raises(TemplateRuntimeError, match="outside of the output root"):
+        render_file(files, ["--quiet", "--output-root", str(tmp_path / "out")])
+    assert not (tmp_path / "escape.txt").exists()
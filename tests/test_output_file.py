@@ -1,5 +1,17 @@
+import bz2
+import gzip
+import lzma
 import pathlib
 
+from collections.abc import Callable
+from typing import IO
+
+import jinja2
+import pytest
+
+from jinjanator import compressed
+from jinjanator.compressed import open_compressed, open_output, zstd_module
+
 from . import (
     FilePairFactory,
     render_env,
@@ -24,3 +36,141 @@ def test_long_option(
     out_file = tmp_path / "j2-out"
     assert "" == render_env(files, ["--output-file", str(out_file)], env={"a": "123"})
     assert "123" == out_file.read_text()
+
+
+@pytest.mark.parametrize(
+    ("suffix", "opener"),
+    [
+        (".gz", gzip.open),
+        (".xz", lzma.open),
+        (".bz2", bz2.open),
+    ],
+)
+def test_compressed_by_suffix(
+    make_file_pair: FilePairFactory,
+    tmp_path: pathlib.Path,
+    suffix: str,
+    opener: Callable[..., IO[bytes]],
+) -> None:
+    files = make_file_pair("{{ a }}", "", "json")
+    out_file = tmp_path / f"j2-out{suffix}"
+    assert "" == render_env(files, ["-o", str(out_file)], env={"a": "123"})
+    with opener(out_file) as f:
+        assert b"123" == f.read()
+
+
+@pytest.mark.skipif(zstd_module() is None, reason="Zstandard support is not available")
+def test_compressed_zstd(
+    make_file_pair: FilePairFactory,
+    tmp_path: pathlib.Path,
+) -> None:
+    files = make_file_pair("{{ a }}", "", "json")
+    out_file = tmp_path / "j2-out.zst"
+    assert "" == render_env(files, ["-o", str(out_file)], env={"a": "123"})
+    with open_compressed(out_file, "r", "zstd") as f:
+        assert "123" == f.read()
+
+
+def test_compress_option(
+    make_file_pair: FilePairFactory,
+    tmp_path: pathlib.Path,
+) -> None:
+    files = make_file_pair("{{ a }}", "", "json")
+    out_file = tmp_path / "j2-out"
+    assert "" == render_env(
+        files,
+        ["--compress", "gzip", "-o", str(out_file)],
+        env={"a": "123"},
+    )
+    assert b"123" == gzip.decompress(out_file.read_bytes())
+
+    out_file = tmp_path / "j2-out.gz"
+    assert "" == render_env(
+        files,
+        ["--compress", "none", "-o", str(out_file)],
+        env={"a": "123"},
+    )
+    assert "123" == out_file.read_text()
+
+
+def test_compress_without_output_file(make_file_pair: FilePairFactory) -> None:
+    files = make_file_pair("{{ a }}", "", "json")
+    with pytest.raises(SystemExit):
+        render_env(files, ["--compress", "gzip"], env={"a": "123"})
+
+
+def test_failed_render_keeps_existing_output(
+    make_file_pair: FilePairFactory,
+    tmp_path: pathlib.Path,
+) -> None:
+    files = make_file_pair(
+        "line1\n{% for i in range(3) %}{{ i }}\n{% endfor %}{{ missing }}",
+        "",
+        "json",
+    )
+    out_file = tmp_path / "keep.conf"
+    out_file.write_text("GOOD")
+    out_file.chmod(0o640)
+
+    with pytest.raises(jinja2.UndefinedError):
+        render_env(files, ["-o", str(out_file)], env={})
+
+    assert "GOOD" == out_file.read_text()
+    assert [out_file] == list(tmp_path.glob("*keep.conf*"))
+
+
+def test_replaced_output_keeps_mode(tmp_path: pathlib.Path) -> None:
+    out_file = tmp_path / "out.conf"
+    out_file.write_text("old")
+    out_file.chmod(0o640)
+
+    with open_output(out_file, None) as f:
+        f.write("new")
+
+    assert "new" == out_file.read_text()
+    assert 0o640 == out_file.stat().st_mode & 0o777  # noqa: PLR2004
+
+
+def test_output_through_symlink(tmp_path: pathlib.Path) -> None:
+    real_file = tmp_path / "real.conf"
+    real_file.write_text("old")
+    link = tmp_path / "link.conf"
+    link.symlink_to(real_file)
+
+    with open_output(link, None) as f:
+        f.write("new")
+
+    assert link.is_symlink()
+    assert "new" == real_file.read_text()
+
+
+def test_output_to_hard_link(tmp_path: pathlib.Path) -> None:
+    out_file = tmp_path / "out.conf"
+    out_file.write_text("old")
+    other = tmp_path / "other.conf"
+    other.hardlink_to(out_file)
+
+    with open_output(out_file, None) as f:
+        f.write("new")
+
+    assert "new" == other.read_text()
+
+
+def test_output_written_directly_when_owner_cannot_be_kept(
+    tmp_path: pathlib.Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def fail(source: pathlib.Path, _target: pathlib.Path) -> None:
+        raise PermissionError(source)
+
+    monkeypatch.setattr(compressed, "_copy_metadata", fail)
+    out_file = tmp_path / "out.conf"
+    out_file.write_text("old")
+    inode = out_file.stat().st_ino
+
+    with open_output(out_file, None) as f:
+        f.write("new")
+
+    assert "new" == out_file.read_text()
+    assert inode == out_file.stat().st_ino
+    assert [out_file] == list(tmp_path.iterdir())
@@ -0,0 +1,80 @@
+import threading
+
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from jinja2.exceptions import TemplateNotFound, TemplateSyntaxError
+
+from jinjanator import cli
+
+from . import (
+    FilePairFactory,
+    render_env,
+    render_explicit_stream,
+    render_file,
+)
+
+
+def test_data_parsed_in_worker(
+    make_file_pair: FilePairFactory,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    threads = {}
+    read_context = cli.read_context
+    make_renderer = cli.make_renderer
+
+    def recording_read_context(*args: Any) -> Any:
+        threads["data"] = threading.current_thread()
+        return read_context(*args)
+
+    def recording_make_renderer(*args: Any) -> Any:
+        threads["renderer"] = threading.current_thread()
+        return make_renderer(*args)
+
+    monkeypatch.setattr(cli, "read_context", recording_read_context)
+    monkeypatch.setattr(cli, "make_renderer", recording_make_renderer)
+
+    files = make_file_pair("Hello {{ name }}!", '{"name": "Blart"}', "json")
+    assert "Hello Blart!" == render_file(files, ["--quiet"])
+    assert threads["renderer"] is threading.main_thread()
+    assert threads["data"] is not threading.main_thread()
+
+
+def test_stream(make_file_pair: FilePairFactory) -> None:
+    files = make_file_pair("Hello {{ name }}!", "name: Blart", "yaml")
+    assert "Hello Blart!" == render_explicit_stream(files, ["--quiet", "--format", "yaml"])
+
+
+def test_data_error_reported_first(make_file_pair: FilePairFactory) -> None:
+    # when both the data and the template are bad, the data error is
+    # reported, as it was when they were processed in sequence
+    files = make_file_pair("", "midge", "json")
+    files.template_file = Path("does-not-exist.j2")
+    with pytest.raises(TypeError, match="JSON input is neither an object nor an array"):
+        render_file(files, ["--quiet"])
+
+
+def test_template_error(make_file_pair: FilePairFactory) -> None:
+    files = make_file_pair("{% if %}", '{"name": "Blart"}', "json")
+    with pytest.raises(TemplateSyntaxError):
+        render_file(files, ["--quiet"])
+
+
+def test_template_not_found(make_file_pair: FilePairFactory) -> None:
+    files = make_file_pair("", '{"name": "Blart"}', "json")
+    files.template_file = Path("does-not-exist.j2")
+    with pytest.raises(TemplateNotFound):
+        render_file(files, ["--quiet"])
+
+
+def test_data_path_error_exit(
+    make_file_pair: FilePairFactory,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    files = make_file_pair("{{ name }}", "name=Blart", "env")
+    files.template_file = Path("does-not-exist.j2")
+    with pytest.raises(SystemExit):
+        render_env(files, ["--quiet", "--data-path", "x"], env={})
+    assert "--data-path cannot be used without input data" in capsys.readouterr().err
@@ -0,0 +1,86 @@
+import json
+import pathlib
+
+from collections.abc import Sequence
+from typing import Any
+
+import pytest
+
+from . import (
+    FilePair,
+    FilePairFactory,
+    render_file,
+)
+
+
+def render(files: FilePair, options: Sequence[str] = ()) -> str:
+    return render_file(files, ["--quiet", "--render-cache", "cache", *options])
+
+
+@pytest.fixture
+def files(make_file_pair: FilePairFactory, monkeypatch: pytest.MonkeyPatch) -> FilePair:
+    files = make_file_pair('{% include "part.j2" %}', '{"name": "Blart"}', "json")
+    (files.template_file.parent / "part.j2").write_text("{{ name }}")
+    # included templates (and the cache) are relative to the current directory
+    monkeypatch.chdir(files.template_file.parent)
+    return files
+
+
+def cache_entries() -> list[pathlib.Path]:
+    return sorted(pathlib.Path("cache").glob("*/*.json"))
+
+
+def test_hit(files: FilePair) -> None:
+    assert "Blart" == render(files)
+    [entry] = cache_entries()
+    # make the cached output distinguishable from a fresh render
+    content = json.loads(entry.read_text())
+    content["output"] = "cached"
+    entry.write_text(json.dumps(content))
+    assert "cached" == render(files)
+
+
+def test_hit_output_file(files: FilePair) -> None:
+    out_file = pathlib.Path("out.txt")
+    render(files, ["-o", str(out_file)])
+    out_file.unlink()
+    render(files, ["-o", str(out_file)])
+    assert "Blart" == out_file.read_text()
+
+
+@pytest.mark.parametrize(
+    ("name", "content"),
+    [
+        ("data.json", '{"name": "Changed"}'),
+        ("template.j2", '{% include "part.j2" %}!'),
+        ("part.j2", "{{ name }}?"),
+    ],
+)
+def test_invalidation(files: FilePair, name: str, content: str) -> None:
+    render(files)
+    (pathlib.Path(name)).write_text(content)
+    assert "Blart" != render(files)
+
+
+def test_environment_variable(files: FilePair, monkeypatch: Any) -> None:
+    pathlib.Path("part.j2").write_text("{{ 'JINJANATOR_TEST_VAR'|env('unset') }}")
+    monkeypatch.setenv("JINJANATOR_TEST_VAR", "one")
+    assert "one" == render(files)
+    [entry] = cache_entries()
+    assert {"JINJANATOR_TEST_VAR": "one"} == json.loads(entry.read_text())["environment"]
+    monkeypatch.setenv("JINJANATOR_TEST_VAR", "two")
+    assert "two" == render(files)
+    monkeypatch.delenv("JINJANATOR_TEST_VAR")
+    assert "unset" == render(files)
+
+
+def test_options_are_part_of_key(files: FilePair) -> None:
+    render(files)
+    render(files, ["--undefined"])
+    assert 2 == len(cache_entries())  # noqa: PLR2004
+
+
+def test_not_with_output_root(files: FilePair, capsys: Any) -> None:
+    with pytest.raises(SystemExit):
+        render(files, ["--output-root", "out"])
+    assert "--render-cache cannot be used with" in capsys.readouterr().err
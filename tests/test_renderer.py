@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from pathlib import Path
+
+from jinjanator import Renderer
+
+
+def test_render(tmp_path: Path) -> None:
+    (tmp_path / "template.j2").write_text("Hello {{ name }}!")
+    renderer = Renderer(cwd=tmp_path)
+    assert "Hello Blart!" == renderer.render("template.j2", {"name": "Blart"})
+    assert "Hello Midge!" == renderer.render("template.j2", {"name": "Midge"})
+
+
+def test_render_to(tmp_path: Path) -> None:
+    (tmp_path / "template.j2").write_text("{% for x in items %}{{ x }},{% endfor %}")
+    renderer = Renderer(cwd=tmp_path)
+    out = StringIO()
+    renderer.render_to(out, "template.j2", {"items": [1, 2, 3]})
+    assert "1,2,3," == out.getvalue()
+
+
+def test_load_context(tmp_path: Path) -> None:
+    (tmp_path / "template.j2").write_text("{{ a }}/{{ env.B }}")
+    renderer = Renderer(cwd=tmp_path)
+    context = renderer.load_context(
+        StringIO('{"a": 1}'), "json", environ={"B": "2"}, import_env="env"
+    )
+    assert "1/2" == renderer.render("template.j2", context)
+
+
+def test_customizations(tmp_path: Path) -> None:
+    (tmp_path / "template.j2").write_text("{{ key | with_parens }}/{{ added }}")
+    (tmp_path / "customize.py").write_text(
+        "def alter_context(context):\n"
+        "    context['added'] = 'yes'\n"
+        "    return context\n"
+        "\n"
+        "def extra_filters():\n"
+        "    return {'with_parens': lambda v: f'({v})'}\n",
+    )
+    renderer = Renderer(cwd=tmp_path, customize=str(tmp_path / "customize.py"))
+    context = {"key": "value"}
+    assert "(value)/yes" == renderer.render("template.j2", context)
+    # the caller's context must not be modified by 'alter_context'
+    assert {"key": "value"} == context
+
+
+def test_concurrent_render(tmp_path: Path) -> None:
+    (tmp_path / "template.j2").write_text('{% include "inner.j2" %}')
+    (tmp_path / "inner.j2").write_text("{% for x in range(n) %}{{ x }}{% endfor %}")
+    renderer = Renderer(cwd=tmp_path)
+
+    def render(n: int) -> str:
+        return renderer.render("template.j2", {"n": n})
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(render, [i % 20 for i in range(400)]))
+
+    assert results == ["".join(str(x) for x in range(i % 20)) for i in range(400)]
@@ -0,0 +1,127 @@
+import datetime as dt
+import pathlib
+
+import jinja2
+import pytest
+
+from jinjanator.cli import main
+from jinjanator.specialize import specialize
+
+from . import (
+    FilePairFactory,
+    render_env,
+    render_file,
+)
+
+
+STATIC = {
+    "site": {
+        "name": "example",
+        "debug": False,
+        "servers": [{"name": "a"}, {"name": "b"}],
+        "created": dt.date(2024, 1, 2),
+    },
+    "host": "static-host",
+}
+
+
+def make_env(templates: dict[str, str]) -> jinja2.Environment:
+    return jinja2.Environment(
+        loader=jinja2.DictLoader(templates),
+        extensions=["jinja2.ext.do"],
+        keep_trailing_newline=True,
+        undefined=jinja2.StrictUndefined,
+        autoescape=False,  # noqa: S701
+    )
+
+
+@pytest.mark.parametrize(
+    ("source", "expected"),
+    [
+        ("{{ site.name|upper }}{% if site.debug %} debug{% endif %}", "EXAMPLE"),
+        ("{% for s in site.servers %}{{ s.name }}@{{ name }} {% endfor %}", "a@h b@h "),
+        ("{{ site.created }}", "2024-01-02"),
+        ('{% include "part" %}', "example/h"),
+        ("{% set host = name %}{{ host }}", "h"),
+        ("{% for host in [name] %}{{ host }}{% endfor %}", "h"),
+        ("{% macro m(site) %}{{ site }}{% endmacro %}{{ m(name) }}", "h"),
+    ],
+)
+def test_specialize(source: str, expected: str) -> None:
+    env = make_env({"template": source, "part": "{{ site.name }}/{{ name }}"})
+    template = specialize(env, "template", STATIC)
+    assert expected == template.render(name="h")
+    assert expected == env.get_template("template").render(STATIC, name="h")
+
+
+def test_literals_are_not_shared() -> None:
+    env = make_env({"template": "{% set acc = [] %}{% do acc.append(name) %}{{ acc }}"})
+    template = specialize(env, "template", STATIC)
+    assert "['a']" == template.render(name="a")
+    assert "['b']" == template.render(name="b")
+
+
+def test_missing_static_attribute() -> None:
+    env = make_env({"template": "{{ site.missing }}"})
+    template = specialize(env, "template", STATIC)
+    with pytest.raises(jinja2.UndefinedError):
+        template.render()
+
+
+def test_static_data_option(make_file_pair: FilePairFactory, tmp_path: pathlib.Path) -> None:
+    files = make_file_pair("{{ site.name }} {{ name }}", '{"name": "h"}', "json")
+    (tmp_path / "site.yaml").write_text("site:\n  name: example\n")
+    assert "example h" == render_file(
+        files,
+        ["--quiet", "--static-data", str(tmp_path / "site.yaml")],
+    )
+
+
+def test_static_data_with_bundle(
+    tmp_path: pathlib.Path,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    (tmp_path / "site.yaml").write_text("site:\n  name: example\n")
+    assert 1 == main(
+        [
+            "",
+            "--quiet",
+            "--static-data",
+            str(tmp_path / "site.yaml"),
+            "--template-bundle",
+            str(tmp_path / "bundle"),
+            "template.j2",
+        ],
+    )
+    assert "--static-data cannot be used with --template-bundle" in capsys.readouterr().err
+
+
+@pytest.mark.parametrize("jobs", ["1", "2"])
+def test_static_data_fan_out(
+    make_file_pair: FilePairFactory,
+    tmp_path: pathlib.Path,
+    jobs: str,
+) -> None:
+    # the data files are in the fan-out directory, not the pair's data file
+    files = make_file_pair("{{ site.name }} {{ name }}", "", "json")
+    (tmp_path / "site.yaml").write_text("site:\n  name: example\n")
+    (tmp_path / "hosts").mkdir()
+    (tmp_path / "hosts" / "a.json").write_text('{"name": "a"}')
+    (tmp_path / "hosts" / "b.json").write_text('{"name": "b"}')
+    render_env(
+        files,
+        [
+            "--quiet",
+            "--static-data",
+            str(tmp_path / "site.yaml"),
+            "--fan-out",
+            str(tmp_path / "hosts"),
+            "--output-pattern",
+            str(tmp_path / "out" / "{stem}"),
+            "--jobs",
+            jobs,
+        ],
+        env={},
+    )
+    assert "example a" == (tmp_path / "out" / "a").read_text()
+    assert "example b" == (tmp_path / "out" / "b").read_text()
@@ -0,0 +1,74 @@
+import json
+import pathlib
+import time
+
+from typing import Any
+
+import pytest
+
+from jinjanator.context import ijson_module
+from jinjanator.stats import Stats
+
+from . import (
+    FilePairFactory,
+    render_file,
+)
+
+
+def test_nested_phases() -> None:
+    stats = Stats()
+    with stats.phase("outer"):
+        time.sleep(0.01)
+        with stats.phase("inner"):
+            time.sleep(0.05)
+    assert stats.phases["inner"].wall >= 0.05  # noqa: PLR2004
+    assert stats.phases["outer"].wall < stats.phases["inner"].wall
+
+
+def test_text_report(make_file_pair: FilePairFactory, capsys: Any) -> None:
+    files = make_file_pair("Hello {{name}}!", "name=Blart", "env")
+    assert "Hello Blart!" == render_file(files, ["--quiet", "--stats=text"])
+    err = capsys.readouterr().err
+    for phase in (
+        "plugin discovery",
+        "argument parsing",
+        "data parsing",
+        "customization load",
+        "environment construction",
+        "template load",
+        "render",
+        "total",
+    ):
+        assert phase in err
+    assert "templates loaded: 1" in err
+    assert "bytes read: 10" in err
+    assert "bytes written: 12" in err
+
+
+@pytest.mark.skipif(ijson_module() is None, reason="ijson is not installed")
+def test_bytes_read_with_data_path(make_file_pair: FilePairFactory, capsys: Any) -> None:
+    data = '{"site": {"name": "Blart"}, "other": [1, 2, 3]}'
+    files = make_file_pair("Hello {{name}}!", data, "json")
+    assert "Hello Blart!" == render_file(
+        files,
+        ["--quiet", "--stats=text", "--data-path", "site"],
+    )
+    assert f"bytes read: {len(data)}" in capsys.readouterr().err
+
+
+def test_json_report_to_file(
+    make_file_pair: FilePairFactory,
+    tmp_path: pathlib.Path,
+    capsys: Any,
+) -> None:
+    files = make_file_pair("{{ a }}", '{"a": "é"}', "json")
+    out_file = tmp_path / "out"
+    stats_file = tmp_path / "stats.json"
+    assert "" == render_file(
+        files,
+        ["--quiet", "--stats=json", "--stats-file", str(stats_file), "-o", str(out_file)],
+    )
+    assert "" == capsys.readouterr().err
+    report = json.loads(stats_file.read_text())
+    assert {"wall", "cpu"} == set(report["phases"]["output write"])
+    assert 2 == report["counters"]["bytes written"]  # noqa: PLR2004
@@ -0,0 +1,176 @@
+import io
+import json
+
+from pathlib import Path
+from typing import Any
+
+import jinja2
+import pytest
+
+from jinjanator.cli import main, stdio_server_command
+
+
+def serve(tmp_path: Path, requests: list[Any], options: list[str] | None = None) -> list[Any]:
+    stdin = io.StringIO(
+        "".join((r if isinstance(r, str) else json.dumps(r)) + "\n" for r in requests),
+    )
+    stdout = io.StringIO()
+    stdio_server_command(
+        tmp_path,
+        {"USER": "blart"},
+        stdin,
+        stdout,
+        ["", "--stdio-server", "--quiet", *(options or [])],
+    )
+    return [json.loads(line) for line in stdout.getvalue().splitlines()]
+
+
+@pytest.fixture
+def templates(tmp_path: Path) -> Path:
+    (tmp_path / "hello.j2").write_text("Hello {{ name }}!")
+    (tmp_path / "data.yaml").write_text("name: Midge\nsite:\n  name: Bloomington\n")
+    return tmp_path
+
+
+def test_inline_context(templates: Path) -> None:
+    assert [{"id": 1, "status": 0, "output": "Hello Blart!"}] == serve(
+        templates,
+        [{"id": 1, "template": "hello.j2", "context": {"name": "Blart"}}],
+    )
+
+
+def test_data_file(templates: Path) -> None:
+    assert [
+        {"id": "a", "status": 0, "output": "Hello Midge!"},
+        {"id": "b", "status": 0, "output": "Hello Bloomington!"},
+    ] == serve(
+        templates,
+        [
+            {"id": "a", "template": "hello.j2", "data": "data.yaml"},
+            {"id": "b", "template": "hello.j2", "data": "data.yaml", "data_path": "site"},
+        ],
+    )
+
+
+def test_import_env(templates: Path) -> None:
+    (templates / "env.j2").write_text("{{ env.USER }}/{{ USER }}")
+    assert [{"id": None, "status": 0, "output": "blart/blart"}] == serve(
+        templates,
+        [
+            {"template": "env.j2", "context": {"USER": "blart"}, "import_env": "env"},
+        ],
+    )
+
+
+def test_output_file(templates: Path) -> None:
+    assert [{"id": 1, "status": 0, "output": None}] == serve(
+        templates,
+        [{"id": 1, "template": "hello.j2", "context": {"name": "Blart"}, "output": "out.txt"}],
+    )
+    assert "Hello Blart!" == (templates / "out.txt").read_text()
+
+
+def test_failed_output_file(templates: Path) -> None:
+    (templates / "out.txt").write_text("GOOD")
+
+    [result] = serve(templates, [{"template": "hello.j2", "context": {}, "output": "out.txt"}])
+
+    assert 1 == result["status"]
+    assert "GOOD" == (templates / "out.txt").read_text()
+
+
+def test_template_compiled_once(templates: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    compiled = []
+    compile_template = jinja2.Environment.compile
+
+    def counting_compile(self: jinja2.Environment, *args: Any, **kwargs: Any) -> Any:
+        compiled.append(args[1])
+        return compile_template(self, *args, **kwargs)
+
+    monkeypatch.setattr(jinja2.Environment, "compile", counting_compile)
+
+    responses = serve(
+        templates,
+        [{"template": "hello.j2", "context": {"name": name}} for name in ("a", "b", "c")],
+    )
+    assert ["Hello a!", "Hello b!", "Hello c!"] == [r["output"] for r in responses]
+    assert ["hello.j2"] == compiled
+
+
+@pytest.mark.parametrize(
+    ("request_line", "error"),
+    [
+        ("not json", "Request is not valid JSON"),
+        ("[1, 2]", "Request is not a JSON object"),
+        ('{"id": 7, "context": {}}', "Request has no 'template'"),
+        ('{"id": 7, "template": "hello.j2"}', "Request must have either 'context' or 'data'"),
+        ('{"id": 7, "template": "hello.j2", "context": {}, "extra": 1}', "Unknown request field"),
+        ('{"id": 7, "template": "hello.j2", "context": []}', "'context' has the wrong type"),
+        (
+            '{"id": 7, "template": "hello.j2", "data": "data.yaml", "format_options": [1]}',
+            "'format_options' has the wrong type",
+        ),
+    ],
+)
+def test_invalid_requests(templates: Path, request_line: str, error: str) -> None:
+    [response] = serve(templates, [request_line])
+    assert 1 == response["status"]
+    assert error in response["error"]
+    assert response["id"] in (None, 7)
+
+
+@pytest.mark.parametrize(
+    ("request_fields", "status", "exception"),
+    [
+        ({"template": "missing.j2", "context": {}}, 1, "TemplateNotFound"),
+        ({"template": "hello.j2", "context": {}}, 1, "UndefinedError"),
+        ({"template": "hello.j2", "data": "data.yaml", "format_options": ["x"]}, 2, None),
+    ],
+)
+def test_errors(
+    templates: Path,
+    request_fields: dict[str, Any],
+    status: int,
+    exception: str | None,
+) -> None:
+    # errors do not stop the server from handling later requests
+    [response, later] = serve(
+        templates,
+        [request_fields, {"template": "hello.j2", "context": {"name": "Blart"}}],
+    )
+    assert status == response["status"]
+    if exception:
+        assert exception == response["exception"]
+    assert "Hello Blart!" == later["output"]
+
+
+def test_render_limit(templates: Path) -> None:
+    (templates / "big.j2").write_text("{% for i in range(1000) %}{{ i }}{% endfor %}")
+    [response] = serve(
+        templates,
+        [{"template": "big.j2", "context": {}}],
+        ["--max-output-bytes", "100"],
+    )
+    assert 5 == response["status"]  # noqa: PLR2004
+
+
+def test_memory_limit_rejected(templates: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    with pytest.raises(SystemExit):
+        serve(templates, [], ["--max-memory", "1G"])
+    assert "--max-memory cannot be used with --stdio-server" in capsys.readouterr().err
+
+
+def test_main(
+    templates: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    capsys: pytest.CaptureFixture[str],
+) -> None:
+    monkeypatch.chdir(templates)
+    monkeypatch.setattr(
+        "sys.stdin",
+        io.StringIO('{"template": "hello.j2", "context": {"name": "Blart"}}\n'),
+    )
+    assert main(["", "--quiet", "--stdio-server"]) is None
+    assert {"id": None, "status": 0, "output": "Hello Blart!"} == json.loads(
+        capsys.readouterr().out,
+    )
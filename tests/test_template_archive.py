@@ -0,0 +1,68 @@
+import pathlib
+import shutil
+
+from typing import Any
+
+import pytest
+
+from attrs import evolve
+from jinja2 import TemplateNotFound
+
+from jinjanator.archive import ArchiveLoader
+
+from . import (
+    FilePair,
+    FilePairFactory,
+    TemplateTreeFactory,
+    render_file,
+)
+
+
+TEMPLATES = {
+    "main.j2": '{% include "sub/part.j2" %}/{{ name }}',
+    "sub/part.j2": "part",
+}
+
+
+@pytest.fixture
+def files(make_file_pair: FilePairFactory) -> FilePair:
+    return make_file_pair("", '{"name": "Blart"}', "json")
+
+
+def make_archive(make_template_tree: TemplateTreeFactory, archive_format: str) -> pathlib.Path:
+    tree = make_template_tree(TEMPLATES)
+    return pathlib.Path(shutil.make_archive(str(tree.parent / "t"), archive_format, tree))
+
+
+def render(files: FilePair, archive: pathlib.Path, template: str = "main.j2") -> str:
+    # the template is named by its path in the archive
+    return render_file(
+        evolve(files, template_file=pathlib.Path(template)),
+        ["--quiet", "--template-archive", str(archive)],
+    )
+
+
+@pytest.mark.parametrize("archive_format", ["zip", "gztar"])
+def test_render(
+    files: FilePair,
+    make_template_tree: TemplateTreeFactory,
+    archive_format: str,
+) -> None:
+    archive = make_archive(make_template_tree, archive_format)
+    # remove the sources to prove that the archive is used
+    shutil.rmtree(archive.parent / "templates")
+    assert "part/Blart" == render(files, archive)
+    assert ["main.j2", "sub/part.j2"] == ArchiveLoader(archive).list_templates()
+
+
+def test_template_not_found(files: FilePair, make_template_tree: TemplateTreeFactory) -> None:
+    archive = make_archive(make_template_tree, "zip")
+    with pytest.raises(TemplateNotFound):
+        render(files, archive, "missing.j2")
+
+
+def test_invalid_archive(files: FilePair, tmp_path: pathlib.Path, capsys: Any) -> None:
+    (tmp_path / "t.zip").write_text("not an archive")
+    with pytest.raises(SystemExit):
+        render(files, tmp_path / "t.zip")
+    assert "could not be opened" in capsys.readouterr().err